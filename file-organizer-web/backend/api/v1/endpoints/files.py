@@ -2,28 +2,55 @@
 File browsing endpoints.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 
-from schemas.file import DirectoryContents, FileInfo, FileSearchResult
-from services.file_browser import FileBrowserService
+from core.config import settings
+from schemas.file import (
+    DirectoryContents, DirectorySizeInfo, DirectorySizesRequest, FileInfo, FileInfoBatchRequest, FileSearchResult
+)
+from services.file_browser import FileBrowserService, parse_fields
 
 
 router = APIRouter(prefix="/files", tags=["files"])
 file_browser = FileBrowserService()
 
 
-@router.get("/browse", response_model=DirectoryContents)
+# Fields left out by a fields= projection are not set, so they are not sent
+@router.get("/browse", response_model=DirectoryContents, response_model_exclude_unset=True)
 def browse_directory(
     path: str = Query(..., description="Directory path to browse"),
-    include_hidden: bool = Query(False, description="Include hidden files")
+    include_hidden: bool = Query(False, description="Include hidden files"),
+    sort: Optional[str] = Query(None, description="Paginate, sorted by name, size, mtime or type"),
+    order: str = Query("asc", description="Sort order", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, description="Paginate, with this many entries per page", ge=1, le=5000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,is_hidden (name and path always are)"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Browse a directory and get its contents.
     
+    With sort, limit or cursor the contents come one page at a time,
+    directories first, with next_cursor set while there are more. Without
+    them the whole directory is returned with a strong ETag, and a request
+    whose If-None-Match names the current listing gets a 304 without a body.
+    
+    With fields, only those fields of each file and directory are filled
+    in, and what they do not need is skipped: names and types alone take
+    one pass over the directory, without a stat per entry.
+    
     Args:
         path: Directory path
         include_hidden: Whether to include hidden files
+        sort: Sort key of a paginated browse
+        order: asc or desc
+        limit: Entries per page (defaults to BROWSE_PAGE_SIZE)
+        cursor: Where the previous page ended
+        fields: FileInfo/DirectoryInfo fields to return
+        if_none_match: ETags the client already has
         
     Returns:
         Directory contents with files and subdirectories
@@ -32,7 +59,24 @@ def browse_directory(
         HTTPException: If path is invalid or access denied
     """
     try:
-        return file_browser.get_directory_contents(path, include_hidden)
+        projection = parse_fields(fields.split(",") if fields else None)
+        if sort is not None or limit is not None or cursor is not None:
+            return file_browser.get_directory_page(
+                path,
+                include_hidden,
+                sort=sort or "name",
+                descending=order == "desc",
+                limit=limit or settings.BROWSE_PAGE_SIZE,
+                cursor=cursor,
+                fields=projection
+            )
+        
+        listing = file_browser.get_directory_listing(path, include_hidden, projection)
+        # Clients may keep the listing but must check it is current before reusing it
+        headers = {"ETag": listing.etag, "Cache-Control": "no-cache"}
+        if listing.matches_etag(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(content=listing.body, media_type="application/json", headers=headers)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except PermissionError as e:
@@ -41,13 +85,17 @@ def browse_directory(
         raise HTTPException(status_code=500, detail=f"Error browsing directory: {str(e)}")
 
 
-@router.get("/info", response_model=FileInfo)
-def get_file_info(path: str = Query(..., description="File path")):
+@router.get("/info", response_model=FileInfo, response_model_exclude_unset=True)
+def get_file_info(
+    path: str = Query(..., description="File path"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,is_hidden (name and path always are)")
+):
     """
     Get information about a specific file.
     
     Args:
         path: File path
+        fields: FileInfo fields to return (the file is not stat'ed unless they need it)
         
     Returns:
         File information
@@ -56,7 +104,12 @@ def get_file_info(path: str = Query(..., description="File path")):
         HTTPException: If file not found or access denied
     """
     try:
-        return file_browser.get_file_info(path)
+        projection = parse_fields(fields.split(",") if fields else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        return file_browser.get_file_info(path, projection)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except PermissionError as e:
@@ -65,19 +118,62 @@ def get_file_info(path: str = Query(..., description="File path")):
         raise HTTPException(status_code=500, detail=f"Error getting file info: {str(e)}")
 
 
-@router.get("/search", response_model=FileSearchResult)
+@router.post("/info:batch")
+def get_file_infos(request: FileInfoBatchRequest):
+    """
+    Get information about many files in one request.
+    
+    Streams newline-delimited JSON, one {"path", "info"} line per file (or
+    {"path", "error"} if it cannot be read) as soon as it is ready, so the
+    order is not the request order.
+    
+    Args:
+        request: File paths and the fields to return
+        
+    Returns:
+        NDJSON stream of file information
+        
+    Raises:
+        HTTPException: If a field is unknown
+    """
+    try:
+        projection = parse_fields(request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return StreamingResponse(
+        (result.model_dump_json(exclude_unset=True) + "\n" for result in file_browser.get_file_infos(request.paths, projection)),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/search", response_model=FileSearchResult, response_model_exclude_unset=True)
 def search_files(
     base_path: str = Query(..., description="Base directory to search in"),
     pattern: str = Query(..., description="Search pattern"),
-    max_results: int = Query(100, description="Maximum number of results", ge=1, le=1000)
+    max_results: int = Query(100, description="Maximum number of results", ge=1, le=1000),
+    mode: str = Query("contains", description="contains, prefix or glob (whole name, with * ? [...])"),
+    extensions: Optional[str] = Query(None, description="Comma-separated extensions to keep, e.g. jpg,png"),
+    min_size: Optional[int] = Query(None, description="Smallest file size in bytes", ge=0),
+    max_size: Optional[int] = Query(None, description="Largest file size in bytes", ge=0),
+    modified_after: Optional[datetime] = Query(None, description="Only files modified at or after this time"),
+    modified_before: Optional[datetime] = Query(None, description="Only files modified before this time"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,is_hidden (name and path always are)")
 ):
     """
-    Search for files matching a pattern.
+    Search for files by name, best matches first.
     
     Args:
         base_path: Base directory to search in
-        pattern: Search pattern (simple text matching)
+        pattern: Search pattern
         max_results: Maximum number of results
+        mode: How the pattern is matched against names
+        extensions: Extensions to keep
+        min_size: Smallest file size
+        max_size: Largest file size
+        modified_after: Earliest modification time
+        modified_before: Modification time to stay before
+        fields: FileInfo fields to return
         
     Returns:
         Search results
@@ -86,7 +182,18 @@ def search_files(
         HTTPException: If search fails
     """
     try:
-        files = file_browser.search_files(base_path, pattern, max_results)
+        files = file_browser.search_files(
+            base_path,
+            pattern,
+            max_results,
+            mode=mode,
+            extensions=extensions.split(",") if extensions else None,
+            min_size=min_size,
+            max_size=max_size,
+            modified_after=modified_after,
+            modified_before=modified_before,
+            fields=parse_fields(fields.split(",") if fields else None)
+        )
         return FileSearchResult(
             files=files,
             total_count=len(files),
@@ -99,3 +206,65 @@ def search_files(
         raise HTTPException(status_code=403, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching files: {str(e)}")
+
+
+@router.post("/sizes", response_model=List[DirectorySizeInfo])
+def get_directory_sizes(request: DirectorySizesRequest):
+    """
+    Get recursive sizes of directories.
+    
+    Browse reports subdirectories whose sizes are still being measured as
+    pending (or stale, with their last known totals); clients poll this
+    endpoint for them, optionally waiting for the measurements to finish.
+    
+    Args:
+        request: Directory paths and how long to wait
+        
+    Returns:
+        Size of each directory, in request order
+    """
+    try:
+        return file_browser.get_directory_sizes(request.paths, request.wait)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting directory sizes: {str(e)}")
+
+
+@router.get("/duplicates")
+def find_duplicates(
+    path: str = Query(..., description="Directory to search for duplicates (recursively)"),
+    min_size: int = Query(1, description="Smallest file size to consider, in bytes", ge=1),
+    include_hidden: bool = Query(False, description="Include hidden files and directories"),
+    max_depth: Optional[int] = Query(None, description="Directory levels to descend", ge=0)
+):
+    """
+    Find groups of identical files under a directory.
+    
+    Streams newline-delimited JSON: one {"type": "group"} line per group as
+    soon as it is confirmed, then a {"type": "summary"} line.
+    
+    Args:
+        path: Directory to search
+        min_size: Smallest file size considered
+        include_hidden: Whether to include hidden files
+        max_depth: Directory levels to descend (unlimited if omitted)
+        
+    Returns:
+        NDJSON stream of duplicate groups
+        
+    Raises:
+        HTTPException: If path is invalid or access denied
+    """
+    try:
+        results = file_browser.find_duplicates(path, min_size, include_hidden, max_depth)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding duplicates: {str(e)}")
+    
+    return StreamingResponse(
+        (result.model_dump_json() + "\n" for result in results),
+        media_type="application/x-ndjson"
+    )
+
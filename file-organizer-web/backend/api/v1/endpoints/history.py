@@ -2,13 +2,13 @@
 Organization history and analytics endpoints.
 """
 
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, select, desc
 
 from core.database import get_session
 from models.organization import OrganizationHistory
-from schemas.history import HistoryResponse, HistoryStats, HistoryAnalytics
+from schemas.history import HistoryResponse, HistoryStats, HistoryAnalytics, StorageStats
 from services.analytics import AnalyticsService
 
 
@@ -114,6 +114,32 @@ def get_analytics_dashboard(
         )
 
 
+@router.get("/analytics/storage", response_model=StorageStats)
+def get_storage_stats(
+    path: Optional[str] = Query(None, description="Directory to limit the totals to"),
+    top_extensions: int = Query(20, description="Number of extensions to return", ge=1, le=200)
+):
+    """
+    Get file counts and sizes by category and extension (requires CATALOG_ENABLED).
+    
+    Args:
+        path: Directory to limit the totals to
+        top_extensions: Number of extensions to return
+        
+    Returns:
+        Storage statistics
+    """
+    try:
+        return analytics.get_storage_stats(path, top_extensions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error calculating storage stats: {str(e)}"
+        )
+
+
 @router.delete("/{operation_id}")
 def delete_operation(
     operation_id: int,
@@ -2,33 +2,97 @@
 File organization endpoints.
 """
 
+import os
+import json
+import asyncio
+import logging
+from pathlib import Path
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 
-from core.database import get_session
+from core.config import settings
+from core.database import engine, get_session
 from models.organization import OrganizationHistory
 from schemas.organize import (
     OrganizeRequest,
     OrganizePreview,
     OrganizeResponse,
+    PlanMovesPage,
     UndoRequest,
     UndoResponse,
+    ResumeRequest,
+    JobStatus,
 )
 from services.file_organizer import FileOrganizerService
+from services.jobs import JobCancelled, JobProgress, job_manager
+from services.plan_store import OrganizePlan, PlanStore
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/organize", tags=["organize"])
 organizer = FileOrganizerService()
+plan_store = PlanStore(settings.PLAN_CACHE_SIZE, settings.PLAN_TTL_SECONDS)
+
+
+def _get_request_plan(request: OrganizeRequest) -> Optional[OrganizePlan]:
+    """
+    Look up the stored plan referenced by a request.
+    
+    Args:
+        request: Organization request parameters
+        
+    Returns:
+        The plan, or None if no plan ID was given or it has expired
+        
+    Raises:
+        HTTPException: If the plan was made for a different operation
+    """
+    if not request.plan_id:
+        return None
+    
+    plan = plan_store.get(request.plan_id)
+    if plan is None:
+        logger.info(f"Plan {request.plan_id} not found or expired, rescanning")
+        return None
+    
+    if not plan.matches(
+        str(Path(request.source_directory).resolve()),
+        request.operation_type,
+        request.create_others,
+        request.date_format or "%Y/%m",
+        request.recursive,
+        request.max_depth,
+        request.exclude,
+        request.dedup
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="Plan does not match the requested organization"
+        )
+    
+    return plan
 
 
 @router.post("/preview", response_model=OrganizePreview)
-def preview_organization(request: OrganizeRequest):
+def preview_organization(
+    request: OrganizeRequest,
+    limit: int = Query(settings.PREVIEW_PAGE_SIZE, ge=0, le=10000, description="Moves to include in the response")
+):
     """
     Preview file organization without executing it.
     
+    The plan is kept server-side; pass the returned plan_id to
+    /organize/execute to apply it without rescanning the directory.
+    The response carries the stats and the first `limit` moves; the rest
+    are served from the stored plan by /organize/plans/{plan_id}/moves.
+    
     Args:
         request: Organization request parameters
+        limit: Number of moves to include
         
     Returns:
         Preview of planned file moves
@@ -37,32 +101,230 @@ def preview_organization(request: OrganizeRequest):
         HTTPException: If preview fails
     """
     try:
-        if request.operation_type == "by_type":
-            return organizer.preview_organize_by_type(
-                request.source_directory,
-                request.create_others
-            )
-        else:  # by_date
-            return organizer.preview_organize_by_date(
-                request.source_directory,
-                request.date_format or "%Y/%m"
-            )
+        plan = organizer.create_plan(
+            request.source_directory,
+            request.operation_type,
+            create_others=request.create_others,
+            date_format=request.date_format or "%Y/%m",
+            recursive=request.recursive,
+            max_depth=request.max_depth,
+            exclude=request.exclude,
+            dedup=request.dedup
+        )
+        plan_store.put(plan)
+        return organizer.build_preview(plan, limit)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error previewing organization: {str(e)}")
 
 
+def _get_stored_plan(plan_id: str) -> OrganizePlan:
+    """
+    Look up a previewed plan by ID.
+    
+    Args:
+        plan_id: Plan ID returned by /organize/preview
+        
+    Returns:
+        The plan
+        
+    Raises:
+        HTTPException: If the plan is unknown, expired or already executed
+    """
+    plan = plan_store.get(plan_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Plan not found or expired; preview again")
+    return plan
+
+
+@router.get("/plans/{plan_id}/moves", response_model=PlanMovesPage)
+def get_plan_moves(
+    plan_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (omit for the first page)"),
+    limit: int = Query(settings.PREVIEW_PAGE_SIZE, ge=1, le=10000, description="Moves per page")
+):
+    """
+    Page through the moves of a previewed plan.
+    
+    Plans do not change once made, so pages are consistent with each other
+    and with the preview's stats.
+    
+    Args:
+        plan_id: Plan ID returned by /organize/preview
+        cursor: Cursor of the page to fetch
+        limit: Moves per page
+        
+    Returns:
+        A page of moves and the cursor of the next one
+        
+    Raises:
+        HTTPException: If the plan is unknown or the cursor is invalid
+    """
+    plan = _get_stored_plan(plan_id)
+    try:
+        start = int(cursor) if cursor else 0
+    except ValueError:
+        start = -1
+    if not 0 <= start <= len(plan.entries):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    moves, next_start = organizer.plan_moves(plan, start, limit)
+    return PlanMovesPage(
+        plan_id=plan.plan_id,
+        total_files=len(plan.entries),
+        moves=moves,
+        next_cursor=str(next_start) if next_start is not None else None
+    )
+
+
+@router.get("/plans/{plan_id}/moves/stream")
+def stream_plan_moves(plan_id: str):
+    """
+    Stream every move of a previewed plan as NDJSON, one FileMove per line.
+    
+    Args:
+        plan_id: Plan ID returned by /organize/preview
+        
+    Returns:
+        Streaming response of application/x-ndjson
+        
+    Raises:
+        HTTPException: If the plan is unknown or expired
+    """
+    plan = _get_stored_plan(plan_id)
+    return StreamingResponse(organizer.stream_moves(plan), media_type="application/x-ndjson")
+
+
+def _finish_job(session: Session, history: OrganizationHistory, progress: JobProgress, state: str, error: Optional[str] = None):
+    """Commit the job's history update, then publish its final state."""
+    session.add(history)
+    session.commit()
+    # History is final before anyone watching the job sees it end
+    progress.finish(state, error)
+
+
+def _organize_job(operation_id: int, request: OrganizeRequest, plan: Optional[OrganizePlan], progress: JobProgress):
+    """
+    Background job body: plan (unless previewed), apply and record the result.
+    
+    Args:
+        operation_id: OrganizationHistory ID of the operation
+        request: Organization request parameters
+        plan: Previewed plan, or None to scan now
+        progress: Progress of this job
+    """
+    with Session(engine) as session:
+        history = session.get(OrganizationHistory, operation_id)
+        history.status = "running"
+        session.add(history)
+        session.commit()
+        
+        try:
+            progress.check_cancelled()
+            if plan is None:
+                plan = organizer.create_plan(
+                    request.source_directory,
+                    request.operation_type,
+                    create_others=request.create_others,
+                    date_format=request.date_format or "%Y/%m",
+                    progress=progress,
+                    recursive=request.recursive,
+                    max_depth=request.max_depth,
+                    exclude=request.exclude,
+                    dedup=request.dedup
+                )
+            progress.start_moving(len(plan.entries))
+            stats, _ = organizer.execute_plan(plan, organizer.journal_for(operation_id), progress)
+        except JobCancelled:
+            history.status = "cancelled"
+            history.completed_at = datetime.utcnow()
+            history.files_moved = progress.files_moved
+            if progress.files_moved:
+                history.error_message = "Cancelled; undo to move back the files already organized"
+            else:
+                history.error_message = "Cancelled before any files were moved"
+            _finish_job(session, history, progress, "cancelled")
+        except Exception as e:
+            logger.exception(f"Organization {operation_id} failed")
+            history.status = "failed"
+            history.completed_at = datetime.utcnow()
+            history.files_moved = progress.files_moved
+            history.error_message = str(e)
+            _finish_job(session, history, progress, "failed", str(e))
+        else:
+            history.status = "completed"
+            history.completed_at = datetime.utcnow()
+            history.files_moved = sum(stats.values())
+            history.categories_created = len(stats)
+            history.stats = stats
+            _finish_job(session, history, progress, "completed")
+
+
+def _undo_job(operation_id: int, progress: JobProgress):
+    """
+    Background job body: undo an operation and record the result.
+    
+    A cancelled or failed undo leaves the operation's status alone; undoing
+    it again picks up the files that are still organized.
+    
+    Args:
+        operation_id: OrganizationHistory ID of the operation
+        progress: Progress of this job
+    """
+    with Session(engine) as session:
+        history = session.get(OrganizationHistory, operation_id)
+        progress.start_moving(history.files_moved or None)
+        
+        try:
+            progress.check_cancelled()
+            if history.move_log:
+                organizer.undo_organization(history.move_log, progress)
+            else:
+                organizer.undo_journal(organizer.journal_for(operation_id), progress)
+        except JobCancelled:
+            progress.finish("cancelled")
+        except Exception as e:
+            logger.exception(f"Undo of operation {operation_id} failed")
+            progress.finish("failed", str(e))
+        else:
+            history.status = "undone"
+            _finish_job(session, history, progress, "completed")
+
+
+def _ensure_no_running_job(operation_id: int):
+    """
+    Reject a new job for an operation that already has one running.
+    
+    Raises:
+        HTTPException: If a job for the operation is queued or running
+    """
+    job = job_manager.get(operation_id)
+    if job is not None and not job.finished:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A {job.kind} job is already running for this operation"
+        )
+
+
 @router.post("/execute", response_model=OrganizeResponse)
 def execute_organization(
     request: OrganizeRequest,
+    response: Response,
     session: Session = Depends(get_session)
 ):
     """
     Execute file organization.
     
+    With a plan_id from /organize/preview the stored plan is applied,
+    revalidating only what changed since the preview.
+    
+    With background=true the operation is queued as a job and the response
+    (202) comes back at once; follow it with /organize/jobs/{operation_id}.
+    
     Args:
         request: Organization request parameters
+        response: Response (status code is 202 for background jobs)
         session: Database session
         
     Returns:
@@ -71,11 +333,13 @@ def execute_organization(
     Raises:
         HTTPException: If organization fails
     """
+    plan = _get_request_plan(request)
+    
     # Create history entry
     history = OrganizationHistory(
         operation_type=request.operation_type,
         source_directory=request.source_directory,
-        date_format=request.date_format if request.operation_type == "by_date" else None,
+        date_format=request.date_format if request.operation_type != "by_type" else None,
         dry_run=request.dry_run,
         status="pending"
     )
@@ -83,45 +347,90 @@ def execute_organization(
     session.commit()
     session.refresh(history)
     
+    if request.background and not request.dry_run:
+        if plan is not None:
+            plan_store.pop(plan.plan_id)
+        operation_id = history.id
+        progress = job_manager.submit(
+            JobProgress(operation_id, "organize"),
+            lambda p: _organize_job(operation_id, request, plan, p)
+        )
+        
+        response.status_code = 202
+        return OrganizeResponse(
+            operation_id=history.id,
+            success=True,
+            files_moved=0,
+            categories_created=0,
+            stats={},
+            job_status=progress.state
+        )
+    
     try:
         # Execute organization if not dry run
         if not request.dry_run:
-            if request.operation_type == "by_type":
-                stats, move_log = organizer.organize_by_type(
+            # Moves are journaled ahead instead of collected in memory
+            journal_path = organizer.journal_for(history.id)
+            if plan is None and request.dedup:
+                # Deduplication needs the whole plan before anything moves
+                plan = organizer.create_plan(
+                    request.source_directory,
+                    request.operation_type,
+                    create_others=request.create_others,
+                    date_format=request.date_format or "%Y/%m",
+                    recursive=request.recursive,
+                    max_depth=request.max_depth,
+                    exclude=request.exclude,
+                    dedup=request.dedup
+                )
+            if plan is not None:
+                plan_store.pop(plan.plan_id)
+                stats, _ = organizer.execute_plan(plan, journal_path)
+            elif request.operation_type == "by_type":
+                stats, _ = organizer.organize_by_type(
                     request.source_directory,
-                    request.create_others
+                    request.create_others,
+                    journal_path=journal_path,
+                    recursive=request.recursive,
+                    max_depth=request.max_depth,
+                    exclude=request.exclude
                 )
-            else:  # by_date
-                stats, move_log = organizer.organize_by_date(
+            else:  # by_date, by_capture_date
+                stats, _ = organizer.organize_by_date(
                     request.source_directory,
-                    request.date_format or "%Y/%m"
+                    request.date_format or "%Y/%m",
+                    journal_path=journal_path,
+                    recursive=request.recursive,
+                    max_depth=request.max_depth,
+                    exclude=request.exclude,
+                    capture_date=request.operation_type == "by_capture_date"
                 )
             
             # Update history
             history.status = "completed"
             history.completed_at = datetime.utcnow()
-            history.files_moved = len(move_log)
+            history.files_moved = sum(stats.values())
             history.categories_created = len(stats)
             history.stats = stats
-            history.move_log = move_log
         else:
-            # Get preview for dry run
-            if request.operation_type == "by_type":
-                preview = organizer.preview_organize_by_type(
+            # Dry run reports the plan; a stored one needs no rescan
+            if plan is None:
+                plan = organizer.create_plan(
                     request.source_directory,
-                    request.create_others
-                )
-            else:
-                preview = organizer.preview_organize_by_date(
-                    request.source_directory,
-                    request.date_format or "%Y/%m"
+                    request.operation_type,
+                    create_others=request.create_others,
+                    date_format=request.date_format or "%Y/%m",
+                    recursive=request.recursive,
+                    max_depth=request.max_depth,
+                    exclude=request.exclude,
+                    dedup=request.dedup
                 )
             
             history.status = "completed"
             history.completed_at = datetime.utcnow()
             history.files_moved = 0
-            history.categories_created = len(preview.categories_to_create)
-            history.stats = preview.stats
+            history.categories_created = len(plan.stats)
+            history.stats = dict(plan.stats)
         
         session.add(history)
         session.commit()
@@ -132,7 +441,8 @@ def execute_organization(
             success=True,
             files_moved=history.files_moved,
             categories_created=history.categories_created,
-            stats=history.stats
+            stats=history.stats,
+            duplicates=len(plan.duplicates) if plan is not None else 0
         )
         
     except Exception as e:
@@ -152,13 +462,18 @@ def execute_organization(
 @router.post("/undo", response_model=UndoResponse)
 def undo_organization(
     request: UndoRequest,
+    response: Response,
     session: Session = Depends(get_session)
 ):
     """
     Undo a previous organization operation.
     
+    With background=true the undo is queued as a job (202); follow it with
+    /organize/jobs/{operation_id}.
+    
     Args:
         request: Undo request with operation ID
+        response: Response (status code is 202 for background jobs)
         session: Database session
         
     Returns:
@@ -173,21 +488,36 @@ def undo_organization(
     if not history:
         raise HTTPException(status_code=404, detail="Operation not found")
     
-    if history.status != "completed":
+    journal_path = organizer.journal_for(history.id)
+    has_journal = os.path.exists(journal_path)
+    
+    # A journal also makes interrupted (or failed part-way) operations undoable
+    if history.status != "completed" and not (has_journal and history.status in ("interrupted", "failed", "cancelled")):
         raise HTTPException(
             status_code=400,
-            detail="Can only undo completed operations"
+            detail="Can only undo completed or interrupted operations"
         )
     
-    if not history.move_log:
+    if not history.move_log and not has_journal:
         raise HTTPException(
             status_code=400,
             detail="No move log available for this operation"
         )
     
+    _ensure_no_running_job(history.id)
+    
+    if request.background:
+        operation_id = history.id
+        progress = job_manager.submit(JobProgress(operation_id, "undo"), lambda p: _undo_job(operation_id, p))
+        response.status_code = 202
+        return UndoResponse(success=True, files_restored=0, job_status=progress.state)
+    
     try:
-        # Execute undo
-        restored = organizer.undo_organization(history.move_log)
+        # Execute undo (operations from before journaling keep their move log)
+        if history.move_log:
+            restored = organizer.undo_organization(history.move_log)
+        else:
+            restored = organizer.undo_journal(journal_path)
         
         # Update history status
         history.status = "undone"
@@ -204,3 +534,168 @@ def undo_organization(
             status_code=500,
             detail=f"Error undoing organization: {str(e)}"
         )
+
+
+@router.post("/resume", response_model=OrganizeResponse)
+def resume_organization(
+    request: ResumeRequest,
+    session: Session = Depends(get_session)
+):
+    """
+    Finish an organization operation that was interrupted.
+    
+    The moves recorded in the operation's journal that had not happened
+    yet are applied; moves that already happened are left alone.
+    
+    Args:
+        request: Resume request with operation ID
+        session: Database session
+        
+    Returns:
+        Organization result for the whole operation
+        
+    Raises:
+        HTTPException: If the operation cannot be resumed or resuming fails
+    """
+    history = session.get(OrganizationHistory, request.operation_id)
+    
+    if not history:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    
+    journal_path = organizer.journal_for(history.id)
+    if history.status not in ("interrupted", "failed", "cancelled") or not os.path.exists(journal_path):
+        raise HTTPException(
+            status_code=400,
+            detail="Only interrupted operations with a move journal can be resumed"
+        )
+    
+    try:
+        stats = organizer.resume_journal(journal_path, history.source_directory)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error resuming organization: {str(e)}"
+        )
+    
+    merged = dict(history.stats or {})
+    for folder, count in stats.items():
+        merged[folder] = merged.get(folder, 0) + count
+    
+    history.status = "completed"
+    history.completed_at = datetime.utcnow()
+    history.error_message = None
+    history.files_moved = organizer.count_applied(journal_path)
+    history.categories_created = len(merged)
+    history.stats = merged
+    session.add(history)
+    session.commit()
+    session.refresh(history)
+    
+    return OrganizeResponse(
+        operation_id=history.id,
+        success=True,
+        files_moved=history.files_moved,
+        categories_created=history.categories_created,
+        stats=history.stats
+    )
+
+
+def _get_job(operation_id: int) -> JobProgress:
+    """
+    Look up a background job.
+    
+    Raises:
+        HTTPException: If no job is known for the operation
+    """
+    job = job_manager.get(operation_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{operation_id}", response_model=JobStatus)
+def get_job_status(operation_id: int):
+    """
+    Get the progress of a background organize or undo job.
+    
+    Args:
+        operation_id: Operation ID returned when the job was started
+        
+    Returns:
+        Files scanned/moved, bytes, rate and ETA
+        
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    return _get_job(operation_id).snapshot()
+
+
+async def _job_events(job: JobProgress) -> AsyncIterator[str]:
+    """Server-sent events: a progress event whenever the job changes, then an end event."""
+    version = -1
+    idle = 0.0
+    
+    while True:
+        snapshot = job.snapshot()
+        if snapshot["version"] != version:
+            version = snapshot["version"]
+            idle = 0.0
+            event = "end" if job.finished else "progress"
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+            if job.finished:
+                return
+        elif idle >= 15:
+            # Keep proxies from closing a quiet connection
+            idle = 0.0
+            yield ": keep-alive\n\n"
+        
+        await asyncio.sleep(settings.JOB_EVENT_INTERVAL)
+        idle += settings.JOB_EVENT_INTERVAL
+
+
+@router.get("/jobs/{operation_id}/events")
+def stream_job_events(operation_id: int):
+    """
+    Stream the progress of a background job as server-sent events.
+    
+    Sends a "progress" event at most every JOB_EVENT_INTERVAL seconds while
+    the job changes and an "end" event with the final state.
+    
+    Args:
+        operation_id: Operation ID returned when the job was started
+        
+    Returns:
+        text/event-stream response
+        
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    job = _get_job(operation_id)
+    return StreamingResponse(
+        _job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{operation_id}/cancel", response_model=JobStatus)
+def cancel_job(operation_id: int):
+    """
+    Ask a background job to stop.
+    
+    Cancellation is cooperative: the job stops before its next file. Files
+    already moved stay moved; a cancelled organize can be undone.
+    
+    Args:
+        operation_id: Operation ID returned when the job was started
+        
+    Returns:
+        Job progress with cancel_requested set
+        
+    Raises:
+        HTTPException: If the job is unknown
+    """
+    _get_job(operation_id)
+    return job_manager.cancel(operation_id).snapshot()
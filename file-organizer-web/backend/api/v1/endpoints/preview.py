@@ -3,7 +3,9 @@ File preview endpoints.
 """
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from schemas.preview import ThumbnailBatchRequest
 from services.file_preview import FilePreviewService
 
 
@@ -40,6 +42,27 @@ def get_thumbnail(path: str = Query(..., description="Image file path")):
         )
 
 
+@router.post("/thumbnails:batch")
+def get_thumbnails(request: ThumbnailBatchRequest):
+    """
+    Generate thumbnails for many image files in one request.
+    
+    Streams newline-delimited JSON, one {"path", "thumbnail", "format"} line
+    per image (or {"path", "error"}) as soon as it is ready, so the order is
+    not the request order.
+    
+    Args:
+        request: Image file paths
+        
+    Returns:
+        NDJSON stream of base64-encoded thumbnails
+    """
+    return StreamingResponse(
+        (result.model_dump_json(exclude_unset=True) + "\n" for result in preview_service.generate_thumbnails(request.paths)),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get("/text")
 def get_text_preview(
     path: str = Query(..., description="Text file path"),
@@ -150,6 +150,10 @@ def update_scheduled_job(
         for key, value in update_data.items():
             setattr(job, key, value)
         
+        # A watermark only describes the directory and operation it was taken for
+        if update_data.keys() & {"source_directory", "operation_type", "date_format"}:
+            job.watermark = {}
+        
         job.updated_at = datetime.utcnow()
         
         # Remove from scheduler
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark - thumbnail generation for large images
+
+Makes a thumbnail of every image in a corpus (generated, or --corpus DIR)
+with each strategy, without the thumbnail cache, and compares:
+
+  legacy   - full-size decode, alpha flattened at full size, then LANCZOS
+  quality  - THUMBNAIL_PROFILE=quality (JPEG draft + reduce() to 3x, then LANCZOS)
+  speed    - THUMBNAIL_PROFILE=speed (JPEG draft + reduce() to 1x, then BILINEAR)
+  
+The generated corpus holds 24MP JPEGs, RGBA PNGs and WebPs. The diff
+column is the mean absolute pixel difference from the legacy thumbnail
+(0-255).
+
+Usage:
+  python benchmarks/bench_thumbnails.py                  # 4 images per format
+  python benchmarks/bench_thumbnails.py --count 10 --repeat 3
+  python benchmarks/bench_thumbnails.py --corpus ~/Pictures
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image, ImageChops, ImageStat  # noqa: E402
+
+from services.file_preview import FilePreviewService  # noqa: E402
+
+EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+SIZES = {".jpg": (6000, 4000), ".png": (4000, 3000), ".webp": (4000, 3000)}
+
+
+def legacy_thumbnail(path: Path, thumbnail_size: int) -> Optional[bytes]:
+    """The pre-fast-path strategy: everything at full resolution."""
+    with Image.open(path) as img:
+        if img.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+            img = background
+        img.thumbnail((thumbnail_size, thumbnail_size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=85)
+        return buffer.getvalue()
+
+
+def make_image(path: Path, size, seed: int):
+    """A photo-like image: gradients with noise, and a soft alpha edge for PNG."""
+    noise = Image.effect_noise(size, 40 + seed).convert("L")
+    gradient = Image.linear_gradient("L").resize(size)
+    radial = Image.radial_gradient("L").resize(size)
+    img = Image.merge("RGB", (gradient, radial, ImageChops.blend(noise, gradient, 0.5)))
+    if path.suffix == ".png":
+        img.putalpha(ImageChops.invert(radial))
+        img.save(path, compress_level=1)
+    else:
+        img.save(path, quality=90)
+
+
+def make_corpus(directory: Path, count: int) -> List[Path]:
+    paths = []
+    for ext, size in SIZES.items():
+        for i in range(count):
+            path = directory / f"image_{i:03}{ext}"
+            make_image(path, size, i)
+            paths.append(path)
+    return paths
+
+
+def image_format(path: Path) -> str:
+    return path.suffix.lower().replace(".jpeg", ".jpg")
+
+
+def run(
+    render: Callable[[Path], Optional[bytes]],
+    paths: List[Path],
+    repeat: int
+) -> Tuple[Dict[str, float], Dict[Path, Optional[bytes]]]:
+    """Seconds per format (best of repeat per image) and the thumbnails made."""
+    times: Dict[str, float] = {}
+    thumbnails: Dict[Path, Optional[bytes]] = {}
+    for path in paths:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            thumbnails[path] = render(path)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        times[image_format(path)] = times.get(image_format(path), 0.0) + best
+    return times, thumbnails
+
+
+def difference(a: Optional[bytes], b: Optional[bytes]) -> Optional[float]:
+    if a is None or b is None:
+        return None
+    with Image.open(io.BytesIO(a)) as first, Image.open(io.BytesIO(b)) as second:
+        if first.size != second.size:
+            second = second.resize(first.size)
+        return sum(ImageStat.Stat(ImageChops.difference(first.convert("RGB"), second.convert("RGB"))).mean) / 3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thumbnail generation for large images")
+    parser.add_argument("--corpus", help="Directory of JPEG/PNG/WebP images (default: generate them)")
+    parser.add_argument("--count", type=int, default=4, help="Images generated per format (default: 4)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per image, best one counted (default: 1)")
+    parser.add_argument("--size", type=int, default=200, help="Thumbnail size (default: 200)")
+    args = parser.parse_args()
+    
+    workdir = Path(tempfile.mkdtemp(prefix="bench_thumbnails_"))
+    try:
+        if args.corpus:
+            paths = sorted(p for p in Path(args.corpus).expanduser().iterdir() if p.suffix.lower() in EXTENSIONS)
+        else:
+            print(f"Generating {args.count * len(SIZES)} images...")
+            paths = make_corpus(workdir, args.count)
+        if not paths:
+            sys.exit("No JPEG, PNG or WebP images in the corpus")
+        
+        service = FilePreviewService()
+        service.thumbnail_size = args.size
+        
+        def profile(name: str) -> Callable[[Path], Optional[bytes]]:
+            def render(path: Path) -> Optional[bytes]:
+                service.thumbnail_profile = name
+                return service._render_thumbnail(path)
+            return render
+        
+        strategies = {
+            "legacy": lambda path: legacy_thumbnail(path, args.size),
+            "quality": profile("quality"),
+            "speed": profile("speed"),
+        }
+        results = {name: run(render, paths, args.repeat) for name, render in strategies.items()}
+        
+        counts: Dict[str, int] = {}
+        for path in paths:
+            counts[image_format(path)] = counts.get(image_format(path), 0) + 1
+        
+        print(f"\n{'strategy':10} {'format':7} {'images':>7} {'ms/image':>10} {'speedup':>8} {'diff':>6}")
+        print("-" * 53)
+        legacy_times, legacy_thumbnails = results["legacy"]
+        for name, (times, thumbnails) in results.items():
+            for ext, count in sorted(counts.items()):
+                ms = times[ext] / count * 1000
+                speedup = legacy_times[ext] / times[ext]
+                diffs = [
+                    difference(legacy_thumbnails[path], thumbnails[path])
+                    for path in paths if image_format(path) == ext
+                ]
+                diffs = [d for d in diffs if d is not None]
+                diff = f"{sum(diffs) / len(diffs):6.2f}" if diffs else "     -"
+                print(f"{name:10} {ext[1:]:7} {count:7} {ms:10.1f} {speedup:7.1f}x {diff}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
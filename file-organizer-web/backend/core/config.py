@@ -2,7 +2,8 @@
 Configuration management using pydantic-settings.
 """
 
-from typing import List, Optional
+from pathlib import Path
+from typing import List, Literal, Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -30,10 +31,68 @@ class Settings(BaseSettings):
     ALLOWED_BASE_PATHS: str = ""
     MAX_PREVIEW_SIZE: int = 10485760  # 10MB
     THUMBNAIL_SIZE: int = 200
+    # quality: JPEG draft decoding and reduce() down to 3x the size, then LANCZOS;
+    # speed: down to the size itself, then BILINEAR
+    THUMBNAIL_PROFILE: Literal["quality", "speed"] = "quality"
+    # Generated thumbnails kept on disk (least recently used deleted beyond the byte budget;
+    # empty directory or 0 bytes keeps them in memory only) and in memory
+    THUMBNAIL_CACHE_DIR: str = "thumbnail_cache"
+    THUMBNAIL_CACHE_MAX_BYTES: int = 268435456  # 256MB
+    THUMBNAIL_MEMORY_CACHE_SIZE: int = 512  # Thumbnails
+    
+    # Organizer
+    # Shared organizer library (file-organizer/src in the projects repo)
+    ORGANIZER_LIB_PATH: str = str(Path(__file__).resolve().parents[3] / "file-organizer" / "src")
+    # Category rules JSON; empty uses the built-in categories
+    CATEGORY_RULES_FILE: str = ""
+    # Previewed plans kept for execute
+    PLAN_CACHE_SIZE: int = 32
+    PLAN_TTL_SECONDS: int = 900
+    PREVIEW_PAGE_SIZE: int = 500  # Moves returned with a preview (the rest are paged or streamed)
+    # Plan previews from columnar (NumPy) scans: one classification per
+    # distinct extension or date bucket instead of one per file
+    COLUMNAR_SCAN: bool = True
+    # Threads for copying files when a move crosses devices
+    MOVE_WORKERS: int = 4
+    # Write-ahead move journals, one per operation (used for undo and resume)
+    JOURNAL_DIR: str = "journals"
+    # Content hashes for duplicate detection, reused across runs
+    HASH_CACHE_PATH: str = "hash_cache.db"
+    HASH_WORKERS: int = 8
+    # Capture dates read from photo metadata (by_capture_date), reused across runs
+    METADATA_CACHE_PATH: str = "metadata_cache.db"
+    METADATA_WORKERS: int = 8
+    # Detect file types from their first bytes when the extension is missing or wrong
+    CONTENT_SNIFFING: bool = False
+    # Browsed directory listings kept in memory, validated by the directory's mtime and inode
+    BROWSE_CACHE_SIZE: int = 16
+    BROWSE_CACHE_TTL: float = 300.0  # Seconds, for changes that leave the directory's mtime alone
+    # Paginated browsing: entries per page, and directory scans kept with their sort orders
+    BROWSE_PAGE_SIZE: int = 500
+    BROWSE_SCAN_CACHE_SIZE: int = 4
+    # Recursive directory sizes, measured in the background and cached per directory
+    DIR_SIZE_WORKERS: int = 4
+    DIR_SIZE_CACHE_SIZE: int = 100000  # Directories kept
+    DIR_SIZE_TTL: float = 60.0  # Seconds a size counts as ready (changes deeper down leave the directory's mtime alone)
+    # Persistent catalog of the files under ALLOWED_BASE_PATHS, refreshed incrementally
+    # (also the index behind /files/search)
+    CATALOG_ENABLED: bool = True
+    CATALOG_PATH: str = "catalog.db"
+    CATALOG_REFRESH_INTERVAL: float = 60.0  # Seconds between background refreshes
+    CATALOG_WORKERS: int = 8
+    # Threads for /files/info:batch and /preview/thumbnails:batch, shared by all batch requests
+    BATCH_WORKERS: int = 8
+    # Background organize/undo jobs
+    JOB_WORKERS: int = 2
+    JOB_HISTORY_SIZE: int = 100  # Finished jobs kept for progress queries
+    JOB_EVENT_INTERVAL: float = 0.5  # Seconds between progress events
     
     # Scheduler
     SCHEDULER_ENABLED: bool = True
     SCHEDULER_TIMEZONE: str = "UTC"
+    # Watch jobs: seconds a new file must stay untouched, and the fallback poll interval without inotify
+    WATCH_DEBOUNCE: float = 0.25
+    WATCH_POLL_INTERVAL: float = 2.0
     
     # Logging
     LOG_LEVEL: str = "INFO"
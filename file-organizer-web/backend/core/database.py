@@ -3,6 +3,7 @@ Database configuration and session management using SQLModel.
 """
 
 from typing import Generator
+from sqlalchemy import inspect, text
 from sqlmodel import SQLModel, Session, create_engine
 from core.config import settings
 
@@ -15,9 +16,25 @@ engine = create_engine(
 )
 
 
+def _add_missing_columns():
+    """Add columns introduced after a table was created (nullable columns only)."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+
+
 def create_db_and_tables():
     """Create all database tables."""
     SQLModel.metadata.create_all(engine)
+    _add_missing_columns()
 
 
 def get_session() -> Generator[Session, None, None]:
@@ -0,0 +1,14 @@
+"""
+Bridge to the shared organizer library that ships with the CLI.
+"""
+
+import sys
+
+from core.config import settings
+
+if settings.ORGANIZER_LIB_PATH not in sys.path:
+    sys.path.insert(0, settings.ORGANIZER_LIB_PATH)
+
+from fileorg import dedup, journal, metadata, mover, planner, rules, scanner, sniff, walker, watcher  # noqa: E402
+
+__all__ = ["dedup", "journal", "metadata", "mover", "planner", "rules", "scanner", "sniff", "walker", "watcher"]
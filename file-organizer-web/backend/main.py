@@ -8,10 +8,16 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
+from sqlmodel import Session
 
 from core.config import settings
-from core.database import create_db_and_tables
+from core.database import create_db_and_tables, engine
 from api.v1.router import api_router
+from services.batch import batch_pool
+from services.catalog import file_catalog
+from services.dir_sizes import directory_sizer
+from services.file_organizer import FileOrganizerService
+from services.jobs import job_manager
 from services.scheduler import scheduler_service
 
 
@@ -39,6 +45,15 @@ async def lifespan(app: FastAPI):
     logger.info("Creating database tables...")
     create_db_and_tables()
     
+    # Settle operations cut short by the last shutdown or crash
+    with Session(engine) as session:
+        FileOrganizerService().recover_interrupted(session)
+    
+    # Catalog the allowed paths; the first refresh lists everything, later ones only changed directories
+    if file_catalog is not None:
+        logger.info("Starting file catalog...")
+        file_catalog.start(settings.get_allowed_paths(), settings.CATALOG_REFRESH_INTERVAL)
+    
     # Start scheduler
     if settings.SCHEDULER_ENABLED:
         logger.info("Starting scheduler...")
@@ -56,6 +71,16 @@ async def lifespan(app: FastAPI):
         logger.info("Stopping scheduler...")
         scheduler_service.shutdown()
     
+    # Stop background jobs at their next file; journals cover the rest
+    logger.info("Stopping background jobs...")
+    job_manager.shutdown()
+    directory_sizer.shutdown()
+    batch_pool.shutdown()
+    
+    if file_catalog is not None:
+        logger.info("Closing file catalog...")
+        file_catalog.close()
+    
     logger.info("Application shutdown complete")
 
 
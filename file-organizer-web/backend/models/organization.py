@@ -13,7 +13,7 @@ class OrganizationHistory(SQLModel, table=True):
     __tablename__ = "organization_history"
     
     id: Optional[int] = Field(default=None, primary_key=True)
-    operation_type: str = Field(index=True)  # "by_type", "by_date", "custom"
+    operation_type: str = Field(index=True)  # "by_type", "by_date", "by_capture_date", "custom"
     source_directory: str
     date_format: Optional[str] = None
     files_moved: int = 0
@@ -21,7 +21,7 @@ class OrganizationHistory(SQLModel, table=True):
     dry_run: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     completed_at: Optional[datetime] = None
-    status: str = Field(default="pending", index=True)  # pending, completed, failed, undone
+    status: str = Field(default="pending", index=True)  # pending, running, completed, no_op, failed, cancelled, interrupted, undone
     error_message: Optional[str] = None
     move_log: list = Field(default_factory=list, sa_column=Column(JSON))  # List of [source, dest] pairs
     stats: dict = Field(default_factory=dict, sa_column=Column(JSON))  # Category/date -> count mapping
@@ -15,15 +15,17 @@ class ScheduledJob(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     description: Optional[str] = None
-    operation_type: str  # "by_type", "by_date"
+    operation_type: str  # "by_type", "by_date", "by_capture_date"
     source_directory: str
     date_format: Optional[str] = None
-    schedule_type: str  # "cron", "interval"
-    schedule_config: dict = Field(sa_column=Column(JSON))  # Cron expression or interval config
+    schedule_type: str  # "cron", "interval", "watch"
+    schedule_config: dict = Field(sa_column=Column(JSON))  # Cron expression, interval or watch config
     enabled: bool = Field(default=True, index=True)
     last_run: Optional[datetime] = None
     next_run: Optional[datetime] = None
     run_count: int = Field(default=0)
+    # Directory fingerprint and files left in place by the last run (see services/watermark.py)
+    watermark: dict = Field(default_factory=dict, sa_column=Column(JSON))
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
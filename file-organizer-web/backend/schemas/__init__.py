@@ -7,6 +7,8 @@ from schemas.organize import (
     OrganizeResponse,
     UndoRequest,
     UndoResponse,
+    ResumeRequest,
+    JobStatus,
 )
 from schemas.schedule import (
     ScheduledJobCreate,
@@ -30,6 +32,8 @@ __all__ = [
     "OrganizeResponse",
     "UndoRequest",
     "UndoResponse",
+    "ResumeRequest",
+    "JobStatus",
     "ScheduledJobCreate",
     "ScheduledJobUpdate",
     "ScheduledJobResponse",
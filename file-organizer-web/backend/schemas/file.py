@@ -8,28 +8,31 @@ from pydantic import BaseModel, Field
 
 
 class FileInfo(BaseModel):
-    """Information about a file."""
+    """Information about a file (only the requested fields are sent when a request names fields)."""
     
     name: str
     path: str
-    size: int
-    extension: str
+    size: Optional[int] = None
+    extension: Optional[str] = None
     mime_type: Optional[str] = None
-    created_at: datetime
-    modified_at: datetime
+    created_at: Optional[datetime] = None
+    modified_at: Optional[datetime] = None
     is_hidden: bool = False
     category: Optional[str] = None
 
 
 class DirectoryInfo(BaseModel):
-    """Information about a directory."""
+    """Information about a directory (only the requested fields are sent when a request names fields)."""
     
     name: str
     path: str
-    file_count: int
-    total_size: int
-    created_at: datetime
-    modified_at: datetime
+    # Recursive totals; None until the directory has been measured
+    file_count: Optional[int] = None
+    total_size: Optional[int] = None
+    # ready, stale (last known totals, being measured again) or pending (being measured)
+    size_status: str = "ready"
+    created_at: Optional[datetime] = None
+    modified_at: Optional[datetime] = None
     is_hidden: bool = False
 
 
@@ -41,7 +44,64 @@ class DirectoryContents(BaseModel):
     directories: List[DirectoryInfo]
     total_files: int
     total_directories: int
-    total_size: int
+    # Left out when the requested fields do not include both size and total_size
+    total_size: Optional[int] = None
+    # Directories whose totals are not ready yet (poll /files/sizes for them)
+    sizes_pending: int = 0
+    # Set on a paginated browse when there are more entries
+    next_cursor: Optional[str] = None
+
+
+class DirectorySizesRequest(BaseModel):
+    """Directories to get recursive sizes for."""
+    
+    paths: List[str] = Field(..., max_length=1000)
+    wait: float = Field(0, ge=0, le=30, description="Seconds to wait for measurements under way to finish")
+
+
+class DirectorySizeInfo(BaseModel):
+    """Recursive size of one directory."""
+    
+    path: str
+    size_status: str  # ready, stale, pending or error
+    file_count: Optional[int] = None
+    total_size: Optional[int] = None
+    error: Optional[str] = None
+
+
+class FileInfoBatchRequest(BaseModel):
+    """Files to get information about."""
+    
+    paths: List[str] = Field(..., max_length=1000)
+    fields: Optional[List[str]] = Field(None, description="FileInfo fields to return (all if omitted)")
+
+
+class FileInfoResult(BaseModel):
+    """One NDJSON line of /files/info:batch."""
+    
+    path: str  # As requested
+    info: Optional[FileInfo] = None
+    error: Optional[str] = None
+
+
+class DuplicateGroup(BaseModel):
+    """Files with identical content (one NDJSON line of /files/duplicates)."""
+    
+    type: str = "group"
+    size: int  # Size of each copy
+    digest: str  # Content hash (hex)
+    paths: List[str]
+    wasted_bytes: int  # Space taken by all copies but one
+
+
+class DuplicateSummary(BaseModel):
+    """Last NDJSON line of /files/duplicates."""
+    
+    type: str = "summary"
+    files_scanned: int
+    groups: int
+    duplicate_files: int  # Copies beyond the first of each group
+    wasted_bytes: int
 
 
 class FileSearchResult(BaseModel):
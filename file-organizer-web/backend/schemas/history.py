@@ -60,3 +60,21 @@ class HistoryAnalytics(BaseModel):
     operations_over_time: List[TimeSeriesPoint]
     category_distribution: Dict[str, int]
     busiest_directories: List[Dict[str, Any]]
+
+
+class StorageTotals(BaseModel):
+    """Files and bytes of one category or extension."""
+    
+    name: str
+    count: int
+    size: int
+
+
+class StorageStats(BaseModel):
+    """What is stored under the catalogued paths, from the file catalog."""
+    
+    path: Optional[str] = None
+    total_files: int
+    total_size: int
+    categories: List[StorageTotals]
+    extensions: List[StorageTotals]
@@ -10,10 +10,18 @@ class OrganizeRequest(BaseModel):
     """Request to organize files."""
     
     source_directory: str
-    operation_type: str = Field(..., pattern="^(by_type|by_date)$")
+    operation_type: str = Field(..., pattern="^(by_type|by_date|by_capture_date)$")
     date_format: Optional[str] = "%Y/%m"
     create_others: bool = True
     dry_run: bool = False
+    plan_id: Optional[str] = None  # Plan returned by /organize/preview
+    background: bool = False  # Return at once and run as a job (ignored for dry runs)
+    recursive: bool = False  # Include subdirectories (skips the folders organizing creates)
+    max_depth: Optional[int] = Field(None, ge=0)  # Directory levels to enter when recursive
+    exclude: List[str] = []  # Globs of names or relative paths to skip
+    # Files identical to one already organized (or to another new file): leave them
+    # in place (skip), hard-link them to the original (link) or only report them
+    dedup: Optional[str] = Field(None, pattern="^(skip|link|report)$")
 
 
 class FileMove(BaseModel):
@@ -23,6 +31,7 @@ class FileMove(BaseModel):
     destination: str
     category: str
     file_name: str
+    duplicate_of: Optional[str] = None  # Identical file found by dedup
 
 
 class OrganizePreview(BaseModel):
@@ -32,6 +41,19 @@ class OrganizePreview(BaseModel):
     moves: List[FileMove]
     stats: Dict[str, int]  # category/date -> count
     categories_to_create: List[str]
+    plan_id: Optional[str] = None  # Pass to /organize/execute to apply this plan
+    fingerprint: Optional[str] = None  # Source directory state the plan was made from
+    duplicates: int = 0  # Files found identical to another one (skipped ones are not in moves)
+    next_cursor: Optional[str] = None  # Fetch the remaining moves from /organize/plans/{plan_id}/moves
+
+
+class PlanMovesPage(BaseModel):
+    """A page of the moves of a previewed plan."""
+    
+    plan_id: str
+    total_files: int
+    moves: List[FileMove]
+    next_cursor: Optional[str] = None  # None on the last page
 
 
 class OrganizeResponse(BaseModel):
@@ -42,13 +64,22 @@ class OrganizeResponse(BaseModel):
     files_moved: int
     categories_created: int
     stats: Dict[str, int]
+    duplicates: int = 0  # Duplicates skipped, linked or reported
     error: Optional[str] = None
+    job_status: Optional[str] = None  # Set when running in the background
 
 
 class UndoRequest(BaseModel):
     """Request to undo an organization operation."""
     
     operation_id: int
+    background: bool = False  # Return at once and run as a job
+
+
+class ResumeRequest(BaseModel):
+    """Request to finish an interrupted organization operation."""
+    
+    operation_id: int
 
 
 class UndoResponse(BaseModel):
@@ -57,3 +88,24 @@ class UndoResponse(BaseModel):
     success: bool
     files_restored: int
     error: Optional[str] = None
+    job_status: Optional[str] = None  # Set when running in the background
+
+
+class JobStatus(BaseModel):
+    """Progress of a background organize or undo job."""
+    
+    operation_id: int
+    kind: str  # "organize" or "undo"
+    state: str  # queued, running, completed, failed, cancelled
+    phase: str  # queued, scanning, moving, done
+    files_scanned: int
+    files_total: Optional[int] = None
+    files_moved: int
+    bytes_moved: int
+    files_per_second: float
+    bytes_per_second: float
+    elapsed_seconds: float
+    eta_seconds: Optional[float] = None
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    version: int
@@ -0,0 +1,21 @@
+"""
+Schemas for file previews.
+"""
+
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class ThumbnailBatchRequest(BaseModel):
+    """Image files to make thumbnails of."""
+    
+    paths: List[str] = Field(..., max_length=500)
+
+
+class ThumbnailResult(BaseModel):
+    """One NDJSON line of /preview/thumbnails:batch."""
+    
+    path: str  # As requested
+    thumbnail: Optional[str] = None  # Base64-encoded
+    format: Optional[str] = None
+    error: Optional[str] = None
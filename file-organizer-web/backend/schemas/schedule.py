@@ -18,6 +18,9 @@ class ScheduleConfig(BaseModel):
     interval_minutes: Optional[int] = None
     interval_hours: Optional[int] = None
     interval_days: Optional[int] = None
+    
+    # For watch jobs (defaults to the WATCH_DEBOUNCE setting)
+    debounce_seconds: Optional[float] = Field(None, ge=0)
 
 
 class ScheduledJobCreate(BaseModel):
@@ -25,10 +28,10 @@ class ScheduledJobCreate(BaseModel):
     
     name: str
     description: Optional[str] = None
-    operation_type: str = Field(..., pattern="^(by_type|by_date)$")
+    operation_type: str = Field(..., pattern="^(by_type|by_date|by_capture_date)$")
     source_directory: str
     date_format: Optional[str] = "%Y/%m"
-    schedule_type: str = Field(..., pattern="^(cron|interval)$")
+    schedule_type: str = Field(..., pattern="^(cron|interval|watch)$")
     schedule_config: ScheduleConfig
     enabled: bool = True
 
@@ -38,10 +41,10 @@ class ScheduledJobUpdate(BaseModel):
     
     name: Optional[str] = None
     description: Optional[str] = None
-    operation_type: Optional[str] = Field(None, pattern="^(by_type|by_date)$")
+    operation_type: Optional[str] = Field(None, pattern="^(by_type|by_date|by_capture_date)$")
     source_directory: Optional[str] = None
     date_format: Optional[str] = None
-    schedule_type: Optional[str] = Field(None, pattern="^(cron|interval)$")
+    schedule_type: Optional[str] = Field(None, pattern="^(cron|interval|watch)$")
     schedule_config: Optional[ScheduleConfig] = None
     enabled: Optional[bool] = None
 
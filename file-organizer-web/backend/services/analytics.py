@@ -2,13 +2,15 @@
 Analytics service for calculating statistics.
 """
 
-from typing import List, Dict
+import os
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict
 from sqlmodel import Session, select
 
 from models.organization import OrganizationHistory
-from schemas.history import HistoryStats, CategoryStats, TimeSeriesPoint, HistoryAnalytics
+from schemas.history import HistoryStats, CategoryStats, TimeSeriesPoint, HistoryAnalytics, StorageStats, StorageTotals
+from services.catalog import file_catalog
 
 
 class AnalyticsService:
@@ -147,3 +149,46 @@ class AnalyticsService:
             category_distribution=dict(category_totals),
             busiest_directories=busiest_dirs
         )
+    
+    def get_storage_stats(self, path: Optional[str] = None, top_extensions: int = 20) -> StorageStats:
+        """
+        Get file counts and sizes by category and extension from the file catalog.
+        
+        Answered with aggregate queries over the catalog, without walking the
+        disk; figures are as of the catalog's last refresh.
+        
+        Args:
+            path: Directory to limit the totals to (defaults to every catalogued path)
+            top_extensions: Number of extensions to return, largest first
+            
+        Returns:
+            StorageStats object
+            
+        Raises:
+            ValueError: If the catalog is disabled or the path is not catalogued
+        """
+        if file_catalog is None:
+            raise ValueError("The file catalog is disabled (set CATALOG_ENABLED)")
+        
+        base = None
+        if path is not None:
+            base = os.path.realpath(path)
+            if not file_catalog.covers(base):
+                raise ValueError(f"Path '{path}' is not in the file catalog")
+        
+        categories = [
+            StorageTotals(name=category, count=count, size=size)
+            for category, count, size in file_catalog.category_totals(base)
+        ]
+        extensions = [
+            StorageTotals(name=ext or "(none)", count=count, size=size)
+            for ext, count, size in file_catalog.extension_totals(base, top_extensions)
+        ]
+        
+        return StorageStats(
+            path=base,
+            total_files=sum(totals.count for totals in categories),
+            total_size=sum(totals.size for totals in categories),
+            categories=categories,
+            extensions=extensions
+        )
@@ -0,0 +1,106 @@
+"""
+Bounded worker pools for the batch endpoints, yielding results as they finish.
+"""
+
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from core.config import settings
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+def resolve_allowed(paths: Iterable[str], allowed_paths: Iterable[str]) -> List[Tuple[str, Optional[Path]]]:
+    """
+    Resolve paths and check that each is under an allowed base path.
+    
+    The base paths are resolved once for the whole batch, not once per path.
+    
+    Args:
+        paths: Paths as requested
+        allowed_paths: Allowed base paths (none allows nothing)
+        
+    Returns:
+        List of (requested path, resolved path or None if not allowed), in order
+    """
+    bases: List[Path] = []
+    for allowed in allowed_paths:
+        try:
+            bases.append(Path(allowed).resolve())
+        except (OSError, RuntimeError, ValueError):
+            continue
+    
+    resolved: List[Tuple[str, Optional[Path]]] = []
+    for path in paths:
+        try:
+            candidate: Optional[Path] = Path(path).resolve()
+        except (OSError, RuntimeError, ValueError):
+            candidate = None
+        if candidate is not None and not any(candidate.is_relative_to(base) for base in bases):
+            candidate = None
+        resolved.append((path, candidate))
+    return resolved
+
+
+class BatchPool:
+    """
+    A thread pool shared by all batch requests.
+    
+    The pool bounds how much work runs at once however many batches come
+    in; each batch gets its results back in completion order. Work left
+    when a batch is abandoned (the client went away) is cancelled.
+    """
+    
+    def __init__(self, workers: int = 8, name: str = "batch"):
+        """
+        Initialize the pool (threads are started on first use).
+        
+        Args:
+            workers: Items worked on at once, across all batches
+            name: Thread name prefix
+        """
+        self.workers = workers
+        self.name = name
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _executor(self) -> ThreadPoolExecutor:
+        """The pool, started on first use."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix=self.name)
+            return self._pool
+    
+    def run(self, work: Callable[[Item], Result], items: Iterable[Item]) -> Iterator[Result]:
+        """
+        Run work on every item, yielding results as they finish.
+        
+        Args:
+            work: Function of one item; it should report failures in its result rather than raise
+            items: Items to work on
+            
+        Returns:
+            Iterator of results, in completion order
+        """
+        pool = self._executor()
+        futures = [pool.submit(work, item) for item in items]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    
+    def shutdown(self):
+        """Stop the threads; work not started yet is dropped."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global pool instance
+batch_pool = BatchPool(settings.BATCH_WORKERS)
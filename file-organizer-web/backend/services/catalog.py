@@ -0,0 +1,657 @@
+"""
+Persistent catalog of the files under the allowed base paths.
+"""
+
+import os
+import time
+import fnmatch
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.config import settings
+from core.shared import rules as category_rules
+
+logger = logging.getLogger(__name__)
+
+# A directory modified this recently may change again within the same
+# timestamp tick, so its fingerprint is not trusted by the next refresh
+RACY_FINGERPRINT_NS = 2_000_000_000
+_COMMIT_EVERY = 1000
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS files ("
+    " path TEXT PRIMARY KEY, parent TEXT NOT NULL, name TEXT NOT NULL, ext TEXT NOT NULL,"
+    " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, ctime_ns INTEGER NOT NULL, inode INTEGER NOT NULL,"
+    " category TEXT NOT NULL, hash BLOB"
+    ")",
+    "CREATE INDEX IF NOT EXISTS files_parent ON files (parent, name)",
+    "CREATE INDEX IF NOT EXISTS files_category ON files (category)",
+    "CREATE INDEX IF NOT EXISTS files_ext ON files (ext)",
+    # Fingerprint (mtime_ns, inode) of every directory as of its last listing
+    "CREATE TABLE IF NOT EXISTS directories ("
+    " path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER NOT NULL, inode INTEGER NOT NULL"
+    ")",
+    "CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent)",
+    # Trigram index of file names, kept in step with files by triggers
+    "CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, content='files', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS files_insert AFTER INSERT ON files BEGIN"
+    " INSERT INTO names (rowid, name) VALUES (new.rowid, new.name);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS files_delete AFTER DELETE ON files BEGIN"
+    " INSERT INTO names (names, rowid, name) VALUES ('delete', old.rowid, old.name);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS files_rename AFTER UPDATE OF name ON files BEGIN"
+    " INSERT INTO names (names, rowid, name) VALUES ('delete', old.rowid, old.name);"
+    " INSERT INTO names (rowid, name) VALUES (new.rowid, new.name);"
+    " END",
+)
+
+SEARCH_MODES = ("contains", "prefix", "glob")
+# Trigrams need three literal characters in a row to narrow a search
+_MIN_INDEXED_RUN = 3
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+class CatalogFile(NamedTuple):
+    """A catalogued file."""
+    
+    path: str
+    parent: str
+    name: str
+    ext: str
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    inode: int
+    category: str
+    hash: Optional[bytes]
+
+
+class SearchQuery(NamedTuple):
+    """
+    A file name search with optional filters.
+    
+    Names are compared case-insensitively (ASCII letters). contains and
+    prefix match the pattern literally; glob matches the whole name with
+    *, ? and [...] wildcards.
+    """
+    
+    pattern: str
+    mode: str = "contains"
+    extensions: Tuple[str, ...] = ()  # Lowercase, with the dot
+    min_size: Optional[int] = None
+    max_size: Optional[int] = None
+    modified_after_ns: Optional[int] = None
+    modified_before_ns: Optional[int] = None
+    
+    @property
+    def needle(self) -> str:
+        return self.pattern.translate(_ASCII_LOWER)
+    
+    def matches(self, name: str, size: int, mtime_ns: int) -> bool:
+        """Whether a file passes the pattern and every filter (for searches without the catalog)."""
+        folded = name.translate(_ASCII_LOWER)
+        if self.mode == "glob":
+            if not fnmatch.fnmatchcase(folded, self.needle):
+                return False
+        elif self.mode == "prefix":
+            if not folded.startswith(self.needle):
+                return False
+        elif self.needle not in folded:
+            return False
+        if self.extensions and os.path.splitext(folded)[1] not in self.extensions:
+            return False
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.modified_after_ns is not None and mtime_ns < self.modified_after_ns:
+            return False
+        if self.modified_before_ns is not None and mtime_ns >= self.modified_before_ns:
+            return False
+        return True
+    
+    def rank(self, name: str, mtime_ns: int) -> Tuple[int, int, int]:
+        """Sort key: exact names, then prefix matches, then shorter names, then newer files."""
+        folded = name.translate(_ASCII_LOWER)
+        tier = 0 if folded == self.needle else 1 if folded.startswith(self.needle) else 2
+        return tier, len(name), -mtime_ns
+    
+    def like_pattern(self) -> str:
+        """
+        A LIKE pattern matching at least every name the search matches.
+        
+        Literal % and _ in the pattern stay wildcards, which only widens the
+        candidates; the exact test runs on each candidate afterwards.
+        """
+        if self.mode == "contains":
+            return f"%{self.pattern}%"
+        if self.mode == "prefix":
+            return f"{self.pattern}%"
+        
+        translated = []
+        index = 0
+        while index < len(self.pattern):
+            char = self.pattern[index]
+            if char == "*":
+                translated.append("%")
+            elif char == "?":
+                translated.append("_")
+            elif char == "[" and "]" in self.pattern[index + 2:]:
+                # One character from a set
+                translated.append("_")
+                index = self.pattern.index("]", index + 2)
+            else:
+                translated.append(char)
+            index += 1
+        return "".join(translated)
+
+
+def _longest_literal(like: str) -> int:
+    """Longest run of characters in a LIKE pattern without a wildcard."""
+    return max(len(run) for run in like.replace("_", "%").split("%"))
+
+
+class _Listing(NamedTuple):
+    """One directory as read from disk: fingerprint, files and subdirectory names."""
+    
+    fingerprint: Tuple[int, int]
+    files: List[Tuple[str, int, int, int, int]]  # name, size, mtime_ns, ctime_ns, inode
+    subdirs: List[str]
+
+
+def _signed(value: int) -> int:
+    """Map an unsigned 64-bit number (inode) into SQLite's signed integer range."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _under(directory: str) -> Tuple[str, str]:
+    """Bounds of the paths below a directory, for an indexed range scan."""
+    prefix = os.path.join(directory, "")
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class FileCatalog:
+    """
+    SQLite table of every regular file below a set of roots.
+    
+    refresh() walks the roots in parallel, level by level. A directory is
+    only listed again when its fingerprint (mtime_ns, inode) changed since
+    it was last listed; unchanged directories are recursed into from the
+    catalog. Adding, removing or renaming an entry changes its directory's
+    mtime, so a refresh of an unchanged tree costs one stat per directory.
+    Writes to a file that do not touch its directory (appends, rewrites in
+    place) are only seen after the directory itself changes.
+    
+    Moves done by the organizer are recorded as they happen. One connection
+    is shared by all threads, behind a lock.
+    """
+    
+    def __init__(self, path: str, workers: int = 8):
+        """
+        Initialize the catalog (the database is opened on first use).
+        
+        Args:
+            path: SQLite database file
+            workers: Threads listing directories during a refresh
+        """
+        self.path = path
+        self.workers = workers
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._dirty = 0
+        self._rules: Optional[category_rules.CategoryRules] = None
+        self._roots: List[str] = []
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _db(self) -> sqlite3.Connection:
+        """The shared connection (caller holds the lock)."""
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # Rows replaced by INSERT OR REPLACE must fire the delete trigger too
+            self._conn.execute("PRAGMA recursive_triggers=ON")
+            indexed = self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'names'").fetchone()
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            if indexed is None:
+                # Catalog written before the name index existed
+                self._conn.execute("INSERT INTO names (names) VALUES ('rebuild')")
+            self._conn.commit()
+        return self._conn
+    
+    def _wrote(self, count: int = 1):
+        """Count writes and commit in groups (caller holds the lock)."""
+        self._dirty += count
+        if self._dirty >= _COMMIT_EVERY:
+            self._conn.commit()
+            self._dirty = 0
+    
+    def flush(self):
+        """Commit pending writes."""
+        with self._lock:
+            if self._conn is not None and self._dirty:
+                self._conn.commit()
+                self._dirty = 0
+    
+    def close(self):
+        """Stop background refreshes, commit and close the database."""
+        self.stop()
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+    
+    @property
+    def roots(self) -> List[str]:
+        """Resolved directories the catalog covers."""
+        return list(self._roots)
+    
+    def covers(self, path: str) -> bool:
+        """Whether a resolved path lies in one of the catalogued roots."""
+        return any(path == root or path.startswith(os.path.join(root, "")) for root in self._roots)
+    
+    def _current_rules(self) -> category_rules.CategoryRules:
+        """Category rules, recategorizing the catalog when they changed."""
+        rules = category_rules.load_rules(settings.CATEGORY_RULES_FILE)
+        if rules is not self._rules:
+            self._rules = rules
+            self._recategorize(rules)
+        return rules
+    
+    def _recategorize(self, rules: category_rules.CategoryRules):
+        """Update stored categories after the rules changed, one statement per extension."""
+        with self._lock:
+            conn = self._db()
+            for (ext,) in conn.execute("SELECT DISTINCT ext FROM files").fetchall():
+                conn.execute(
+                    "UPDATE files SET category = ? WHERE ext = ? AND category != ?",
+                    (rules.categorize(ext), ext, rules.categorize(ext))
+                )
+            conn.commit()
+            self._dirty = 0
+    
+    # Reading from disk
+    
+    @staticmethod
+    def _list(directory: str) -> Optional[_Listing]:
+        """Read a directory from disk, or None if it is gone or unreadable."""
+        try:
+            st = os.stat(directory)
+            files = []
+            subdirs = []
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            est = entry.stat(follow_symlinks=False)
+                            files.append((entry.name, est.st_size, est.st_mtime_ns, est.st_ctime_ns, est.st_ino))
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        
+        fingerprint = (st.st_mtime_ns, st.st_ino)
+        if time.time_ns() - st.st_mtime_ns < RACY_FINGERPRINT_NS:
+            # Too recent to trust: list it again next time
+            fingerprint = (-1, st.st_ino)
+        return _Listing(fingerprint, files, subdirs)
+    
+    @staticmethod
+    def _fingerprint(directory: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_ino
+    
+    def _probe(self, directory: str, known: Optional[Tuple[int, int]]) -> Tuple[str, Optional[_Listing]]:
+        """
+        Refresh step for one directory, run on the pool.
+        
+        Returns:
+            ("unchanged", None), ("gone", None) or ("listed", listing)
+        """
+        fingerprint = self._fingerprint(directory)
+        if fingerprint is None:
+            return "gone", None
+        if known is not None and tuple(known) == (fingerprint[0], _signed(fingerprint[1])):
+            return "unchanged", None
+        listing = self._list(directory)
+        return ("listed", listing) if listing is not None else ("gone", None)
+    
+    # Writing
+    
+    def _store_listing(self, directory: str, listing: _Listing, rules: category_rules.CategoryRules):
+        """Replace the catalog's view of one directory with a fresh listing (caller holds the lock)."""
+        conn = self._db()
+        present = {name for name, *_ in listing.files}
+        stored = {
+            name: (size, mtime_ns, inode)
+            for name, size, mtime_ns, inode in conn.execute(
+                "SELECT name, size, mtime_ns, inode FROM files WHERE parent = ?", (directory,)
+            )
+        }
+        
+        gone = [os.path.join(directory, name) for name in stored.keys() - present]
+        conn.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in gone))
+        
+        changed = [
+            (
+                os.path.join(directory, name), directory, name, os.path.splitext(name)[1].lower(),
+                size, mtime_ns, ctime_ns, _signed(inode), rules.categorize(os.path.splitext(name)[1])
+            )
+            for name, size, mtime_ns, ctime_ns, inode in listing.files
+            if stored.get(name) != (size, mtime_ns, _signed(inode))
+        ]
+        # A changed file's content hash is stale, so the whole row is replaced
+        conn.executemany(
+            "INSERT OR REPLACE INTO files (path, parent, name, ext, size, mtime_ns, ctime_ns, inode, category)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            changed
+        )
+        
+        subdirs = {os.path.join(directory, name) for name in listing.subdirs}
+        for (path,) in conn.execute("SELECT path FROM directories WHERE parent = ?", (directory,)).fetchall():
+            if path not in subdirs:
+                self._forget(path)
+        # New subdirectories get a placeholder fingerprint that never matches, so they are listed when reached
+        conn.executemany(
+            "INSERT OR IGNORE INTO directories (path, parent, mtime_ns, inode) VALUES (?, ?, -1, 0)",
+            ((path, directory) for path in subdirs)
+        )
+        
+        mtime_ns, inode = listing.fingerprint
+        conn.execute(
+            "INSERT OR REPLACE INTO directories (path, parent, mtime_ns, inode) VALUES (?, ?, ?, ?)",
+            (directory, os.path.dirname(directory), mtime_ns, _signed(inode))
+        )
+        self._wrote(len(gone) + len(changed) + 1)
+    
+    def _forget(self, directory: str):
+        """Drop a directory and everything below it (caller holds the lock)."""
+        conn = self._db()
+        low, high = _under(directory)
+        conn.execute("DELETE FROM files WHERE parent = ? OR (parent >= ? AND parent < ?)", (directory, low, high))
+        conn.execute("DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)", (directory, low, high))
+        self._wrote()
+    
+    def record_move(self, source: str, destination: str):
+        """
+        Record that the organizer moved a file.
+        
+        Renames keep size, mtime and inode, so the row is moved rather than
+        read from disk again. A file the catalog did not know yet (one that
+        arrived since the last refresh) is stat'ed at its new path instead.
+        
+        Args:
+            source: Previous path
+            destination: New path
+        """
+        if not (self.covers(source) or self.covers(destination)):
+            return
+        parent, name = os.path.split(destination)
+        ext = os.path.splitext(name)[1]
+        with self._lock:
+            conn = self._db()
+            if not self.covers(destination):
+                conn.execute("DELETE FROM files WHERE path = ?", (source,))
+            else:
+                category = self._current_rules().categorize(ext)
+                cursor = conn.execute(
+                    "UPDATE OR REPLACE files SET path = ?, parent = ?, name = ?, ext = ?, category = ? WHERE path = ?",
+                    (destination, parent, name, ext.lower(), category, source)
+                )
+                if cursor.rowcount == 0:
+                    try:
+                        st = os.stat(destination, follow_symlinks=False)
+                    except OSError:
+                        return
+                    conn.execute(
+                        "INSERT OR REPLACE INTO files (path, parent, name, ext, size, mtime_ns, ctime_ns, inode, category)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (destination, parent, name, ext.lower(), st.st_size, st.st_mtime_ns, st.st_ctime_ns, _signed(st.st_ino), category)
+                    )
+            self._wrote()
+    
+    def set_hashes(self, hashes: Iterable[Tuple[str, bytes]]):
+        """
+        Store full content hashes of catalogued files.
+        
+        Args:
+            hashes: (path, digest) pairs
+        """
+        with self._lock:
+            conn = self._db()
+            cursor = conn.executemany("UPDATE files SET hash = ? WHERE path = ?", ((digest, path) for path, digest in hashes))
+            self._wrote(max(cursor.rowcount, 1))
+    
+    # Refreshing
+    
+    def refresh(self, roots: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """
+        Bring the catalog up to date with the disk.
+        
+        Args:
+            roots: Directories to walk (defaults to the catalogued roots)
+            
+        Returns:
+            Counts of directories "listed", "unchanged" and "gone"
+        """
+        pending = [os.path.realpath(root) for root in (roots if roots is not None else self._roots)]
+        counts = {"listed": 0, "unchanged": 0, "gone": 0}
+        rules = self._current_rules()
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="catalog") as pool:
+            while pending and not self._stopped.is_set():
+                known = self._fingerprints(pending)
+                results = pool.map(lambda directory: self._probe(directory, known.get(directory)), pending)
+                next_level: List[str] = []
+                with self._lock:
+                    for directory, (state, listing) in zip(pending, results):
+                        counts[state] += 1
+                        if state == "gone":
+                            self._forget(directory)
+                        elif state == "unchanged":
+                            next_level.extend(self._subdirectories(directory))
+                        else:
+                            self._store_listing(directory, listing, rules)
+                            next_level.extend(os.path.join(directory, name) for name in listing.subdirs)
+                pending = next_level
+        
+        self.flush()
+        return counts
+    
+    def refresh_directory(self, directory: str) -> bool:
+        """
+        Relist one directory if it changed since it was catalogued (not recursive).
+        
+        Args:
+            directory: Resolved directory path
+            
+        Returns:
+            True if the catalog's view of the directory is current, False if it is gone
+        """
+        known = self._fingerprints([directory]).get(directory)
+        state, listing = self._probe(directory, known)
+        with self._lock:
+            if state == "gone":
+                self._forget(directory)
+                self.flush()
+                return False
+            if state == "listed":
+                self._store_listing(directory, listing, self._current_rules())
+                self.flush()
+        return True
+    
+    def _fingerprints(self, directories: Sequence[str]) -> Dict[str, Tuple[int, int]]:
+        """Stored fingerprints of directories that were listed before."""
+        found: Dict[str, Tuple[int, int]] = {}
+        with self._lock:
+            conn = self._db()
+            for start in range(0, len(directories), 500):
+                chunk = directories[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for path, mtime_ns, inode in conn.execute(
+                    f"SELECT path, mtime_ns, inode FROM directories WHERE path IN ({placeholders})", chunk
+                ):
+                    found[path] = (mtime_ns, inode)
+        return found
+    
+    def _subdirectories(self, directory: str) -> List[str]:
+        """Catalogued subdirectories (caller holds the lock)."""
+        return [path for (path,) in self._db().execute("SELECT path FROM directories WHERE parent = ?", (directory,))]
+    
+    def start(self, roots: Sequence[str], interval: float):
+        """
+        Catalog roots and keep refreshing them in a background thread.
+        
+        Args:
+            roots: Directories to cover
+            interval: Seconds between refreshes
+        """
+        self._roots = [os.path.realpath(root) for root in roots if os.path.isdir(root)]
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, args=(interval,), name="catalog-refresh", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop background refreshes (a running one ends after its current level)."""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+    
+    def _refresh_loop(self, interval: float):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                counts = self.refresh()
+                logger.info(
+                    f"Catalog refreshed in {time.monotonic() - started:.1f}s: "
+                    f"{counts['listed']} directories listed, {counts['unchanged']} unchanged"
+                )
+            except Exception:
+                logger.exception("Catalog refresh failed")
+            self._stopped.wait(interval)
+    
+    # Queries
+    
+    def list_files(self, directory: str) -> List[CatalogFile]:
+        """Files directly in a directory, by name."""
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT {', '.join(CatalogFile._fields)} FROM files WHERE parent = ? ORDER BY name", (directory,)
+            ).fetchall()
+        return [CatalogFile(*row) for row in rows]
+    
+    def list_directories(self, directory: str) -> List[str]:
+        """Paths of the catalogued subdirectories of a directory."""
+        with self._lock:
+            return self._subdirectories(directory)
+    
+    def search(self, base: str, query: SearchQuery, limit: int) -> List[CatalogFile]:
+        """
+        Ranked files below base matching a search.
+        
+        Candidates come from the trigram name index when the pattern has
+        three literal characters in a row; shorter patterns scan the names
+        in the table. Either way no directory is read.
+        
+        Args:
+            base: Resolved directory to search under
+            query: Pattern and filters
+            limit: Maximum number of results
+            
+        Returns:
+            Matching files, best first (see SearchQuery.rank)
+        """
+        low, high = _under(base)
+        needle = query.needle
+        conditions = ["(f.parent = ? OR (f.parent >= ? AND f.parent < ?))"]
+        params: List = [base, low, high]
+        
+        if query.mode == "glob":
+            conditions.append("lower(f.name) GLOB ?")
+            params.append(needle)
+        elif query.mode == "prefix":
+            conditions.append("substr(lower(f.name), 1, ?) = ?")
+            params.extend((len(needle), needle))
+        elif needle:
+            conditions.append("instr(lower(f.name), ?) > 0")
+            params.append(needle)
+        if query.extensions:
+            conditions.append(f"f.ext IN ({','.join('?' * len(query.extensions))})")
+            params.extend(query.extensions)
+        for condition, value in (
+            ("f.size >= ?", query.min_size),
+            ("f.size <= ?", query.max_size),
+            ("f.mtime_ns >= ?", query.modified_after_ns),
+            ("f.mtime_ns < ?", query.modified_before_ns),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        
+        source = "files AS f"
+        like = query.like_pattern()
+        if _longest_literal(like) >= _MIN_INDEXED_RUN:
+            source = "names JOIN files AS f ON f.rowid = names.rowid"
+            conditions.insert(0, "names.name LIKE ?")
+            params.insert(0, like)
+        
+        columns = ", ".join(f"f.{field}" for field in CatalogFile._fields)
+        sql = (
+            f"SELECT {columns} FROM {source} WHERE {' AND '.join(conditions)}"
+            " ORDER BY CASE WHEN lower(f.name) = ? THEN 0 WHEN substr(lower(f.name), 1, ?) = ? THEN 1 ELSE 2 END,"
+            " length(f.name), f.mtime_ns DESC LIMIT ?"
+        )
+        params.extend((needle, len(needle), needle, limit))
+        with self._lock:
+            rows = self._db().execute(sql, params).fetchall()
+        return [CatalogFile(*row) for row in rows]
+    
+    def category_totals(self, base: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        """(category, file count, total size) of every file, or of the files below base."""
+        query = "SELECT category, COUNT(*), SUM(size) FROM files"
+        params: Tuple = ()
+        if base is not None:
+            low, high = _under(base)
+            query += " WHERE parent = ? OR (parent >= ? AND parent < ?)"
+            params = (base, low, high)
+        with self._lock:
+            return [
+                (category, count, size or 0)
+                for category, count, size in self._db().execute(query + " GROUP BY category ORDER BY 3 DESC", params)
+            ]
+    
+    def extension_totals(self, base: Optional[str] = None, limit: int = 20) -> List[Tuple[str, int, int]]:
+        """(extension, file count, total size) of the extensions taking the most space."""
+        query = "SELECT ext, COUNT(*), SUM(size) FROM files"
+        params: Tuple = ()
+        if base is not None:
+            low, high = _under(base)
+            query += " WHERE parent = ? OR (parent >= ? AND parent < ?)"
+            params = (base, low, high)
+        with self._lock:
+            return [
+                (ext, count, size or 0)
+                for ext, count, size in self._db().execute(query + " GROUP BY ext ORDER BY 3 DESC LIMIT ?", params + (limit,))
+            ]
+
+
+# Global catalog instance (None unless CATALOG_ENABLED)
+file_catalog: Optional[FileCatalog] = (
+    FileCatalog(settings.CATALOG_PATH, settings.CATALOG_WORKERS) if settings.CATALOG_ENABLED else None
+)
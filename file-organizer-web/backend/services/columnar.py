@@ -0,0 +1,165 @@
+"""
+Columnar scans for planning large organize operations.
+"""
+
+import os
+import re
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from core.shared import rules as category_rules, scanner
+
+
+# Every UTC offset and DST transition falls on a quarter hour, so all
+# timestamps of one quarter hour share their local date, hour and zone.
+# Formats showing minutes, seconds or microseconds need finer buckets.
+_BUCKET_UNITS = (
+    (re.compile(r"%[-_0^#]*f"), "us"),
+    (re.compile(r"%[-_0^#]*[SXcTrs]"), "s"),
+    (re.compile(r"%[-_0^#]*[MR]"), "m"),
+)
+
+
+class ColumnarScan:
+    """
+    Scanned files held as parallel arrays instead of one object per file.
+    
+    Names stay a list of strings; inodes, mtimes and interned extension IDs
+    are NumPy arrays, so classification and date bucketing run once per
+    distinct extension or time bucket rather than once per file.
+    """
+    
+    def __init__(
+        self,
+        names: List[str],
+        inodes: np.ndarray,
+        mtimes_ns: np.ndarray,
+        extension_ids: np.ndarray,
+        extensions: List[str]
+    ):
+        self.names = names
+        self.inodes = inodes
+        self.mtimes_ns = mtimes_ns
+        self.extension_ids = extension_ids
+        self.extensions = extensions
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @classmethod
+    def collect(cls, entries: Iterable[scanner.ScanEntry], prefix: int = 0) -> "ColumnarScan":
+        """
+        Drain a scan stage into columns.
+        
+        Args:
+            entries: Scanned entries (files that vanish while stat'ing are dropped)
+            prefix: Length of the source directory prefix to strip from paths
+            
+        Returns:
+            ColumnarScan of the entries, in scan order
+        """
+        names: List[str] = []
+        inodes = array("Q")
+        mtimes = array("q")
+        extension_ids = array("i")
+        interned: Dict[str, int] = {}
+        
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            suffix = entry.suffix.lower()
+            extension_id = interned.get(suffix)
+            if extension_id is None:
+                extension_id = interned[suffix] = len(interned)
+            names.append(entry.path[prefix:])
+            inodes.append(st.st_ino)
+            mtimes.append(st.st_mtime_ns)
+            extension_ids.append(extension_id)
+        
+        return cls(
+            names,
+            np.frombuffer(inodes, dtype=np.uint64),
+            np.frombuffer(mtimes, dtype=np.int64),
+            np.frombuffer(extension_ids, dtype=np.int32),
+            list(interned)
+        )
+    
+    def type_folders(self, rules: category_rules.CategoryRules, create_others: bool = True) -> Tuple[List[str], np.ndarray]:
+        """
+        Categorize every file by extension with one rules lookup per distinct extension.
+        
+        Args:
+            rules: Compiled category rules
+            create_others: Whether to keep uncategorized files
+            
+        Returns:
+            Tuple of (folder names, folder index per file with -1 for dropped files)
+        """
+        folders: List[str] = []
+        folder_ids: Dict[str, int] = {}
+        lookup = np.empty(len(self.extensions), dtype=np.int32)
+        for index, extension in enumerate(self.extensions):
+            category = rules.categorize(extension)
+            if category == category_rules.FALLBACK_CATEGORY and not create_others:
+                lookup[index] = -1
+                continue
+            if category not in folder_ids:
+                folder_ids[category] = len(folders)
+                folders.append(category)
+            lookup[index] = folder_ids[category]
+        return folders, lookup[self.extension_ids]
+    
+    def date_folders(self, date_format: str = "%Y/%m") -> Tuple[List[str], np.ndarray]:
+        """
+        Bucket every file by modification date, formatting each bucket once.
+        
+        Mtimes are bucketed as datetime64 values by quarter hour (or by the
+        smallest unit the format shows, when that is finer), and only the
+        distinct buckets are converted to local time and formatted.
+        
+        Args:
+            date_format: Date format for folder names
+            
+        Returns:
+            Tuple of (folder names, folder index per file)
+        """
+        unit = next((unit for pattern, unit in _BUCKET_UNITS if pattern.search(date_format)), "15m")
+        buckets = (self.mtimes_ns // 1000).astype("datetime64[us]").astype(f"datetime64[{unit}]")
+        distinct, inverse = np.unique(buckets, return_inverse=True)
+        
+        folders: List[str] = []
+        folder_ids: Dict[str, int] = {}
+        lookup = np.empty(len(distinct), dtype=np.int32)
+        for index, bucket in enumerate(distinct.astype("datetime64[us]").astype(np.int64).tolist()):
+            folder = datetime.fromtimestamp(bucket / 1_000_000).strftime(date_format)
+            if folder not in folder_ids:
+                folder_ids[folder] = len(folders)
+                folders.append(folder)
+            lookup[index] = folder_ids[folder]
+        return folders, lookup[inverse.reshape(-1)]
+
+
+def folder_counts(folders: List[str], folder_index: np.ndarray) -> Dict[str, int]:
+    """
+    Files per folder.
+    
+    Args:
+        folders: Folder names
+        folder_index: Folder index per file (-1 for dropped files)
+        
+    Returns:
+        Dict of folder -> count for folders with at least one file
+    """
+    kept = folder_index[folder_index >= 0]
+    counts = np.bincount(kept, minlength=len(folders))
+    return {folder: int(count) for folder, count in zip(folders, counts) if count}
+
+
+def basename(name: str) -> str:
+    """File name of a path relative to the source directory."""
+    return name.rpartition(os.sep)[2]
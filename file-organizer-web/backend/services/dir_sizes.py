@@ -0,0 +1,205 @@
+"""
+Recursive directory sizes computed in the background for the file browser.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_for
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.config import settings
+from services.catalog import RACY_FINGERPRINT_NS
+
+logger = logging.getLogger(__name__)
+
+Fingerprint = Tuple[int, int]
+
+# Statuses reported for a directory size
+SIZE_READY = "ready"      # Measured recently, and the directory is unchanged since
+SIZE_STALE = "stale"      # Last known size; a new measurement is under way
+SIZE_PENDING = "pending"  # Not measured yet; a measurement is under way
+
+
+class _Node(NamedTuple):
+    """One directory's own contents as of its last listing."""
+    
+    fingerprint: Fingerprint
+    files: int
+    size: int
+    children: Tuple[str, ...]
+
+
+class DirectorySize(NamedTuple):
+    """Recursive totals of a directory."""
+    
+    files: int
+    size: int
+    fingerprint: Fingerprint
+    measured_at: float
+
+
+class DirectorySizer:
+    """
+    Measures recursive directory sizes (files and bytes, like du --apparent-size)
+    on a thread pool, with results cached per directory.
+    
+    A measurement walks the tree with one stat per directory: directories
+    whose (mtime_ns, inode) is unchanged reuse their cached listing, and
+    only changed ones are scanned again. Every directory under the one
+    measured gets its totals recorded too, so browsing deeper is answered
+    from the cache. Symlinks are not followed.
+    """
+    
+    def __init__(self, workers: int = 4, cache_size: int = 100_000, ttl_seconds: float = 60):
+        """
+        Initialize the sizer.
+        
+        Args:
+            workers: Measurements that run at once
+            cache_size: Directories whose listings and totals are kept; least recently used go first
+            ttl_seconds: Seconds a measured size counts as ready (changes deeper down do not touch the directory's mtime)
+        """
+        self.workers = workers
+        self.cache_size = cache_size
+        self.ttl_seconds = ttl_seconds
+        self._nodes: "OrderedDict[str, _Node]" = OrderedDict()
+        self._totals: "OrderedDict[str, DirectorySize]" = OrderedDict()
+        self._running: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+    
+    def _executor(self) -> ThreadPoolExecutor:
+        """The measuring pool (caller holds the lock)."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="dir-size")
+        return self._pool
+    
+    def lookup(self, path: str, fingerprint: Fingerprint) -> Tuple[str, Optional[DirectorySize]]:
+        """
+        Status and last known totals of a directory, starting a measurement
+        unless the totals are ready.
+        
+        Args:
+            path: Resolved directory path
+            fingerprint: The directory's current (mtime_ns, inode)
+            
+        Returns:
+            Tuple of (SIZE_READY, SIZE_STALE or SIZE_PENDING, totals or None)
+        """
+        with self._lock:
+            totals = self._totals.get(path)
+            if totals is not None:
+                self._totals.move_to_end(path)
+                if totals.fingerprint == fingerprint and time.monotonic() - totals.measured_at <= self.ttl_seconds:
+                    return SIZE_READY, totals
+            self._start(path)
+        return (SIZE_STALE if totals is not None else SIZE_PENDING), totals
+    
+    def _start(self, path: str) -> Future:
+        """Measure a directory unless it already is being measured (caller holds the lock)."""
+        future = self._running.get(path)
+        if future is None:
+            future = self._executor().submit(self._measure, path)
+            self._running[path] = future
+            future.add_done_callback(lambda _future: self._finished(path))
+        return future
+    
+    def _finished(self, path: str):
+        with self._lock:
+            self._running.pop(path, None)
+    
+    def wait(self, paths: Iterable[str], timeout: float):
+        """Wait up to timeout seconds for measurements of the given paths to finish."""
+        with self._lock:
+            futures = [self._running[path] for path in paths if path in self._running]
+        if futures and timeout > 0:
+            wait_for(futures, timeout=timeout)
+    
+    def _node(self, path: str, follow_symlinks: bool = False) -> Optional[_Node]:
+        """A directory's own contents, listed again only if it changed; None if it is gone."""
+        try:
+            st = os.stat(path, follow_symlinks=follow_symlinks)
+        except OSError:
+            return None
+        fingerprint = (st.st_mtime_ns, st.st_ino)
+        if time.time_ns() - st.st_mtime_ns < RACY_FINGERPRINT_NS:
+            # Too recent to trust (a change in the same mtime tick would not show):
+            # a fingerprint that never matches keeps the listing and totals from being reused
+            fingerprint = (-1, st.st_ino)
+        with self._lock:
+            node = self._nodes.get(path)
+            if node is not None and node.fingerprint == fingerprint:
+                self._nodes.move_to_end(path)
+                return node
+        
+        files = size = 0
+        children: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            children.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files += 1
+                            size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            # Unreadable: counts as empty
+            pass
+        node = _Node(fingerprint, files, size, tuple(children))
+        with self._lock:
+            self._nodes[path] = node
+            while len(self._nodes) > self.cache_size:
+                self._nodes.popitem(last=False)
+        return node
+    
+    def _measure(self, root: str):
+        """Measure root and record the totals of every directory under it."""
+        started = time.monotonic()
+        order: List[Tuple[str, _Node]] = []
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            # The directory measured may itself be a symlink the browser listed
+            node = self._node(path, follow_symlinks=path == root)
+            if node is None:
+                continue
+            order.append((path, node))
+            stack.extend(node.children)
+        
+        # Parents come before their children, so reversed order sums children first
+        subtotals: Dict[str, Tuple[int, int]] = {}
+        for path, node in reversed(order):
+            files, size = node.files, node.size
+            for child in node.children:
+                child_files, child_size = subtotals.get(child, (0, 0))
+                files += child_files
+                size += child_size
+            subtotals[path] = (files, size)
+        
+        measured_at = time.monotonic()
+        with self._lock:
+            for path, node in order:
+                files, size = subtotals[path]
+                self._totals[path] = DirectorySize(files, size, node.fingerprint, measured_at)
+                self._totals.move_to_end(path)
+            while len(self._totals) > self.cache_size:
+                self._totals.popitem(last=False)
+        logger.debug(f"Measured {root} ({len(order)} directories) in {measured_at - started:.2f}s")
+    
+    def shutdown(self):
+        """Stop measuring; measurements not started yet are dropped."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._running.clear()
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global sizer instance
+directory_sizer = DirectorySizer(settings.DIR_SIZE_WORKERS, settings.DIR_SIZE_CACHE_SIZE, settings.DIR_SIZE_TTL)
@@ -0,0 +1,171 @@
+"""
+Sorted, cursor-paginated views of one directory scan for the file browser.
+"""
+
+import os
+import json
+import time
+import heapq
+import base64
+import bisect
+import binascii
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+SORT_KEYS = ("name", "size", "mtime", "type")
+
+# Directories come before files whatever the sort
+_GROUPS = (True, False)
+
+
+class ScannedEntry(NamedTuple):
+    """One entry of a directory scan, as stat'ed during the scan."""
+    
+    name: str
+    path: str
+    is_dir: bool
+    size: int
+    mtime_ns: int
+    ctime_ns: int
+    inode: int
+
+
+def _name_key(entry: ScannedEntry) -> tuple:
+    return entry.name.lower(), entry.name
+
+
+def _mtime_key(entry: ScannedEntry) -> tuple:
+    return entry.mtime_ns, entry.name.lower(), entry.name
+
+
+# Ascending keys per sort; every key ends with the name, which is unique, so
+# keys are unique and a page can resume right after the last key it sent.
+# Directory sizes are measured lazily, so directories sort by name for "size"
+# and "type".
+_KEYS: Dict[str, Tuple[Callable[[ScannedEntry], tuple], Callable[[ScannedEntry], tuple]]] = {
+    "name": (_name_key, _name_key),
+    "size": (_name_key, lambda entry: (entry.size, entry.name.lower(), entry.name)),
+    "mtime": (_mtime_key, _mtime_key),
+    "type": (_name_key, lambda entry: (os.path.splitext(entry.name)[1].lower(), entry.name.lower(), entry.name)),
+}
+
+
+def encode_cursor(sort: str, descending: bool, group: int, key: tuple) -> str:
+    """Opaque token for the position after key in group."""
+    raw = json.dumps({"s": sort, "d": descending, "g": group, "k": list(key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[int, tuple]:
+    """
+    (group, key) of a cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort order
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        group, key = int(raw["g"]), tuple(raw["k"])
+        if (raw["s"], raw["d"]) != (sort, descending):
+            raise ValueError("Cursor was made for a different sort order")
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if group not in (0, 1):
+        raise ValueError("Invalid cursor")
+    return group, key
+
+
+class DirectoryScan:
+    """
+    Everything one scan of a directory found, with sort orders built on demand.
+    
+    The first page of a sort is a heap selection of the smallest (or
+    largest) keys, so it does not sort the whole directory. A later page
+    sorts the keys once and keeps them, so every page after it is a binary
+    search. The fingerprint (mtime_ns, inode) is the directory's, taken
+    before it was read; the browser drops the scan when it changes.
+    """
+    
+    def __init__(self, entries: List[ScannedEntry], fingerprint: Tuple[int, int]):
+        self.fingerprint = fingerprint
+        self.created_at = time.monotonic()
+        self.groups = tuple([entry for entry in entries if entry.is_dir == is_dir] for is_dir in _GROUPS)
+        self.total_directories = len(self.groups[0])
+        self.total_files = len(self.groups[1])
+        self.files_size = sum(entry.size for entry in self.groups[1])
+        # (sort, group) -> (sorted keys, entries in the same order)
+        self._sorted: Dict[Tuple[str, int], Tuple[List[tuple], List[ScannedEntry]]] = {}
+    
+    def _sorted_group(self, sort: str, group: int) -> Tuple[List[tuple], List[ScannedEntry]]:
+        cached = self._sorted.get((sort, group))
+        if cached is None:
+            key = _KEYS[sort][group]
+            pairs = sorted(((key(entry), entry) for entry in self.groups[group]), key=lambda pair: pair[0])
+            cached = ([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+            self._sorted[(sort, group)] = cached
+        return cached
+    
+    def _select(
+        self,
+        sort: str,
+        descending: bool,
+        group: int,
+        after: Optional[tuple],
+        count: int
+    ) -> List[Tuple[tuple, ScannedEntry]]:
+        """Up to count (key, entry) pairs of one group that come after a key."""
+        if (sort, group) in self._sorted or after is not None:
+            keys, ordered = self._sorted_group(sort, group)
+            if descending:
+                end = bisect.bisect_left(keys, after) if after is not None else len(keys)
+                start = max(0, end - count)
+                return list(zip(reversed(keys[start:end]), reversed(ordered[start:end])))
+            start = bisect.bisect_right(keys, after) if after is not None else 0
+            return list(zip(keys[start:start + count], ordered[start:start + count]))
+        
+        key = _KEYS[sort][group]
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return select(count, ((key(entry), entry) for entry in self.groups[group]), key=lambda pair: pair[0])
+    
+    def page(
+        self,
+        sort: str = "name",
+        descending: bool = False,
+        limit: int = 500,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[ScannedEntry], Optional[str]]:
+        """
+        One page of entries, directories first.
+        
+        Args:
+            sort: One of SORT_KEYS
+            descending: Whether to sort largest (or latest, or last) first
+            limit: Maximum number of entries
+            cursor: Where the previous page ended (None for the first page)
+            
+        Returns:
+            Tuple of (entries, cursor of the next page or None at the end)
+            
+        Raises:
+            ValueError: If the sort key or the cursor is invalid
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}' (expected one of {', '.join(SORT_KEYS)})")
+        group, after = decode_cursor(cursor, sort, descending) if cursor else (0, None)
+        
+        # One entry more than asked for tells whether there is a next page
+        selected: List[Tuple[int, tuple, ScannedEntry]] = []
+        while group < len(_GROUPS) and len(selected) <= limit:
+            try:
+                found = self._select(sort, descending, group, after, limit + 1 - len(selected))
+            except TypeError as e:
+                # A cursor key whose parts do not compare with this sort's keys
+                raise ValueError("Invalid cursor") from e
+            selected.extend((group, key, entry) for key, entry in found)
+            group, after = group + 1, None
+        
+        next_cursor = None
+        if len(selected) > limit:
+            selected = selected[:limit]
+            last_group, last_key, _entry = selected[-1]
+            next_cursor = encode_cursor(sort, descending, last_group, last_key)
+        return [entry for _group, _key, entry in selected], next_cursor
@@ -3,17 +3,78 @@ File browser service for safe filesystem navigation.
 """
 
 import os
+import time
+import heapq
 import mimetypes
 import logging
+import functools
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Type, TypeVar, Union
 from datetime import datetime
 
 from core.config import settings
-from schemas.file import FileInfo, DirectoryInfo, DirectoryContents
+from core.shared import rules as category_rules, dedup as content_dedup, sniff, walker
+from schemas.file import (
+    FileInfo, FileInfoResult, DirectoryInfo, DirectoryContents, DirectorySizeInfo, DuplicateGroup, DuplicateSummary
+)
+from services.batch import BatchPool, batch_pool, resolve_allowed
+from services.catalog import RACY_FINGERPRINT_NS, SEARCH_MODES, CatalogFile, SearchQuery, file_catalog
+from services.dir_sizes import SIZE_READY, DirectorySizer, directory_sizer
+from services.directory_pages import DirectoryScan, ScannedEntry
+from services.listing_cache import DirectoryListing, ListingCache
 
 logger = logging.getLogger(__name__)
 
+Model = TypeVar("Model", FileInfo, DirectoryInfo)
+
+# Fields every projection keeps
+_ALWAYS_FIELDS = frozenset({"name", "path"})
+# Fields that need the entry stat'ed
+_STAT_FIELDS = frozenset({"size", "created_at", "modified_at", "file_count", "total_size", "size_status"})
+# Directory fields that come from the directory sizer
+_SIZE_FIELDS = frozenset({"file_count", "total_size", "size_status"})
+# File fields that come from the content sniffer, when sniffing
+_SNIFFED_FIELDS = frozenset({"mime_type", "category"})
+
+
+@functools.lru_cache(maxsize=1024)
+def _guess_mime_type(suffixes: str) -> Optional[str]:
+    """MIME type for a file's suffixes, looked up once per distinct suffixes."""
+    return mimetypes.guess_type("file" + suffixes)[0]
+
+
+def parse_fields(fields: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """
+    Validate the FileInfo/DirectoryInfo fields a request asks for.
+    
+    Args:
+        fields: Field names (None or empty for all fields)
+        
+    Returns:
+        The fields, always with name and path, or None for all fields
+        
+    Raises:
+        ValueError: If a field is unknown
+    """
+    requested = frozenset(field.strip() for field in fields or () if field.strip())
+    if not requested:
+        return None
+    known = FileInfo.model_fields.keys() | DirectoryInfo.model_fields.keys()
+    unknown = requested - known
+    if unknown:
+        raise ValueError(f"Unknown field(s) {', '.join(sorted(unknown))} (expected some of {', '.join(sorted(known))})")
+    return requested | _ALWAYS_FIELDS
+
+
+def _wants(fields: Optional[FrozenSet[str]], names: FrozenSet[str]) -> bool:
+    """Whether a projection (None for all fields) asks for any of names."""
+    return fields is None or not fields.isdisjoint(names)
+
+
+def _project(model: Type[Model], fields: Optional[FrozenSet[str]], values: Dict[str, Callable[[], Any]]) -> Model:
+    """Build a model with only the requested fields set; the others are never computed."""
+    return model(**{name: value() for name, value in values.items() if fields is None or name in fields})
+
 
 class FileBrowserService:
     """Service for browsing filesystem safely."""
@@ -21,6 +82,12 @@ class FileBrowserService:
     def __init__(self):
         """Initialize file browser with allowed paths."""
         self.allowed_paths = settings.get_allowed_paths()
+        self.sniffer = sniff.ContentSniffer() if settings.CONTENT_SNIFFING else None
+        self.catalog = file_catalog
+        self.listings = ListingCache(settings.BROWSE_CACHE_SIZE, settings.BROWSE_CACHE_TTL)
+        self.scans = ListingCache(settings.BROWSE_SCAN_CACHE_SIZE, settings.BROWSE_CACHE_TTL)
+        self.sizer: DirectorySizer = directory_sizer
+        self.batches: BatchPool = batch_pool
     
     def _is_path_allowed(self, path: str) -> bool:
         """
@@ -53,68 +120,131 @@ class FileBrowserService:
         except Exception:
             return False
     
-    def _get_file_info(self, file_path: Path) -> FileInfo:
+    def _get_rules(self) -> category_rules.CategoryRules:
+        """Get the compiled category rules shared with the organizer."""
+        return category_rules.load_rules(settings.CATEGORY_RULES_FILE)
+    
+    def _get_file_info(
+        self,
+        file_path: Path,
+        rules: Optional[category_rules.CategoryRules] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> FileInfo:
         """
         Get information about a file.
         
+        The file is stat'ed only if its size or times are asked for (or its
+        type is sniffed), and its MIME type is looked up only if asked for.
+        
         Args:
             file_path: Path to the file
+            rules: Compiled category rules (loaded if not given)
+            fields: Fields to fill in (None for all)
             
         Returns:
             FileInfo object
         """
-        stat = file_path.stat()
-        mime_type, _ = mimetypes.guess_type(str(file_path))
-        
-        return FileInfo(
-            name=file_path.name,
-            path=str(file_path),
-            size=stat.st_size,
-            extension=file_path.suffix,
-            mime_type=mime_type,
-            created_at=datetime.fromtimestamp(stat.st_ctime),
-            modified_at=datetime.fromtimestamp(stat.st_mtime),
-            is_hidden=file_path.name.startswith('.'),
-            category=None  # Will be set by organizer if needed
-        )
+        rules = rules or self._get_rules()
+        sniffing = self.sniffer is not None and _wants(fields, _SNIFFED_FIELDS)
+        stat = file_path.stat() if sniffing or _wants(fields, _STAT_FIELDS) else None
+        extension = file_path.suffix
+        signature = self.sniffer.sniff(str(file_path), stat) if sniffing else None
+        if signature is not None:
+            extension = sniff.effective_extension(extension, signature, rules)
+        
+        return _project(FileInfo, fields, {
+            "name": lambda: file_path.name,
+            "path": lambda: str(file_path),
+            "size": lambda: stat.st_size,
+            "extension": lambda: file_path.suffix,
+            # Two suffixes, so that e.g. .tar.gz is still told apart from .gz
+            "mime_type": lambda: (
+                signature.mime if signature is not None
+                else _guess_mime_type("".join(file_path.suffixes[-2:]).lower())
+            ),
+            "created_at": lambda: datetime.fromtimestamp(stat.st_ctime),
+            "modified_at": lambda: datetime.fromtimestamp(stat.st_mtime),
+            "is_hidden": lambda: file_path.name.startswith('.'),
+            "category": lambda: rules.categorize(extension)
+        })
     
-    def _get_directory_info(self, dir_path: Path) -> DirectoryInfo:
+    def _from_catalog(self, path: Path) -> bool:
+        """Whether a resolved path can be answered from the file catalog."""
+        # Sniffed types depend on file contents, which the catalog does not keep
+        return self.catalog is not None and self.sniffer is None and self.catalog.covers(str(path))
+    
+    def _catalog_file_info(self, entry: CatalogFile, fields: Optional[FrozenSet[str]] = None) -> FileInfo:
         """
-        Get information about a directory.
+        Build FileInfo from a catalog row, without touching the disk.
         
         Args:
-            dir_path: Path to the directory
+            entry: Catalogued file
+            fields: Fields to fill in (None for all)
             
         Returns:
-            DirectoryInfo object
+            FileInfo object
+        """
+        return _project(FileInfo, fields, {
+            "name": lambda: entry.name,
+            "path": lambda: entry.path,
+            "size": lambda: entry.size,
+            "extension": lambda: os.path.splitext(entry.name)[1],
+            "mime_type": lambda: _guess_mime_type("".join(Path(entry.name).suffixes[-2:]).lower()),
+            "created_at": lambda: datetime.fromtimestamp(entry.ctime_ns / 1e9),
+            "modified_at": lambda: datetime.fromtimestamp(entry.mtime_ns / 1e9),
+            "is_hidden": lambda: entry.name.startswith('.'),
+            "category": lambda: entry.category
+        })
+    
+    def _scanned_directory_info(self, entry: ScannedEntry, fields: Optional[FrozenSet[str]] = None) -> DirectoryInfo:
         """
-        stat = dir_path.stat()
+        Build DirectoryInfo from a scanned directory.
         
-        # Count files and calculate total size
-        file_count = 0
-        total_size = 0
-        try:
-            for item in dir_path.iterdir():
-                if item.is_file():
-                    file_count += 1
-                    total_size += item.stat().st_size
-        except PermissionError:
-            pass
-        
-        return DirectoryInfo(
-            name=dir_path.name,
-            path=str(dir_path),
-            file_count=file_count,
-            total_size=total_size,
-            created_at=datetime.fromtimestamp(stat.st_ctime),
-            modified_at=datetime.fromtimestamp(stat.st_mtime),
-            is_hidden=dir_path.name.startswith('.')
-        )
+        Its totals are as the directory sizer has them; the sizer is only
+        asked when the totals are among the fields.
+        """
+        status, totals = None, None
+        if _wants(fields, _SIZE_FIELDS):
+            status, totals = self.sizer.lookup(entry.path, (entry.mtime_ns, entry.inode))
+        
+        return _project(DirectoryInfo, fields, {
+            "name": lambda: entry.name,
+            "path": lambda: entry.path,
+            "file_count": lambda: totals.files if totals is not None else None,
+            "total_size": lambda: totals.size if totals is not None else None,
+            "size_status": lambda: status,
+            "created_at": lambda: datetime.fromtimestamp(entry.ctime_ns / 1e9),
+            "modified_at": lambda: datetime.fromtimestamp(entry.mtime_ns / 1e9),
+            "is_hidden": lambda: entry.name.startswith('.')
+        })
+    
+    def _scanned_file_info(
+        self,
+        entry: ScannedEntry,
+        rules: category_rules.CategoryRules,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> FileInfo:
+        """Build FileInfo from a scanned file without stat'ing it again (unless sniffing)."""
+        if self.sniffer is not None and _wants(fields, _SNIFFED_FIELDS):
+            return self._get_file_info(Path(entry.path), rules, fields)
+        extension = os.path.splitext(entry.name)[1]
+        return _project(FileInfo, fields, {
+            "name": lambda: entry.name,
+            "path": lambda: entry.path,
+            "size": lambda: entry.size,
+            "extension": lambda: extension,
+            "mime_type": lambda: _guess_mime_type("".join(Path(entry.name).suffixes[-2:]).lower()),
+            "created_at": lambda: datetime.fromtimestamp(entry.ctime_ns / 1e9),
+            "modified_at": lambda: datetime.fromtimestamp(entry.mtime_ns / 1e9),
+            "is_hidden": lambda: entry.name.startswith('.'),
+            "category": lambda: rules.categorize(extension)
+        })
     
     def get_directory_contents(
         self,
         path: str,
-        include_hidden: bool = False
+        include_hidden: bool = False,
+        fields: Optional[FrozenSet[str]] = None
     ) -> DirectoryContents:
         """
         Get contents of a directory.
@@ -122,10 +252,41 @@ class FileBrowserService:
         Args:
             path: Directory path
             include_hidden: Whether to include hidden files/directories
+            fields: FileInfo/DirectoryInfo fields to fill in (None for all, see parse_fields)
             
         Returns:
             DirectoryContents object
             
+        Raises:
+            ValueError: If path is not allowed or invalid
+            PermissionError: If access is denied
+        """
+        return self.get_directory_listing(path, include_hidden, fields).contents
+    
+    def get_directory_listing(
+        self,
+        path: str,
+        include_hidden: bool = False,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> DirectoryListing:
+        """
+        Get the contents of a directory with their serialized body and ETag.
+        
+        Listings are cached by resolved path, hidden flag and fields. A cached one is
+        reused while the directory's (mtime_ns, inode) is unchanged, so a
+        repeated browse costs one stat. Directories modified within the last
+        two seconds are not cached: their mtime may not yet reflect a change
+        made in the same tick. Neither are listings with subdirectory sizes
+        still being measured.
+        
+        Args:
+            path: Directory path
+            include_hidden: Whether to include hidden files/directories
+            fields: FileInfo/DirectoryInfo fields to fill in (None for all, see parse_fields)
+            
+        Returns:
+            DirectoryListing object
+            
         Raises:
             ValueError: If path is not allowed or invalid
             PermissionError: If access is denied
@@ -135,52 +296,293 @@ class FileBrowserService:
         
         dir_path = Path(path).resolve()
         
-        if not dir_path.exists():
+        try:
+            st = dir_path.stat()
+        except OSError:
             raise ValueError(f"Path '{path}' does not exist")
         
         if not dir_path.is_dir():
             raise ValueError(f"Path '{path}' is not a directory")
         
+        key = (str(dir_path), include_hidden, fields)
+        fingerprint = (st.st_mtime_ns, st.st_ino)
+        listing = self.listings.get(key, fingerprint)
+        if listing is not None:
+            return listing
+        
+        listing = DirectoryListing(self._read_directory(dir_path, include_hidden, fields), fingerprint)
+        # Listings waiting on directory sizes are built again once the sizes are in
+        if time.time_ns() - st.st_mtime_ns >= RACY_FINGERPRINT_NS and not listing.contents.sizes_pending:
+            self.listings.put(key, listing)
+        return listing
+    
+    def _read_directory(
+        self,
+        dir_path: Path,
+        include_hidden: bool,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> DirectoryContents:
+        """
+        List a directory (from the file catalog when it covers it), sorted by name.
+        
+        Args:
+            dir_path: Resolved directory path
+            include_hidden: Whether to include hidden files/directories
+            fields: FileInfo/DirectoryInfo fields to fill in (None for all)
+            
+        Returns:
+            DirectoryContents object
+            
+        Raises:
+            ValueError: If the directory disappeared
+            PermissionError: If access is denied
+        """
+        entries = self._scan_directory(dir_path, include_hidden, stat=_wants(fields, _STAT_FIELDS))
+        rules = self._get_rules()
         files: List[FileInfo] = []
         directories: List[DirectoryInfo] = []
-        total_size = 0
-        
-        try:
-            for item in sorted(dir_path.iterdir(), key=lambda x: x.name.lower()):
-                # Skip hidden files if requested
-                if not include_hidden and item.name.startswith('.'):
-                    continue
-                
-                try:
-                    if item.is_file():
-                        file_info = self._get_file_info(item)
-                        files.append(file_info)
-                        total_size += file_info.size
-                    elif item.is_dir():
-                        dir_info = self._get_directory_info(item)
-                        directories.append(dir_info)
-                        total_size += dir_info.total_size
-                except (PermissionError, OSError):
-                    # Skip files/directories we can't access
-                    continue
-        except PermissionError as e:
-            raise PermissionError(f"Permission denied accessing '{path}'") from e
+        for entry in sorted(entries, key=lambda entry: (entry.name.lower(), entry.name)):
+            try:
+                if entry.is_dir:
+                    directories.append(self._scanned_directory_info(entry, fields))
+                else:
+                    files.append(self._scanned_file_info(entry, rules, fields))
+            except OSError:
+                # Skip files we can't access
+                continue
         
+        totals: Dict[str, int] = {}
+        if _wants(fields, _SIZE_FIELDS):
+            totals["sizes_pending"] = sum(info.size_status != SIZE_READY for info in directories)
+        if fields is None or {"size", "total_size"} <= fields:
+            totals["total_size"] = sum(info.size for info in files) + sum(info.total_size or 0 for info in directories)
         return DirectoryContents(
             path=str(dir_path),
             files=files,
             directories=directories,
             total_files=len(files),
             total_directories=len(directories),
-            total_size=total_size
+            **totals
         )
     
-    def get_file_info(self, path: str) -> FileInfo:
+    def get_directory_page(
+        self,
+        path: str,
+        include_hidden: bool = False,
+        sort: str = "name",
+        descending: bool = False,
+        limit: int = 500,
+        cursor: Optional[str] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> DirectoryContents:
+        """
+        Get one sorted page of a directory's contents, directories first.
+        
+        The directory is scanned once per version (mtime_ns, inode) and the
+        scan is cached: only the entries of the page are turned into
+        FileInfo/DirectoryInfo, and the totals come from the scan. Sorted by
+        name or type, with none of the fields needing a stat, the scan does
+        not stat the entries at all. Pass the
+        returned next_cursor to get the following page; a cursor stays
+        valid when the directory changes in between (the page resumes after
+        the last entry sent).
+        
+        Args:
+            path: Directory path
+            include_hidden: Whether to include hidden files/directories
+            sort: name, size, mtime or type (extension)
+            descending: Whether to reverse the order
+            limit: Maximum number of entries in the page
+            cursor: next_cursor of the previous page
+            fields: FileInfo/DirectoryInfo fields to fill in (None for all, see parse_fields)
+            
+        Returns:
+            DirectoryContents object holding the page, with next_cursor set if there is more
+            
+        Raises:
+            ValueError: If path is not allowed or invalid, or the sort or cursor is invalid
+            PermissionError: If access is denied
+        """
+        if not self._is_path_allowed(path):
+            raise ValueError(f"Access to path '{path}' is not allowed")
+        
+        dir_path = Path(path).resolve()
+        
+        try:
+            st = dir_path.stat()
+        except OSError:
+            raise ValueError(f"Path '{path}' does not exist")
+        
+        if not dir_path.is_dir():
+            raise ValueError(f"Path '{path}' is not a directory")
+        
+        stat = sort in ("size", "mtime") or _wants(fields, _STAT_FIELDS)
+        fingerprint = (st.st_mtime_ns, st.st_ino)
+        # A scan with stats serves requests that need none as well
+        scan = self.scans.get((str(dir_path), include_hidden, True), fingerprint)
+        if scan is None and not stat:
+            scan = self.scans.get((str(dir_path), include_hidden, False), fingerprint)
+        if scan is None:
+            scan = DirectoryScan(self._scan_directory(dir_path, include_hidden, stat), fingerprint)
+            if time.time_ns() - st.st_mtime_ns >= RACY_FINGERPRINT_NS:
+                self.scans.put((str(dir_path), include_hidden, stat), scan)
+        
+        entries, next_cursor = scan.page(sort, descending, limit, cursor)
+        rules = self._get_rules()
+        files: List[FileInfo] = []
+        directories: List[DirectoryInfo] = []
+        for entry in entries:
+            try:
+                if entry.is_dir:
+                    directories.append(self._scanned_directory_info(entry, fields))
+                else:
+                    files.append(self._scanned_file_info(entry, rules, fields))
+            except OSError:
+                continue
+        
+        # Directory totals as the sizer has them now, for every directory in the scan
+        totals: Dict[str, int] = {}
+        if _wants(fields, _SIZE_FIELDS):
+            total_size = scan.files_size
+            sizes_pending = 0
+            for entry in scan.groups[0]:
+                status, sized = self.sizer.lookup(entry.path, (entry.mtime_ns, entry.inode))
+                total_size += sized.size if sized is not None else 0
+                sizes_pending += status != SIZE_READY
+            totals["sizes_pending"] = sizes_pending
+            if fields is None or {"size", "total_size"} <= fields:
+                totals["total_size"] = total_size
+        
+        return DirectoryContents(
+            path=str(dir_path),
+            files=files,
+            directories=directories,
+            total_files=scan.total_files,
+            total_directories=scan.total_directories,
+            next_cursor=next_cursor,
+            **totals
+        )
+    
+    def _scan_directory(self, dir_path: Path, include_hidden: bool, stat: bool = True) -> List[ScannedEntry]:
+        """
+        Stat every entry of a directory once (files from the file catalog when it covers it).
+        
+        Without stat the entries are not stat'ed: a directory outside the
+        catalog is read in one pass, whether an entry is a directory coming
+        from its directory entry (symlinks aside), and size, times and inode
+        are left 0 for entries the catalog does not have.
+        
+        Args:
+            dir_path: Resolved directory path
+            include_hidden: Whether to include hidden files/directories
+            stat: Whether to stat the entries
+            
+        Returns:
+            List of ScannedEntry, in no particular order
+            
+        Raises:
+            ValueError: If the directory disappeared
+            PermissionError: If access is denied
+        """
+        entries: List[ScannedEntry] = []
+        directory = str(dir_path)
+        
+        if self._from_catalog(dir_path):
+            if not self.catalog.refresh_directory(directory):
+                raise ValueError(f"Path '{directory}' does not exist")
+            for row in self.catalog.list_files(directory):
+                if include_hidden or not row.name.startswith('.'):
+                    entries.append(ScannedEntry(row.name, row.path, False, row.size, row.mtime_ns, row.ctime_ns, row.inode))
+            for subdir in self.catalog.list_directories(directory):
+                name = os.path.basename(subdir)
+                if not include_hidden and name.startswith('.'):
+                    continue
+                if not stat:
+                    entries.append(ScannedEntry(name, subdir, True, 0, 0, 0, 0))
+                    continue
+                try:
+                    st = os.stat(subdir)
+                except OSError:
+                    continue
+                entries.append(ScannedEntry(name, subdir, True, 0, st.st_mtime_ns, st.st_ctime_ns, st.st_ino))
+            return entries
+        
+        try:
+            with os.scandir(directory) as items:
+                for item in items:
+                    if not include_hidden and item.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = item.is_dir()
+                        if not is_dir and not item.is_file():
+                            continue
+                        if not stat:
+                            entries.append(ScannedEntry(item.name, item.path, is_dir, 0, 0, 0, 0))
+                            continue
+                        st = item.stat()
+                    except OSError:
+                        # Skip files/directories we can't access
+                        continue
+                    entries.append(ScannedEntry(
+                        item.name, item.path, is_dir, 0 if is_dir else st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino
+                    ))
+        except PermissionError as e:
+            raise PermissionError(f"Permission denied accessing '{directory}'") from e
+        return entries
+    
+    def get_directory_sizes(self, paths: List[str], wait: float = 0) -> List[DirectorySizeInfo]:
+        """
+        Get recursive sizes of directories, measuring the ones not ready.
+        
+        Args:
+            paths: Directory paths
+            wait: Seconds to wait for measurements to finish before answering
+            
+        Returns:
+            List of DirectorySizeInfo, in the order of paths; a path that is
+            not allowed or not a directory gets status "error"
+        """
+        resolved: List[Tuple[str, Optional[str]]] = []
+        for path in paths:
+            if not self._is_path_allowed(path):
+                resolved.append((path, f"Access to path '{path}' is not allowed"))
+                continue
+            dir_path = Path(path).resolve()
+            resolved.append((str(dir_path), None if dir_path.is_dir() else f"Path '{path}' is not a directory"))
+        
+        def lookup() -> List[DirectorySizeInfo]:
+            sizes: List[DirectorySizeInfo] = []
+            for (path, error), requested in zip(resolved, paths):
+                if error is None:
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        error = f"Path '{requested}' does not exist"
+                if error is not None:
+                    sizes.append(DirectorySizeInfo(path=requested, size_status="error", error=error))
+                    continue
+                status, totals = self.sizer.lookup(path, (stat.st_mtime_ns, stat.st_ino))
+                sizes.append(DirectorySizeInfo(
+                    path=requested,
+                    size_status=status,
+                    file_count=totals.files if totals is not None else None,
+                    total_size=totals.size if totals is not None else None
+                ))
+            return sizes
+        
+        sizes = lookup()
+        if wait > 0 and any(size.size_status != SIZE_READY for size in sizes):
+            self.sizer.wait([path for path, error in resolved if error is None], wait)
+            sizes = lookup()
+        return sizes
+    
+    def get_file_info(self, path: str, fields: Optional[FrozenSet[str]] = None) -> FileInfo:
         """
         Get information about a specific file.
         
         Args:
             path: File path
+            fields: FileInfo fields to fill in (None for all, see parse_fields)
             
         Returns:
             FileInfo object
@@ -199,27 +601,83 @@ class FileBrowserService:
         if not file_path.is_file():
             raise ValueError(f"Path '{path}' is not a file")
         
-        return self._get_file_info(file_path)
+        return self._get_file_info(file_path, fields=fields)
+    
+    def get_file_infos(self, paths: List[str], fields: Optional[FrozenSet[str]] = None) -> Iterator[FileInfoResult]:
+        """
+        Get information about many files at once.
+        
+        The paths are checked against the allowed base paths in one pass,
+        then the files are stat'ed concurrently on the shared batch pool.
+        
+        Args:
+            paths: File paths
+            fields: FileInfo fields to fill in (None for all, see parse_fields)
+            
+        Returns:
+            Iterator of FileInfoResult, one per path, in the order they are
+            ready (paths that are not allowed come first); a path that cannot
+            be read gets an error instead of info
+        """
+        rules = self._get_rules()
+        allowed: List[Tuple[str, Path]] = []
+        for path, resolved in resolve_allowed(paths, self.allowed_paths):
+            if resolved is None:
+                yield FileInfoResult(path=path, error=f"Access to path '{path}' is not allowed")
+            else:
+                allowed.append((path, resolved))
+        
+        def info(item: Tuple[str, Path]) -> FileInfoResult:
+            path, file_path = item
+            if not file_path.is_file():
+                if not file_path.exists():
+                    return FileInfoResult(path=path, error=f"File '{path}' does not exist")
+                return FileInfoResult(path=path, error=f"Path '{path}' is not a file")
+            try:
+                return FileInfoResult(path=path, info=self._get_file_info(file_path, rules, fields))
+            except OSError as e:
+                return FileInfoResult(path=path, error=str(e))
+        
+        yield from self.batches.run(info, allowed)
     
     def search_files(
         self,
         base_path: str,
         pattern: str,
-        max_results: int = 100
+        max_results: int = 100,
+        mode: str = "contains",
+        extensions: Optional[List[str]] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+        fields: Optional[FrozenSet[str]] = None
     ) -> List[FileInfo]:
         """
-        Search for files matching a pattern.
+        Search for files by name, with optional filters, best matches first.
+        
+        Under a catalogued path the search is a query on the file catalog's
+        trigram name index (as of its last refresh); elsewhere the tree is
+        walked in parallel. Results are ranked exact name first, then names
+        starting with the pattern, then shorter names, then newer files.
         
         Args:
             base_path: Base directory to search in
-            pattern: Search pattern (simple wildcard matching)
+            pattern: Text in the name (contains), start of the name (prefix) or glob for the whole name (glob)
             max_results: Maximum number of results to return
+            mode: One of SEARCH_MODES
+            extensions: Extensions to keep (with or without the dot)
+            min_size: Smallest file size in bytes
+            max_size: Largest file size in bytes
+            modified_after: Earliest modification time
+            modified_before: Modification time to stay before
+            fields: FileInfo fields to fill in (None for all, see parse_fields)
             
         Returns:
             List of matching FileInfo objects
             
         Raises:
-            ValueError: If path is not allowed or invalid
+            ValueError: If path is not allowed or invalid, or the mode is unknown
         """
         if not self._is_path_allowed(base_path):
             raise ValueError(f"Access to path '{base_path}' is not allowed")
@@ -229,20 +687,136 @@ class FileBrowserService:
         if not dir_path.exists() or not dir_path.is_dir():
             raise ValueError(f"Invalid base path: {base_path}")
         
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}' (expected one of {', '.join(SEARCH_MODES)})")
+        
+        query = SearchQuery(
+            pattern=pattern,
+            mode=mode,
+            extensions=tuple(
+                ("." + ext.lstrip(".")).lower() for ext in extensions or () if ext.strip(". ")
+            ),
+            min_size=min_size,
+            max_size=max_size,
+            modified_after_ns=int(modified_after.timestamp() * 1e9) if modified_after else None,
+            modified_before_ns=int(modified_before.timestamp() * 1e9) if modified_before else None
+        )
+        rules = self._get_rules()
+        
+        if self.catalog is not None and self.catalog.covers(str(dir_path)):
+            found = self.catalog.search(str(dir_path), query, max_results)
+            if self.sniffer is None or not _wants(fields, _SNIFFED_FIELDS):
+                return [self._catalog_file_info(entry, fields) for entry in found]
+            paths = [Path(entry.path) for entry in found]
+        else:
+            paths = [Path(path) for path in self._walk_search(str(dir_path), query, max_results)]
+        
         results: List[FileInfo] = []
-        pattern_lower = pattern.lower()
+        for item in paths:
+            try:
+                results.append(self._get_file_info(item, rules, fields))
+            except (PermissionError, OSError):
+                continue
+        return results
+    
+    def _walk_search(self, root: str, query: SearchQuery, max_results: int) -> List[str]:
+        """Paths of the best max_results matches under root, found by walking the tree."""
+        def matches() -> Iterator[Tuple[Tuple[int, int, int], str]]:
+            for entry in walker.walk_files(root):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if query.matches(entry.name, stat.st_size, stat.st_mtime_ns):
+                    yield query.rank(entry.name, stat.st_mtime_ns), entry.path
         
-        try:
-            for item in dir_path.rglob('*'):
-                if len(results) >= max_results:
-                    break
-                
-                if item.is_file() and pattern_lower in item.name.lower():
-                    try:
-                        results.append(self._get_file_info(item))
-                    except (PermissionError, OSError):
+        return [path for _rank, path in heapq.nsmallest(max_results, matches())]
+    
+    def find_duplicates(
+        self,
+        base_path: str,
+        min_size: int = 1,
+        include_hidden: bool = False,
+        max_depth: Optional[int] = None
+    ) -> Iterator[Union[DuplicateGroup, DuplicateSummary]]:
+        """
+        Find groups of files with identical content under a directory.
+        
+        The tree is walked in parallel and files are grouped by size; only
+        same-size files have their head and tail blocks hashed, and only
+        files that still collide are hashed in full. Hashes are cached in
+        HASH_CACHE_PATH. Groups are yielded as soon as they are confirmed,
+        followed by a summary.
+        
+        Args:
+            base_path: Directory to search
+            min_size: Smallest file size considered (bytes; empty files are skipped by default)
+            include_hidden: Whether to include hidden files and directories
+            max_depth: Directory levels below base_path to enter (None for no limit)
+            
+        Returns:
+            Iterator of DuplicateGroup, then one DuplicateSummary
+            
+        Raises:
+            ValueError: If path is not allowed or invalid
+        """
+        if not self._is_path_allowed(base_path):
+            raise ValueError(f"Access to path '{base_path}' is not allowed")
+        
+        dir_path = Path(base_path).resolve()
+        
+        if not dir_path.exists() or not dir_path.is_dir():
+            raise ValueError(f"Invalid base path: {base_path}")
+        
+        return self._duplicate_groups(str(dir_path), max(1, min_size), include_hidden, max_depth)
+    
+    def _duplicate_groups(
+        self,
+        root: str,
+        min_size: int,
+        include_hidden: bool,
+        max_depth: Optional[int]
+    ) -> Iterator[Union[DuplicateGroup, DuplicateSummary]]:
+        """Walk, hash and group (the generator behind find_duplicates)."""
+        scanned = [0]
+        
+        def candidates() -> Iterator[Tuple[str, os.stat_result]]:
+            # Hard links share their data, so only the first name of an inode counts
+            inodes: Set[Tuple[int, int]] = set()
+            entries = walker.walk_files(root, max_depth=max_depth, exclude=() if include_hidden else (".*",))
+            for entry in entries:
+                scanned[0] += 1
+                try:
+                    if entry.entry.is_symlink():
                         continue
-        except PermissionError as e:
-            logger.warning(f"Permission denied while searching in {base_path}: {e}")
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if stat.st_size < min_size or (stat.st_dev, stat.st_ino) in inodes:
+                    continue
+                inodes.add((stat.st_dev, stat.st_ino))
+                yield entry.path, stat
         
-        return results
+        groups = duplicate_files = wasted = 0
+        with content_dedup.HashCache(settings.HASH_CACHE_PATH) as cache:
+            for group in content_dedup.find_duplicates(candidates(), cache, settings.HASH_WORKERS, min_size):
+                groups += 1
+                duplicate_files += len(group.paths) - 1
+                wasted += group.wasted
+                if self.catalog is not None:
+                    self.catalog.set_hashes((path, group.digest) for path in group.paths)
+                yield DuplicateGroup(
+                    size=group.size,
+                    digest=group.digest.hex(),
+                    paths=sorted(group.paths),
+                    wasted_bytes=group.wasted
+                )
+        if self.catalog is not None:
+            self.catalog.flush()
+        
+        yield DuplicateSummary(
+            files_scanned=scanned[0],
+            groups=groups,
+            duplicate_files=duplicate_files,
+            wasted_bytes=wasted
+        )
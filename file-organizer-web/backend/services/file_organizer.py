@@ -2,13 +2,58 @@
 File organization service - integrates with existing organizer.py logic.
 """
 
+import os
+import json
+import time
 import shutil
+import logging
+import functools
+import itertools
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple, Optional
 from collections import defaultdict
+from sqlmodel import Session, select
 
+from core.config import settings
+from core.shared import rules as category_rules, dedup as content_dedup, journal, metadata, mover, planner, scanner, sniff, walker
+from models.organization import OrganizationHistory
 from schemas.organize import FileMove, OrganizePreview
+from services import columnar
+from services.catalog import file_catalog
+from services.jobs import JobProgress
+from services.plan_store import OrganizePlan
+from services.watermark import Watermark
+
+logger = logging.getLogger(__name__)
+
+# A directory fingerprint this recent may miss a change made in the same mtime tick
+RACY_FINGERPRINT_NS = 2_000_000_000
+
+
+def _settled(fingerprint: Optional[Tuple[int, int]], taken_ns: int) -> Optional[Tuple[int, int]]:
+    """
+    Racy-timestamp rule: drop a fingerprint taken within RACY_FINGERPRINT_NS
+    of its mtime, since a change in the same mtime tick would go unnoticed.
+    
+    Args:
+        fingerprint: Directory fingerprint (mtime_ns, inode), or None
+        taken_ns: Wall-clock time (ns) at or before which it was taken
+        
+    Returns:
+        The fingerprint, or None so that whoever compares it revalidates
+    """
+    if fingerprint is not None and taken_ns - fingerprint[0] < RACY_FINGERPRINT_NS:
+        return None
+    return fingerprint
+
+
+def _settled_all(
+    fingerprints: Dict[str, Optional[Tuple[int, int]]],
+    taken_ns: int
+) -> Dict[str, Optional[Tuple[int, int]]]:
+    """_settled for every directory of a plan."""
+    return {directory: _settled(fingerprint, taken_ns) for directory, fingerprint in fingerprints.items()}
 
 
 class FileOrganizerService:
@@ -18,22 +63,31 @@ class FileOrganizerService:
     """
     
     # Default file type categories
-    DEFAULT_CATEGORIES = {
-        "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".webp", ".ico", ".tiff"],
-        "Documents": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".xls", ".xlsx", ".ppt", ".pptx"],
-        "Videos": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v"],
-        "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".wma", ".m4a"],
-        "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"],
-        "Code": [".py", ".js", ".java", ".cpp", ".c", ".h", ".cs", ".rb", ".go", ".rs", ".php"],
-        "Data": [".json", ".xml", ".csv", ".sql", ".db", ".sqlite"],
-        "Executables": [".exe", ".msi", ".dmg", ".pkg", ".deb", ".rpm", ".app"],
-        "Fonts": [".ttf", ".otf", ".woff", ".woff2"],
-        "Ebooks": [".epub", ".mobi", ".azw", ".azw3"],
-    }
-    
-    def __init__(self):
-        """Initialize the organizer service."""
-        self.categories = self.DEFAULT_CATEGORIES
+    DEFAULT_CATEGORIES = category_rules.DEFAULT_CATEGORIES
+    
+    def __init__(self, rules_file: Optional[str] = None, move_workers: Optional[int] = None):
+        """
+        Initialize the organizer service.
+        
+        Args:
+            rules_file: Category rules JSON (defaults to CATEGORY_RULES_FILE)
+            move_workers: Threads for cross-device copies (defaults to MOVE_WORKERS)
+        """
+        self.rules_file = rules_file if rules_file is not None else settings.CATEGORY_RULES_FILE
+        self.move_workers = move_workers or settings.MOVE_WORKERS
+        self._warned_rules: Optional[category_rules.CategoryRules] = None
+        self.sniffer = sniff.ContentSniffer() if settings.CONTENT_SNIFFING else None
+        self.catalog = file_catalog
+    
+    @property
+    def rules(self) -> category_rules.CategoryRules:
+        """Compiled category rules, reloaded only when the rules file changes."""
+        compiled = category_rules.load_rules(self.rules_file)
+        if compiled.ambiguous and compiled is not self._warned_rules:
+            for line in compiled.describe_conflicts():
+                logger.warning(f"Category rules: {line}")
+            self._warned_rules = compiled
+        return compiled
     
     def _get_category(self, file_ext: str) -> str:
         """
@@ -45,106 +99,552 @@ class FileOrganizerService:
         Returns:
             Category name
         """
-        file_ext = file_ext.lower()
-        for category, extensions in self.categories.items():
-            if file_ext in extensions:
-                return category
-        return "Others"
+        return self.rules.categorize(file_ext)
     
-    def _get_safe_destination(self, dest_path: Path) -> Path:
+    def _resolve_source(self, source_dir: str) -> Path:
         """
-        Generate a safe destination path, handling duplicates.
+        Resolve and validate the directory to organize.
         
         Args:
-            dest_path: Desired destination path
+            source_dir: Source directory path
             
         Returns:
-            Safe destination path (may have number suffix if duplicate)
+            Resolved source path
+            
+        Raises:
+            ValueError: If source directory is invalid
         """
-        if not dest_path.exists():
-            return dest_path
+        source_path = Path(source_dir).resolve()
         
-        # File exists, add number suffix
-        stem = dest_path.stem
-        suffix = dest_path.suffix
-        parent = dest_path.parent
-        counter = 1
+        if not source_path.is_dir():
+            raise ValueError(f"Invalid source directory: {source_dir}")
         
-        while True:
-            new_name = f"{stem}_{counter}{suffix}"
-            new_path = parent / new_name
-            if not new_path.exists():
-                return new_path
-            counter += 1
+        return source_path
     
-    def preview_organize_by_type(
+    def _scan(
+        self,
+        source_path: Path,
+        operation_type: str,
+        date_format: str = "%Y/%m",
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None
+    ) -> Iterator[scanner.ScanEntry]:
+        """
+        Scan stage: top-level files, or the whole tree walked in parallel.
+        
+        Recursive scans skip the top-level folders this operation type
+        creates, so files organized earlier are not picked up again.
+        
+        Args:
+            source_path: Resolved source directory
+            operation_type: "by_type", "by_date" or "by_capture_date"
+            date_format: Date format for folder names (by_date)
+            recursive: Whether to include subdirectories
+            max_depth: Directory levels below the source to enter (None for no limit)
+            exclude: Globs of file and directory names or relative paths to skip
+            
+        Returns:
+            Iterator of scanned entries
+        """
+        if operation_type == "by_type":
+            skip_dir = walker.category_folders(self.rules).__contains__
+        else:
+            skip_dir = functools.partial(walker.is_date_folder, date_format=date_format)
+        
+        return walker.scan_tree(
+            str(source_path),
+            recursive=recursive,
+            max_depth=max_depth,
+            exclude=exclude or (),
+            skip_dir=skip_dir
+        )
+    
+    def _classify(
+        self,
+        entries: Iterator[scanner.ScanEntry],
+        operation_type: str,
+        create_others: bool = True,
+        date_format: str = "%Y/%m"
+    ) -> Iterator[Tuple[scanner.ScanEntry, str]]:
+        """
+        Classify stage for the given operation type.
+        
+        Args:
+            entries: Scanned entries
+            operation_type: "by_type", "by_date" or "by_capture_date"
+            create_others: Whether to keep uncategorized files (by_type)
+            date_format: Date format for folder names (by_date)
+            
+        Returns:
+            Iterator of (entry, folder) pairs
+        """
+        if operation_type == "by_type":
+            return scanner.classify_by_type(entries, self.rules, create_others, self.sniffer)
+        if operation_type == "by_capture_date":
+            return self._classify_by_capture_date(entries, date_format)
+        return scanner.classify_by_date(entries, date_format)
+    
+    def _classify_by_capture_date(
+        self,
+        entries: Iterator[scanner.ScanEntry],
+        date_format: str
+    ) -> Iterator[Tuple[scanner.ScanEntry, str]]:
+        """
+        Classify by the capture date in photo metadata, falling back to mtime.
+        
+        Args:
+            entries: Scanned entries
+            date_format: Date format for folder names
+            
+        Yields:
+            (entry, date folder) pairs
+        """
+        with metadata.MetadataCache(settings.METADATA_CACHE_PATH) as cache:
+            yield from metadata.classify_by_capture_date(entries, date_format, cache, settings.METADATA_WORKERS)
+    
+    def _plan(
+        self,
+        classified: Iterator[Tuple[scanner.ScanEntry, str]],
+        source_path: Path,
+        destinations: Optional[planner.DestinationPlanner] = None
+    ) -> Iterator[Tuple[scanner.ScanEntry, str, str]]:
+        """
+        Plan stage: reserve a collision-free destination for each classified entry.
+        
+        Args:
+            classified: (entry, folder) pairs from a classify stage
+            source_path: Resolved source directory
+            destinations: Planner to reserve names with (a new one if omitted)
+            
+        Yields:
+            (entry, folder, destination path) tuples
+        """
+        destinations = destinations or planner.DestinationPlanner()
+        for entry, folder in classified:
+            target_dir = str(source_path / folder)
+            yield entry, folder, destinations.reserve(target_dir, entry.name)
+    
+    def journal_for(self, operation_id: int) -> str:
+        """
+        Get the journal path of an operation.
+        
+        Args:
+            operation_id: OrganizationHistory ID
+            
+        Returns:
+            Path of the operation's move journal (the directory is created)
+        """
+        os.makedirs(settings.JOURNAL_DIR, exist_ok=True)
+        return os.path.join(settings.JOURNAL_DIR, f"operation_{operation_id}.jsonl")
+    
+    def _execute(
+        self,
+        moves: Iterator[Tuple[str, str, str]],
+        source_path: Optional[Path] = None,
+        journal_path: Optional[str] = None,
+        progress: Optional[JobProgress] = None,
+        placed: Optional[Dict[str, str]] = None
+    ) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
+        """
+        Move stage: apply each planned move.
+        
+        Same-device moves are renames; cross-device moves are copied by the
+        executor's thread pool. Results come back in plan order.
+        
+        With a journal path, every move is written (group-committed) to the
+        journal before it is applied and the move log is not kept in memory.
+        Moves are recorded in the file catalog as they complete.
+        
+        Args:
+            moves: (source path, folder, destination path) tuples
+            source_path: Directory being organized (recorded in the journal)
+            journal_path: Move journal to write ahead to
+            progress: Background job to report moves to (and to stop on cancel)
+            placed: Collects source -> destination of every move
+            
+        Returns:
+            Tuple of (stats dict, move log list; empty when journaled)
+            
+        Raises:
+            OSError: If a file could not be moved
+            JobCancelled: If the background job was cancelled
+        """
+        stats = defaultdict(int)
+        move_log: List[Tuple[str, str]] = []
+        dirs = scanner.DirectoryMaker()
+        
+        def prepared():
+            for source, folder, dest in moves:
+                dirs.ensure(os.path.dirname(dest))
+                yield source, dest, folder
+        
+        if journal_path is None:
+            for result in mover.MoveExecutor(self.move_workers).run(prepared()):
+                if not result.ok:
+                    raise result.error
+                move_log.append((result.source, result.destination))
+                stats[result.tag] += 1
+                if self.catalog is not None:
+                    self.catalog.record_move(result.source, result.destination)
+                if placed is not None:
+                    placed[result.source] = result.destination
+                if progress is not None:
+                    progress.moved(result.destination)
+                    progress.check_cancelled()
+            self._flush_catalog()
+            return dict(stats), move_log
+        
+        # Leaving the block on an error keeps the journal marked incomplete
+        with journal.MoveJournal(journal_path) as move_journal:
+            move_journal.begin(source=str(source_path))
+            for result in mover.MoveExecutor(self.move_workers).run(move_journal.log_ahead(prepared())):
+                if not result.ok:
+                    raise result.error
+                stats[result.tag] += 1
+                if self.catalog is not None:
+                    self.catalog.record_move(result.source, result.destination)
+                if placed is not None:
+                    placed[result.source] = result.destination
+                if progress is not None:
+                    progress.moved(result.destination)
+                    progress.check_cancelled()
+        
+        self._flush_catalog()
+        return dict(stats), move_log
+    
+    def _flush_catalog(self):
+        """Commit the moves recorded in the file catalog."""
+        if self.catalog is not None:
+            self.catalog.flush()
+    
+    def _organize(
         self,
         source_dir: str,
-        create_others: bool = True
-    ) -> OrganizePreview:
+        operation_type: str,
+        create_others: bool = True,
+        date_format: str = "%Y/%m",
+        journal_path: Optional[str] = None,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
         """
-        Preview organization by file type without moving files.
+        Run the full scan -> classify -> plan -> move pipeline.
         
         Args:
             source_dir: Source directory path
-            create_others: Whether to create "Others" category
+            operation_type: "by_type", "by_date" or "by_capture_date"
+            create_others: Whether to create "Others" category (by_type)
+            date_format: Date format for folder names (by_date)
+            journal_path: Move journal to write ahead to
+            recursive: Whether to include subdirectories
+            max_depth: Directory levels below the source to enter (None for no limit)
+            exclude: Globs of file and directory names or relative paths to skip
             
         Returns:
-            OrganizePreview with planned moves
+            Tuple of (stats dict, move log list)
+        """
+        source_path = self._resolve_source(source_dir)
+        entries = self._scan(source_path, operation_type, date_format, recursive, max_depth, exclude)
+        classified = self._classify(entries, operation_type, create_others, date_format)
+        planned = self._plan(classified, source_path)
+        moves = ((entry.path, folder, dest) for entry, folder, dest in planned)
+        return self._execute(moves, source_path, journal_path)
+    
+    def _dedupe(
+        self,
+        classified: Iterator[Tuple[scanner.ScanEntry, str]],
+        source_path: Path
+    ) -> Tuple[List[Tuple[scanner.ScanEntry, str]], Dict[str, str]]:
+        """
+        Dedup stage: find files identical to one already in a target folder or
+        to an earlier file of this run.
+        
+        Candidates are narrowed by size, then by a hash of the head and tail
+        blocks, then by a full hash; hashes are cached in HASH_CACHE_PATH.
+        
+        Args:
+            classified: (entry, folder) pairs from a classify stage
+            source_path: Resolved source directory
+            
+        Returns:
+            Tuple of ((entry, folder) list, {duplicate path: original path})
+        """
+        with content_dedup.HashCache(settings.HASH_CACHE_PATH) as cache:
+            return content_dedup.match_duplicates(
+                classified,
+                lambda folder: str(source_path / folder),
+                cache,
+                settings.HASH_WORKERS
+            )
+    
+    def _relink(self, plan: OrganizePlan, placed: Dict[str, str]) -> int:
+        """
+        Turn the moved duplicates of a plan into hard links to their originals.
+        
+        Args:
+            plan: Executed plan with dedup "link"
+            placed: Source -> destination of the plan's moves
+            
+        Returns:
+            Number of duplicates linked
+        """
+        linked = 0
+        for name, original in plan.duplicates.items():
+            dest = placed.get(os.path.join(plan.source_directory, name))
+            if dest is not None and content_dedup.relink(dest, placed.get(original, original)):
+                linked += 1
+        return linked
+    
+    def create_plan(
+        self,
+        source_dir: str,
+        operation_type: str,
+        create_others: bool = True,
+        date_format: str = "%Y/%m",
+        progress: Optional[JobProgress] = None,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None,
+        dedup: Optional[str] = None
+    ) -> OrganizePlan:
+        """
+        Scan and plan an organization without moving files.
+        
+        Args:
+            source_dir: Source directory path
+            operation_type: "by_type", "by_date" or "by_capture_date"
+            create_others: Whether to create "Others" category (by_type)
+            date_format: Date format for folder names (by_date)
+            progress: Background job to report scanned files to
+            recursive: Whether to include subdirectories
+            max_depth: Directory levels below the source to enter (None for no limit)
+            exclude: Globs of file and directory names or relative paths to skip
+            dedup: "skip", "link" or "report" duplicates of files already organized
+            
+        Returns:
+            OrganizePlan that can be previewed and later executed
             
         Raises:
             ValueError: If source directory is invalid
         """
-        source_path = Path(source_dir).resolve()
+        source_path = self._resolve_source(source_dir)
+        # Every fingerprint of the plan is taken after this
+        started_ns = time.time_ns()
+        plan = OrganizePlan(
+            str(source_path),
+            operation_type,
+            create_others=create_others,
+            date_format=date_format,
+            source_fingerprint=_settled(planner.directory_fingerprint(str(source_path)), started_ns),
+            recursive=recursive,
+            max_depth=max_depth,
+            exclude=exclude,
+            dedup=dedup
+        )
+        # Date folders depend on the file's mtime (or on metadata that changes it)
+        by_date = operation_type != "by_type"
+        destinations = planner.DestinationPlanner()
+        prefix = len(os.path.join(str(source_path), ""))
         
-        if not source_path.exists() or not source_path.is_dir():
-            raise ValueError(f"Invalid source directory: {source_dir}")
+        entries = self._scan(source_path, operation_type, date_format, recursive, max_depth, exclude)
+        if progress is not None:
+            entries = progress.track_scan(entries)
+        if self._columnar(operation_type, dedup):
+            self._plan_columnar(plan, columnar.ColumnarScan.collect(entries, prefix), source_path, destinations)
+            plan.target_fingerprints = _settled_all(destinations.fingerprints(), started_ns)
+            return plan
         
-        stats = defaultdict(int)
-        moves: List[FileMove] = []
-        categories_set = set()
-        files = [f for f in source_path.iterdir() if f.is_file()]
+        classified = self._classify(entries, operation_type, create_others, date_format)
+        if dedup:
+            classified, duplicates = self._dedupe(classified, source_path)
+            plan.duplicates = {path[prefix:]: original for path, original in duplicates.items()}
+            if dedup == "skip":
+                classified = [(entry, folder) for entry, folder in classified if entry.path not in duplicates]
+        for entry, folder, dest in self._plan(classified, source_path, destinations):
+            # Entries are keyed by their path relative to the source
+            plan.add(entry.path[prefix:], folder, dest, entry.inode, entry.mtime_ns if by_date else None)
         
-        for file_path in files:
-            file_ext = file_path.suffix
-            category = self._get_category(file_ext)
-            
-            # Skip if category is "Others" and create_others is False
-            if category == "Others" and not create_others:
+        plan.target_fingerprints = _settled_all(destinations.fingerprints(), started_ns)
+        return plan
+    
+    def _columnar(self, operation_type: str, dedup: Optional[str] = None) -> bool:
+        """Whether a plan can be classified from a columnar scan (per-file stages need entries)."""
+        if not settings.COLUMNAR_SCAN or dedup:
+            return False
+        return operation_type == "by_date" or (operation_type == "by_type" and self.sniffer is None)
+    
+    def _plan_columnar(
+        self,
+        plan: OrganizePlan,
+        scan: columnar.ColumnarScan,
+        source_path: Path,
+        destinations: planner.DestinationPlanner
+    ):
+        """
+        Classify a columnar scan in bulk and reserve destinations into a plan.
+        
+        Args:
+            plan: Plan to fill (its operation type, create_others and date_format apply)
+            scan: Columnar scan of the source
+            source_path: Resolved source directory
+            destinations: Planner to reserve names with
+        """
+        if plan.operation_type == "by_type":
+            folders, folder_index = scan.type_folders(self.rules, plan.create_others)
+            mtimes = None
+        else:
+            folders, folder_index = scan.date_folders(plan.date_format)
+            mtimes = scan.mtimes_ns.tolist()
+        
+        target_dirs = [str(source_path / folder) for folder in folders]
+        inodes = scan.inodes.tolist()
+        entries = []
+        for index, folder in enumerate(folder_index.tolist()):
+            if folder < 0:
                 continue
+            name = scan.names[index]
+            dest = destinations.reserve(target_dirs[folder], columnar.basename(name))
+            entries.append((name, folders[folder], dest, inodes[index], mtimes[index] if mtimes else None))
+        plan.extend(entries, columnar.folder_counts(folders, folder_index))
+    
+    def _move_fields(self, plan: OrganizePlan, start: int = 0, limit: Optional[int] = None) -> Iterator[dict]:
+        """
+        Planned moves as plain dicts with the fields of FileMove.
+        
+        Args:
+            plan: Plan from create_plan
+            start: Index of the first move
+            limit: Most moves to return (all remaining if None)
             
-            # Plan the move
-            category_dir = source_path / category
-            dest_path = self._get_safe_destination(category_dir / file_path.name)
+        Yields:
+            FileMove fields of each move
+        """
+        stop = None if limit is None else start + limit
+        for name, folder, dest, _inode, _mtime_ns in itertools.islice(plan.entries, start, stop):
+            yield {
+                "source": os.path.join(plan.source_directory, name),
+                "destination": dest,
+                "category": folder,
+                "file_name": os.path.basename(name),
+                "duplicate_of": plan.duplicates.get(name)
+            }
+    
+    def plan_moves(self, plan: OrganizePlan, start: int = 0, limit: Optional[int] = None) -> Tuple[List[FileMove], Optional[int]]:
+        """
+        A page of the moves of a plan.
+        
+        Args:
+            plan: Plan from create_plan
+            start: Index of the first move
+            limit: Most moves to return (all remaining if None)
+            
+        Returns:
+            Tuple of (moves, index of the next page or None after the last one)
+        """
+        # Response models are only built for the moves returned
+        moves = [FileMove(**fields) for fields in self._move_fields(plan, start, limit)]
+        end = start + len(moves)
+        return moves, end if end < len(plan.entries) else None
+    
+    def stream_moves(self, plan: OrganizePlan) -> Iterator[str]:
+        """
+        All moves of a plan as NDJSON lines, serialized without response models.
+        
+        Args:
+            plan: Plan from create_plan
             
-            moves.append(FileMove(
-                source=str(file_path),
-                destination=str(dest_path),
-                category=category,
-                file_name=file_path.name
-            ))
+        Yields:
+            One JSON document per move, newline terminated
+        """
+        for fields in self._move_fields(plan):
+            yield json.dumps(fields) + "\n"
+    
+    def build_preview(self, plan: OrganizePlan, limit: Optional[int] = None) -> OrganizePreview:
+        """
+        Build the API preview of a plan.
+        
+        Args:
+            plan: Plan from create_plan
+            limit: Most moves to include (all if None); stats always cover the whole plan
             
-            stats[category] += 1
-            categories_set.add(category)
+        Returns:
+            OrganizePreview with the first moves and a cursor to the rest
+        """
+        moves, next_start = self.plan_moves(plan, 0, limit)
         
         return OrganizePreview(
-            total_files=len(moves),
+            total_files=len(plan.entries),
             moves=moves,
-            stats=dict(stats),
-            categories_to_create=sorted(list(categories_set))
+            stats=dict(plan.stats),
+            categories_to_create=sorted(plan.stats),
+            plan_id=plan.plan_id,
+            fingerprint=plan.fingerprint,
+            duplicates=len(plan.duplicates),
+            next_cursor=str(next_start) if next_start is not None else None
         )
     
-    def organize_by_type(
+    def _revalidate(self, plan: OrganizePlan) -> Iterator[Tuple[str, str]]:
+        """
+        Rescan a changed source directory against a plan.
+        
+        Entries whose inode (and, for date operations, mtime) match the plan keep their
+        planned folder without being classified again; new or modified files
+        are classified; files that disappeared are dropped.
+        
+        Args:
+            plan: Plan whose source directory changed
+            
+        Yields:
+            (path relative to the source, folder) pairs
+        """
+        by_date = plan.operation_type != "by_type"
+        planned = {name: (folder, inode, mtime_ns) for name, folder, _dest, inode, mtime_ns in plan.entries}
+        changed: List[scanner.ScanEntry] = []
+        prefix = len(os.path.join(plan.source_directory, ""))
+        
+        entries = self._scan(
+            Path(plan.source_directory),
+            plan.operation_type,
+            plan.date_format,
+            plan.recursive,
+            plan.max_depth,
+            plan.exclude
+        )
+        for entry in entries:
+            name = entry.path[prefix:]
+            if plan.dedup == "skip" and name in plan.duplicates:
+                continue
+            known = planned.get(name)
+            if known and known[1] == entry.inode and (not by_date or known[2] == entry.mtime_ns):
+                yield name, known[0]
+            else:
+                changed.append(entry)
+        
+        classified = self._classify(iter(changed), plan.operation_type, plan.create_others, plan.date_format)
+        for entry, folder in classified:
+            yield entry.path[prefix:], folder
+    
+    def execute_plan(
         self,
-        source_dir: str,
-        create_others: bool = True
+        plan: OrganizePlan,
+        journal_path: Optional[str] = None,
+        progress: Optional[JobProgress] = None
     ) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
         """
-        Organize files by their file type.
+        Apply a previewed plan.
+        
+        If neither the source nor any target directory changed since the plan
+        was made, the stored moves are applied as-is. Otherwise only the
+        changed entries are revalidated and destinations are re-reserved.
+        With dedup "link", moved duplicates then become hard links to their
+        originals.
         
         Args:
-            source_dir: Source directory path
-            create_others: Whether to create "Others" category
+            plan: Plan from create_plan
+            journal_path: Move journal to write ahead to
+            progress: Background job to report moves to (and to stop on cancel)
             
         Returns:
             Tuple of (stats dict, move log list)
@@ -152,49 +652,218 @@ class FileOrganizerService:
         Raises:
             ValueError: If source directory is invalid
         """
-        source_path = Path(source_dir).resolve()
+        source_path = self._resolve_source(plan.source_directory)
+        # The fingerprint only covers the top level, so recursive plans always
+        # revalidate (classification is still reused for unchanged files)
+        source_changed = plan.recursive or planner.directory_fingerprint(str(source_path)) != plan.source_fingerprint
+        targets_changed = any(
+            planner.directory_fingerprint(directory) != fingerprint
+            for directory, fingerprint in plan.target_fingerprints.items()
+        )
         
-        if not source_path.exists() or not source_path.is_dir():
-            raise ValueError(f"Invalid source directory: {source_dir}")
+        placed: Optional[Dict[str, str]] = {} if plan.dedup == "link" and plan.duplicates else None
         
-        stats = defaultdict(int)
-        move_log: List[Tuple[str, str]] = []
-        files = [f for f in source_path.iterdir() if f.is_file()]
+        if not source_changed and not targets_changed:
+            moves = (
+                (os.path.join(plan.source_directory, name), folder, dest)
+                for name, folder, dest, _inode, _mtime_ns in plan.entries
+            )
+            return self._finish_plan(plan, self._execute(moves, source_path, journal_path, progress, placed), placed)
         
-        for file_path in files:
-            file_ext = file_path.suffix
-            category = self._get_category(file_ext)
+        logger.info(f"Plan {plan.plan_id}: directory changed since preview, revalidating")
+        if source_changed:
+            classified = self._revalidate(plan)
+        else:
+            classified = ((name, folder) for name, folder, _dest, _inode, _mtime_ns in plan.entries)
+        
+        destinations = planner.DestinationPlanner()
+        moves = (
+            (
+                os.path.join(plan.source_directory, name),
+                folder,
+                destinations.reserve(str(source_path / folder), os.path.basename(name))
+            )
+            for name, folder in classified
+        )
+        return self._finish_plan(plan, self._execute(moves, source_path, journal_path, progress, placed), placed)
+    
+    def _finish_plan(
+        self,
+        plan: OrganizePlan,
+        result: Tuple[Dict[str, int], List[Tuple[str, str]]],
+        placed: Optional[Dict[str, str]]
+    ) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
+        """Relink the duplicates of an executed plan (dedup "link") and pass its result on."""
+        if placed:
+            linked = self._relink(plan, placed)
+            logger.info(f"Plan {plan.plan_id}: {linked} of {len(plan.duplicates)} duplicates hard-linked")
+        return result
+    
+    def _unseen(
+        self,
+        entries: Iterator[scanner.ScanEntry],
+        seen: Set[int],
+        present: Set[int],
+        considered: Set[int]
+    ) -> Iterator[scanner.ScanEntry]:
+        """
+        Filter stage: drop files a previous run already looked at.
+        
+        Args:
+            entries: Scanned entries
+            seen: Watermark keys of files left in place by earlier runs
+            present: Collects the keys of seen files that are still there
+            considered: Collects the keys of the files passed on
             
-            # Skip if category is "Others" and create_others is False
-            if category == "Others" and not create_others:
+        Yields:
+            Entries that are new or changed since the watermark
+        """
+        for entry in entries:
+            try:
+                key = Watermark.key(entry.inode, entry.mtime_ns)
+            except OSError:
+                continue
+            if key in seen:
+                present.add(key)
                 continue
+            considered.add(key)
+            yield entry
+    
+    def _settle_watermark(self, fingerprint: Optional[Tuple[int, int]], known: Set[int]) -> Watermark:
+        """
+        Build the watermark for the state a run leaves behind.
+        
+        Args:
+            fingerprint: Directory fingerprint taken before the listing the keys come from
+            known: Keys of files that were processed or seen before
             
-            # Create category folder
-            category_dir = source_path / category
-            category_dir.mkdir(exist_ok=True)
+        Returns:
+            Watermark; without a fingerprint if the next run must scan
+        """
+        return Watermark(_settled(fingerprint, time.time_ns()), known)
+    
+    def organize_incremental(
+        self,
+        source_dir: str,
+        operation_type: str,
+        watermark: Optional[dict],
+        create_others: bool = True,
+        date_format: str = "%Y/%m",
+        on_start: Optional[Callable[[], Optional[str]]] = None
+    ) -> Tuple[Optional[Dict[str, int]], dict]:
+        """
+        Organize only what changed since the last run of a scheduled job.
+        
+        If the directory fingerprint still matches the watermark the directory
+        is not scanned at all. Otherwise only files missing from the
+        watermark's seen set are classified and moved.
+        
+        Args:
+            source_dir: Source directory path
+            operation_type: "by_type", "by_date" or "by_capture_date"
+            watermark: Watermark stored by the previous run (None for a first run)
+            create_others: Whether to create "Others" category (by_type)
+            date_format: Date format for folder names (by_date)
+            on_start: Called once before the first move; returns the journal path
             
-            # Get safe destination path
-            dest_path = self._get_safe_destination(category_dir / file_path.name)
+        Returns:
+            Tuple of (stats dict, or None if there was nothing to do; new watermark)
             
-            # Move the file
-            shutil.move(str(file_path), str(dest_path))
-            move_log.append((str(file_path), str(dest_path)))
+        Raises:
+            ValueError: If source directory is invalid
+        """
+        source_path = self._resolve_source(source_dir)
+        mark = Watermark.from_dict(watermark)
+        fingerprint = planner.directory_fingerprint(str(source_path))
+        
+        if mark.covers(fingerprint):
+            return None, mark.to_dict()
+        
+        present: Set[int] = set()
+        considered: Set[int] = set()
+        entries = self._unseen(scanner.scan_files(str(source_path)), mark.seen, present, considered)
+        first = next(entries, None)
+        
+        if first is None:
+            # The scan listed everything after the fingerprint was taken
+            return None, self._settle_watermark(fingerprint, present).to_dict()
+        
+        journal_path = on_start() if on_start else None
+        classified = self._classify(itertools.chain([first], entries), operation_type, create_others, date_format)
+        planned = self._plan(classified, source_path)
+        moves = ((entry.path, folder, dest) for entry, folder, dest in planned)
+        stats, _ = self._execute(moves, source_path, journal_path)
+        
+        # Keep the keys of files still in place; anything unknown forces a scan next time
+        fingerprint = planner.directory_fingerprint(str(source_path))
+        known = mark.seen | considered
+        remaining: Set[int] = set()
+        for entry in scanner.scan_files(str(source_path)):
+            try:
+                key = Watermark.key(entry.inode, entry.mtime_ns)
+            except OSError:
+                continue
+            if key not in known:
+                fingerprint = None
+            remaining.add(key)
+        
+        return stats, self._settle_watermark(fingerprint, remaining & known).to_dict()
+    
+    def organize_paths(
+        self,
+        source_dir: str,
+        paths: Iterable[str],
+        operation_type: str,
+        create_others: bool = True,
+        date_format: str = "%Y/%m",
+        on_start: Optional[Callable[[], Optional[str]]] = None
+    ) -> Optional[Dict[str, int]]:
+        """
+        Organize specific files of a directory, e.g. the ones a watcher reported.
+        
+        Paths that are gone, are not regular files or are not directly inside
+        source_dir are ignored.
+        
+        Args:
+            source_dir: Source directory path
+            paths: Files to organize
+            operation_type: "by_type", "by_date" or "by_capture_date"
+            create_others: Whether to create "Others" category (by_type)
+            date_format: Date format for folder names (by_date)
+            on_start: Called once before the first move; returns the journal path
             
-            stats[category] += 1
+        Returns:
+            Stats dict, or None if there was nothing to do
+            
+        Raises:
+            ValueError: If source directory is invalid
+        """
+        source_path = self._resolve_source(source_dir)
+        entries = (
+            entry for entry in scanner.scan_paths(paths)
+            if os.path.realpath(os.path.dirname(entry.path)) == str(source_path)
+        )
+        first = next(entries, None)
+        if first is None:
+            return None
         
-        return dict(stats), move_log
+        journal_path = on_start() if on_start else None
+        classified = self._classify(itertools.chain([first], entries), operation_type, create_others, date_format)
+        moves = ((entry.path, folder, dest) for entry, folder, dest in self._plan(classified, source_path))
+        stats, _ = self._execute(moves, source_path, journal_path)
+        return stats
     
-    def preview_organize_by_date(
+    def preview_organize_by_type(
         self,
         source_dir: str,
-        date_format: str = "%Y/%m"
+        create_others: bool = True
     ) -> OrganizePreview:
         """
-        Preview organization by modification date without moving files.
+        Preview organization by file type without moving files.
         
         Args:
             source_dir: Source directory path
-            date_format: Date format for folder names
+            create_others: Whether to create "Others" category
             
         Returns:
             OrganizePreview with planned moves
@@ -202,46 +871,76 @@ class FileOrganizerService:
         Raises:
             ValueError: If source directory is invalid
         """
-        source_path = Path(source_dir).resolve()
-        
-        if not source_path.exists() or not source_path.is_dir():
-            raise ValueError(f"Invalid source directory: {source_dir}")
-        
-        stats = defaultdict(int)
-        moves: List[FileMove] = []
-        date_folders_set = set()
-        files = [f for f in source_path.iterdir() if f.is_file()]
+        return self.build_preview(self.create_plan(source_dir, "by_type", create_others=create_others))
+    
+    def organize_by_type(
+        self,
+        source_dir: str,
+        create_others: bool = True,
+        journal_path: Optional[str] = None,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None
+    ) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
+        """
+        Organize files by their file type.
         
-        for file_path in files:
-            # Get file modification time
-            mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-            date_folder = mod_time.strftime(date_format)
-            
-            # Plan the move
-            date_dir = source_path / date_folder
-            dest_path = self._get_safe_destination(date_dir / file_path.name)
+        Args:
+            source_dir: Source directory path
+            create_others: Whether to create "Others" category
+            journal_path: Move journal to write ahead to (no move log is kept)
+            recursive: Whether to include subdirectories
+            max_depth: Directory levels below the source to enter (None for no limit)
+            exclude: Globs of file and directory names or relative paths to skip
             
-            moves.append(FileMove(
-                source=str(file_path),
-                destination=str(dest_path),
-                category=date_folder,
-                file_name=file_path.name
-            ))
+        Returns:
+            Tuple of (stats dict, move log list)
             
-            stats[date_folder] += 1
-            date_folders_set.add(date_folder)
-        
-        return OrganizePreview(
-            total_files=len(moves),
-            moves=moves,
-            stats=dict(stats),
-            categories_to_create=sorted(list(date_folders_set))
+        Raises:
+            ValueError: If source directory is invalid
+        """
+        return self._organize(
+            source_dir,
+            "by_type",
+            create_others=create_others,
+            journal_path=journal_path,
+            recursive=recursive,
+            max_depth=max_depth,
+            exclude=exclude
         )
     
+    def preview_organize_by_date(
+        self,
+        source_dir: str,
+        date_format: str = "%Y/%m",
+        capture_date: bool = False
+    ) -> OrganizePreview:
+        """
+        Preview organization by modification date without moving files.
+        
+        Args:
+            source_dir: Source directory path
+            date_format: Date format for folder names
+            capture_date: Date photos by the capture date in their metadata
+            
+        Returns:
+            OrganizePreview with planned moves
+            
+        Raises:
+            ValueError: If source directory is invalid
+        """
+        operation_type = "by_capture_date" if capture_date else "by_date"
+        return self.build_preview(self.create_plan(source_dir, operation_type, date_format=date_format))
+    
     def organize_by_date(
         self,
         source_dir: str,
-        date_format: str = "%Y/%m"
+        date_format: str = "%Y/%m",
+        journal_path: Optional[str] = None,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None,
+        capture_date: bool = False
     ) -> Tuple[Dict[str, int], List[Tuple[str, str]]]:
         """
         Organize files by their modification date.
@@ -249,6 +948,11 @@ class FileOrganizerService:
         Args:
             source_dir: Source directory path
             date_format: Date format for folder names
+            journal_path: Move journal to write ahead to (no move log is kept)
+            recursive: Whether to include subdirectories
+            max_depth: Directory levels below the source to enter (None for no limit)
+            exclude: Globs of file and directory names or relative paths to skip
+            capture_date: Date photos by the capture date in their metadata
             
         Returns:
             Tuple of (stats dict, move log list)
@@ -256,55 +960,36 @@ class FileOrganizerService:
         Raises:
             ValueError: If source directory is invalid
         """
-        source_path = Path(source_dir).resolve()
-        
-        if not source_path.exists() or not source_path.is_dir():
-            raise ValueError(f"Invalid source directory: {source_dir}")
-        
-        stats = defaultdict(int)
-        move_log: List[Tuple[str, str]] = []
-        files = [f for f in source_path.iterdir() if f.is_file()]
-        
-        for file_path in files:
-            # Get file modification time
-            mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-            date_folder = mod_time.strftime(date_format)
-            
-            # Create date folder structure
-            date_dir = source_path / date_folder
-            date_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Get safe destination path
-            dest_path = self._get_safe_destination(date_dir / file_path.name)
-            
-            # Move the file
-            shutil.move(str(file_path), str(dest_path))
-            move_log.append((str(file_path), str(dest_path)))
-            
-            stats[date_folder] += 1
-        
-        return dict(stats), move_log
+        return self._organize(
+            source_dir,
+            "by_capture_date" if capture_date else "by_date",
+            date_format=date_format,
+            journal_path=journal_path,
+            recursive=recursive,
+            max_depth=max_depth,
+            exclude=exclude
+        )
     
-    def undo_organization(self, move_log: List[Tuple[str, str]]) -> int:
+    def _restore(self, moves: Iterable[Tuple[str, str]], progress: Optional[JobProgress] = None) -> int:
         """
-        Undo an organization operation by moving files back.
+        Move files back, newest move first.
         
         Args:
-            move_log: List of (source, destination) tuples
+            moves: (source, destination) pairs in reverse order
+            progress: Background job to report restores to (and to stop on cancel)
             
         Returns:
             Number of files restored
-            
-        Raises:
-            Exception: If restoration fails
         """
         restored = 0
         
-        # Reverse the move log to restore in reverse order
-        for source, dest in reversed(move_log):
+        for source, dest in moves:
+            if progress is not None:
+                progress.check_cancelled()
             dest_path = Path(dest)
             source_path = Path(source)
             
+            # Never moved (e.g. journaled ahead of a crash) or gone since
             if not dest_path.exists():
                 continue
             
@@ -314,5 +999,123 @@ class FileOrganizerService:
             # Move file back
             shutil.move(str(dest_path), str(source_path))
             restored += 1
+            if self.catalog is not None:
+                self.catalog.record_move(dest, source)
+            if progress is not None:
+                progress.moved(str(source_path))
         
+        self._flush_catalog()
         return restored
+    
+    def undo_organization(self, move_log: List[Tuple[str, str]], progress: Optional[JobProgress] = None) -> int:
+        """
+        Undo an organization operation by moving files back.
+        
+        Args:
+            move_log: List of (source, destination) tuples
+            progress: Background job to report restores to
+            
+        Returns:
+            Number of files restored
+            
+        Raises:
+            Exception: If restoration fails
+        """
+        # Reverse the move log to restore in reverse order
+        return self._restore(reversed(move_log), progress)
+    
+    def undo_journal(self, journal_path: str, progress: Optional[JobProgress] = None) -> int:
+        """
+        Undo a journaled organization, complete or interrupted.
+        
+        The journal is streamed from its end, so it is never loaded whole.
+        
+        Args:
+            journal_path: Move journal of the operation
+            progress: Background job to report restores to
+            
+        Returns:
+            Number of files restored
+            
+        Raises:
+            Exception: If restoration fails
+        """
+        return self._restore(journal.read_moves_reversed(journal_path), progress)
+    
+    def resume_journal(self, journal_path: str, source_dir: str) -> Dict[str, int]:
+        """
+        Finish an interrupted journaled organization.
+        
+        Applies the journaled moves that had not happened yet, then marks the
+        journal complete.
+        
+        Args:
+            journal_path: Move journal of the operation
+            source_dir: Directory that was being organized
+            
+        Returns:
+            Stats dict of the moves applied now
+            
+        Raises:
+            OSError: If a file could not be moved
+        """
+        source_path = self._resolve_source(source_dir)
+        moves = (
+            (source, os.path.relpath(os.path.dirname(dest), source_path), dest)
+            for source, dest in journal.pending_moves(journal_path)
+        )
+        stats, _ = self._execute(moves)
+        journal.mark_complete(journal_path, self.count_applied(journal_path))
+        return stats
+    
+    def count_applied(self, journal_path: str) -> int:
+        """
+        Count the journaled moves that took effect.
+        
+        Args:
+            journal_path: Move journal of the operation
+            
+        Returns:
+            Number of moves whose destination exists
+        """
+        return sum(1 for _source, dest in journal.read_moves(journal_path) if os.path.lexists(dest))
+    
+    def recover_interrupted(self, session: Session) -> int:
+        """
+        Settle operations left pending or running by a shutdown or crash.
+        
+        Operations with an unfinished journal are marked "interrupted" (they
+        can be undone or resumed); a finished journal means only the history
+        update was lost, so the operation is completed. The rest never moved
+        anything and are marked "failed".
+        
+        Args:
+            session: Database session
+            
+        Returns:
+            Number of operations marked interrupted
+        """
+        interrupted = 0
+        statement = select(OrganizationHistory).where(OrganizationHistory.status.in_(["pending", "running"]))
+        
+        for history in session.exec(statement).all():
+            journal_path = self.journal_for(history.id)
+            history.completed_at = datetime.utcnow()
+            
+            if not os.path.exists(journal_path):
+                history.status = "failed"
+                history.error_message = "Interrupted before any file was moved"
+            elif journal.is_complete(journal_path):
+                history.status = "completed"
+                history.files_moved = self.count_applied(journal_path)
+            else:
+                history.status = "interrupted"
+                history.files_moved = self.count_applied(journal_path)
+                history.error_message = "Interrupted; undo or resume the operation"
+                interrupted += 1
+            session.add(history)
+        
+        session.commit()
+        if interrupted:
+            logger.warning(f"Found {interrupted} interrupted organization(s) with move journals")
+        return interrupted
@@ -3,14 +3,29 @@ File preview service for generating thumbnails and previews.
 """
 
 import io
+import stat
 import base64
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
 from PIL import Image
 import PyPDF2
 
 from core.config import settings
+from schemas.preview import ThumbnailResult
+from services.batch import BatchPool, batch_pool, resolve_allowed
+from services.thumbnail_cache import ThumbnailCache, thumbnail_cache, thumbnail_key
+
+# Per profile: how much larger than the thumbnail the image stays until the
+# final resample (JPEG draft decoding and reduce() do the rest), and that
+# resample's filter
+THUMBNAIL_PROFILES = {
+    "quality": (3, Image.Resampling.LANCZOS),
+    "speed": (1, Image.Resampling.BILINEAR),
+}
+
+# Modes that are scaled as they are; others (palette, bilevel, 16-bit...) are converted first
+_SCALABLE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'CMYK')
 
 
 class FilePreviewService:
@@ -20,11 +35,18 @@ class FilePreviewService:
         """Initialize preview service."""
         self.max_size = settings.MAX_PREVIEW_SIZE
         self.thumbnail_size = settings.THUMBNAIL_SIZE
+        self.thumbnail_profile = settings.THUMBNAIL_PROFILE
+        self.allowed_paths = settings.get_allowed_paths()
+        self.batches: BatchPool = batch_pool
+        self.thumbnails: ThumbnailCache = thumbnail_cache
     
     def generate_thumbnail(self, file_path: str) -> Optional[str]:
         """
         Generate a thumbnail for an image file.
         
+        Thumbnails are cached by path, inode, size, mtime and thumbnail
+        size, so a repeat request for an unchanged file is a cache read.
+        
         Args:
             file_path: Path to the image file
             
@@ -33,37 +55,105 @@ class FilePreviewService:
         """
         path = Path(file_path)
         
-        if not path.exists() or not path.is_file():
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        
+        if not stat.S_ISREG(st.st_mode):
             return None
         
         # Check file size
-        if path.stat().st_size > self.max_size:
+        if st.st_size > self.max_size:
             return None
         
+        key = thumbnail_key(str(path), st, self.thumbnail_size, self.thumbnail_profile)
+        data = self.thumbnails.get(key, lambda: self._render_thumbnail(path))
+        return base64.b64encode(data).decode('utf-8') if data is not None else None
+    
+    def _render_thumbnail(self, path: Path) -> Optional[bytes]:
+        """
+        Decode and shrink an image to a JPEG thumbnail.
+        
+        The image is brought close to the thumbnail size cheaply before the
+        final resample: a JPEG is decoded at 1/2, 1/4 or 1/8 scale straight
+        from its DCT coefficients, and other images are box-reduced by an
+        integer factor. Alpha is flattened onto white after scaling, so only
+        the thumbnail's pixels are composited. THUMBNAIL_PROFILE picks how
+        much is left to the final resample and its filter.
+        
+        Args:
+            path: Path to the image file
+            
+        Returns:
+            JPEG bytes, or None if the image cannot be read
+        """
+        gap, resample = THUMBNAIL_PROFILES[self.thumbnail_profile]
         try:
             # Open and resize image
             with Image.open(path) as img:
+                # Thumbnail size: fits the box, keeps the aspect ratio, never enlarges
+                width, height = img.size
+                scale = min(self.thumbnail_size / width, self.thumbnail_size / height, 1)
+                size = (max(1, round(width * scale)), max(1, round(height * scale)))
+                
+                # JPEG only: decode at the smallest DCT scale still gap times the thumbnail size
+                img.draft(None, (size[0] * gap, size[1] * gap))
+                if img.mode not in _SCALABLE_MODES:
+                    img = img.convert('RGBA' if img.has_transparency_data else 'RGB')
+                
+                factor = min(img.width // (size[0] * gap), img.height // (size[1] * gap))
+                if factor > 1:
+                    img = img.reduce(factor)
+                if img.size != size:
+                    img = img.resize(size, resample)
+                
                 # Convert RGBA to RGB if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
+                if img.mode in ('RGBA', 'LA'):
                     background = Image.new('RGB', img.size, (255, 255, 255))
-                    if img.mode == 'P':
-                        img = img.convert('RGBA')
-                    background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                    background.paste(img, mask=img.split()[-1])
                     img = background
-                
-                # Create thumbnail
-                img.thumbnail((self.thumbnail_size, self.thumbnail_size), Image.Resampling.LANCZOS)
+                elif img.mode not in ('RGB', 'L'):
+                    img = img.convert('RGB')
                 
                 # Save to bytes
                 buffer = io.BytesIO()
                 img.save(buffer, format='JPEG', quality=85)
-                buffer.seek(0)
-                
-                # Encode to base64
-                return base64.b64encode(buffer.getvalue()).decode('utf-8')
+                return buffer.getvalue()
         except Exception:
             return None
     
+    def generate_thumbnails(self, paths: List[str]) -> Iterator[ThumbnailResult]:
+        """
+        Generate thumbnails for many image files at once.
+        
+        The paths are checked against the allowed base paths in one pass,
+        then the thumbnails are made concurrently on the shared batch pool
+        (Pillow releases the GIL while decoding and resizing).
+        
+        Args:
+            paths: Paths to the image files
+            
+        Returns:
+            Iterator of ThumbnailResult, one per path, in the order they are
+            ready (paths that are not allowed come first)
+        """
+        allowed: List[Tuple[str, Path]] = []
+        for path, resolved in resolve_allowed(paths, self.allowed_paths):
+            if resolved is None:
+                yield ThumbnailResult(path=path, error=f"Access to path '{path}' is not allowed")
+            else:
+                allowed.append((path, resolved))
+        
+        def thumbnail(item: Tuple[str, Path]) -> ThumbnailResult:
+            path, image_path = item
+            data = self.generate_thumbnail(str(image_path))
+            if data is None:
+                return ThumbnailResult(path=path, error="Unable to generate thumbnail for this file")
+            return ThumbnailResult(path=path, thumbnail=data, format="jpeg")
+        
+        yield from self.batches.run(thumbnail, allowed)
+    
     def get_text_preview(self, file_path: str, max_lines: int = 50) -> Optional[str]:
         """
         Get a text preview of a file.
@@ -0,0 +1,229 @@
+"""
+Background job manager for long-running organize and undo operations.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+class JobProgress:
+    """
+    Live progress of one background job.
+    
+    The job's thread reports through track_scan()/moved() and polls
+    check_cancelled() between files; readers take snapshot(). Every update
+    bumps version, so event streams only send what changed.
+    """
+    
+    def __init__(self, operation_id: int, kind: str, files_total: Optional[int] = None):
+        self.operation_id = operation_id
+        self.kind = kind  # "organize" or "undo"
+        self.state = "queued"  # queued, running, completed, failed, cancelled
+        self.phase = "queued"  # queued, scanning, moving, done
+        self.files_scanned = 0
+        self.files_total = files_total
+        self.files_moved = 0
+        self.bytes_moved = 0
+        self.error: Optional[str] = None
+        self.version = 0
+        self._started: Optional[float] = None
+        self._moving_since: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def finished(self) -> bool:
+        return self.state in ("completed", "failed", "cancelled")
+    
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+    
+    def _update(self, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.version += 1
+    
+    def start(self):
+        """Mark the job as running."""
+        self._started = time.monotonic()
+        self._update(state="running", phase="scanning")
+    
+    def start_moving(self, files_total: Optional[int] = None):
+        """Enter the move phase, optionally with the number of files to move."""
+        self._moving_since = time.monotonic()
+        self._update(phase="moving", files_total=files_total if files_total is not None else self.files_total)
+    
+    def finish(self, state: str, error: Optional[str] = None):
+        """Mark the job as completed, failed or cancelled."""
+        self._finished = time.monotonic()
+        self._update(state=state, phase="done", error=error)
+    
+    def cancel(self):
+        """Ask the job to stop at the next file."""
+        self._cancel.set()
+        self._update()
+    
+    def check_cancelled(self):
+        """
+        Cooperative cancellation point.
+        
+        Raises:
+            JobCancelled: If cancellation was requested
+        """
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.operation_id} was cancelled")
+    
+    def track_scan(self, entries: Iterable) -> Iterator:
+        """Pipeline stage: count scanned entries and honor cancellation."""
+        for entry in entries:
+            self.check_cancelled()
+            with self._lock:
+                self.files_scanned += 1
+                self.version += 1
+            yield entry
+    
+    def moved(self, destination: str):
+        """Record one finished move."""
+        try:
+            size = os.lstat(destination).st_size
+        except OSError:
+            size = 0
+        with self._lock:
+            self.files_moved += 1
+            self.bytes_moved += size
+            self.version += 1
+    
+    def snapshot(self) -> Dict:
+        """
+        Get a consistent view of the progress.
+        
+        Returns:
+            Dict with counters, rates (per second) and ETA (seconds, if known)
+        """
+        with self._lock:
+            now = self._finished or time.monotonic()
+            moving = now - self._moving_since if self._moving_since else 0.0
+            rate = self.files_moved / moving if moving > 0 else 0.0
+            eta = None
+            if self.files_total is not None and rate > 0 and not self.finished:
+                eta = max(0, self.files_total - self.files_moved) / rate
+            
+            return {
+                "operation_id": self.operation_id,
+                "kind": self.kind,
+                "state": self.state,
+                "phase": self.phase,
+                "files_scanned": self.files_scanned,
+                "files_total": self.files_total,
+                "files_moved": self.files_moved,
+                "bytes_moved": self.bytes_moved,
+                "files_per_second": round(rate, 1),
+                "bytes_per_second": round(self.bytes_moved / moving, 1) if moving > 0 else 0.0,
+                "elapsed_seconds": round(now - self._started, 3) if self._started else 0.0,
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "cancel_requested": self._cancel.is_set(),
+                "error": self.error,
+                "version": self.version
+            }
+
+
+class JobManager:
+    """Runs jobs on a small thread pool and keeps their progress for polling."""
+    
+    def __init__(self, max_workers: int = 2, max_finished: int = 100):
+        """
+        Initialize the job manager.
+        
+        Args:
+            max_workers: Jobs that run at the same time; others queue
+            max_finished: Finished jobs kept for progress queries
+        """
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="organize-job")
+        self._jobs: "OrderedDict[int, JobProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, progress: JobProgress, run: Callable[[JobProgress], None]) -> JobProgress:
+        """
+        Queue a job.
+        
+        Args:
+            progress: Progress object of the job (keyed by its operation ID)
+            run: Job body; it is given the progress object and must set the
+                final state with progress.finish(), also when the job was
+                cancelled while queued (check_cancelled() raises at once)
+                
+        Returns:
+            The progress object
+        """
+        with self._lock:
+            self._jobs[progress.operation_id] = progress
+            self._prune()
+        
+        def body():
+            # A job cancelled while queued still runs, so that it can record why it stopped
+            if not progress.cancel_requested:
+                progress.start()
+            try:
+                run(progress)
+            except Exception as e:
+                logger.exception(f"Background job {progress.operation_id} failed")
+                progress.finish("failed", str(e))
+        
+        self._pool.submit(body)
+        return progress
+    
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished (caller holds the lock)."""
+        finished = [op_id for op_id, job in self._jobs.items() if job.finished]
+        for op_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[op_id]
+    
+    def get(self, operation_id: int) -> Optional[JobProgress]:
+        """Get a job by operation ID, or None if unknown."""
+        with self._lock:
+            return self._jobs.get(operation_id)
+    
+    def cancel(self, operation_id: int) -> Optional[JobProgress]:
+        """
+        Request cancellation of a job.
+        
+        Args:
+            operation_id: Operation ID of the job
+            
+        Returns:
+            The job, or None if unknown
+        """
+        job = self.get(operation_id)
+        if job is not None and not job.finished:
+            job.cancel()
+        return job
+    
+    def shutdown(self):
+        """Cancel all jobs and wait for their threads to stop."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if not job.finished:
+                job.cancel()
+        self._pool.shutdown(wait=True)
+
+
+# Global job manager instance
+job_manager = JobManager(settings.JOB_WORKERS, settings.JOB_HISTORY_SIZE)
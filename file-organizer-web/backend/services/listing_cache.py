@@ -0,0 +1,99 @@
+"""
+In-memory cache of serialized directory listings for the file browser.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from schemas.file import DirectoryContents
+
+
+# (resolved path, include_hidden, whatever else the listing depends on)
+ListingKey = Tuple[str, bool, Hashable]
+Fingerprint = Tuple[int, int]
+
+
+class DirectoryListing:
+    """
+    A browsed directory with its JSON body and strong ETag.
+    
+    The body is serialized once when the listing is built, so a cache hit
+    is sent as-is and a matching If-None-Match costs nothing at all. The
+    fingerprint (mtime_ns, inode) is the directory's, taken before it was
+    read.
+    """
+    
+    def __init__(self, contents: DirectoryContents, fingerprint: Fingerprint):
+        self.contents = contents
+        self.fingerprint = fingerprint
+        # Fields left out by a projection are not set, so they are not sent
+        self.body = contents.model_dump_json(exclude_unset=True).encode()
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+        self.created_at = time.monotonic()
+    
+    def matches_etag(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names this listing (weak comparison, as RFC 9110 asks)."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+
+class ListingCache:
+    """
+    Bounded, thread-safe LRU cache of directory listings with a time-to-live.
+    
+    Anything with a fingerprint and a created_at (monotonic) can be cached,
+    such as the directory scans behind paginated browsing.
+    
+    A listing is served only while its directory still has the fingerprint
+    it was read with. Adding, removing or renaming an entry changes that,
+    so one stat validates a listing; the time-to-live bounds what it does
+    not cover (a file rewritten in place, changes inside a subdirectory).
+    """
+    
+    def __init__(self, max_listings: int = 16, ttl_seconds: float = 300):
+        """
+        Initialize the listing cache.
+        
+        Args:
+            max_listings: Maximum number of listings kept; least recently used go first (0 disables caching)
+            ttl_seconds: Seconds after which a listing is read again
+        """
+        self.max_listings = max_listings
+        self.ttl_seconds = ttl_seconds
+        self._listings: "OrderedDict[ListingKey, DirectoryListing]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: ListingKey, fingerprint: Fingerprint) -> Optional[DirectoryListing]:
+        """Get the listing of a directory if it is still current, or None."""
+        with self._lock:
+            listing = self._listings.get(key)
+            if listing is None:
+                return None
+            if listing.fingerprint != fingerprint or time.monotonic() - listing.created_at > self.ttl_seconds:
+                del self._listings[key]
+                return None
+            self._listings.move_to_end(key)
+            return listing
+    
+    def put(self, key: ListingKey, listing: DirectoryListing):
+        """Store a listing, evicting the least recently used ones if full."""
+        if self.max_listings <= 0:
+            return
+        with self._lock:
+            self._listings[key] = listing
+            self._listings.move_to_end(key)
+            while len(self._listings) > self.max_listings:
+                self._listings.popitem(last=False)
+    
+    def clear(self):
+        """Drop every listing."""
+        with self._lock:
+            self._listings.clear()
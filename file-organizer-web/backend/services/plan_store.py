@@ -0,0 +1,145 @@
+"""
+In-memory store for organize plans produced by preview.
+"""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+# (path relative to the source, destination folder, destination path, inode, mtime_ns or None)
+PlanEntry = Tuple[str, str, str, int, Optional[int]]
+Fingerprint = Optional[Tuple[int, int]]
+
+
+class OrganizePlan:
+    """
+    A previewed organize operation that execute can apply without rescanning.
+    
+    Besides the planned moves, the plan keeps a fingerprint (mtime_ns, inode)
+    of the source directory and of every target directory, taken before they
+    were read. Execute compares those fingerprints to decide whether the
+    stored moves can be applied as-is or need revalidation.
+    """
+    
+    def __init__(
+        self,
+        source_directory: str,
+        operation_type: str,
+        create_others: bool = True,
+        date_format: str = "%Y/%m",
+        source_fingerprint: Fingerprint = None,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None,
+        dedup: Optional[str] = None
+    ):
+        self.plan_id = uuid.uuid4().hex
+        self.source_directory = source_directory
+        self.operation_type = operation_type
+        self.create_others = create_others
+        self.date_format = date_format
+        self.source_fingerprint = source_fingerprint
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.exclude = list(exclude or [])
+        self.dedup = dedup
+        # Path relative to the source -> path of the identical file it duplicates
+        self.duplicates: Dict[str, str] = {}
+        self.target_fingerprints: Dict[str, Fingerprint] = {}
+        self.entries: List[PlanEntry] = []
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.created_at = time.monotonic()
+    
+    def add(self, name: str, folder: str, destination: str, inode: int, mtime_ns: Optional[int] = None):
+        """Record a planned move of name (relative to the source directory)."""
+        self.entries.append((name, folder, destination, inode, mtime_ns))
+        self.stats[folder] += 1
+    
+    def extend(self, entries: List[PlanEntry], stats: Dict[str, int]):
+        """Record planned moves in bulk, with their per-folder counts."""
+        self.entries.extend(entries)
+        for folder, count in stats.items():
+            self.stats[folder] += count
+    
+    @property
+    def fingerprint(self) -> str:
+        """Source directory fingerprint as an opaque token for clients."""
+        if self.source_fingerprint is None:
+            return ""
+        mtime_ns, inode = self.source_fingerprint
+        return f"{inode:x}-{mtime_ns:x}"
+    
+    def matches(
+        self,
+        source_directory: str,
+        operation_type: str,
+        create_others: bool,
+        date_format: str,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None,
+        dedup: Optional[str] = None
+    ) -> bool:
+        """Check that the plan was made for the same operation."""
+        if (self.source_directory, self.operation_type) != (source_directory, operation_type):
+            return False
+        if self.dedup != dedup:
+            return False
+        if (self.recursive, self.exclude) != (recursive, list(exclude or [])):
+            return False
+        if recursive and self.max_depth != max_depth:
+            return False
+        if operation_type == "by_type":
+            return self.create_others == create_others
+        return self.date_format == date_format
+
+
+class PlanStore:
+    """Bounded, thread-safe LRU cache of plans with a time-to-live."""
+    
+    def __init__(self, max_plans: int = 32, ttl_seconds: int = 900):
+        """
+        Initialize the plan store.
+        
+        Args:
+            max_plans: Maximum number of plans kept; least recently used go first
+            ttl_seconds: Seconds after which a plan expires
+        """
+        self.max_plans = max_plans
+        self.ttl_seconds = ttl_seconds
+        self._plans: "OrderedDict[str, OrganizePlan]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _expire(self):
+        """Drop expired plans (caller holds the lock)."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        for plan_id in [pid for pid, plan in self._plans.items() if plan.created_at < cutoff]:
+            del self._plans[plan_id]
+    
+    def put(self, plan: OrganizePlan):
+        """Store a plan, evicting the least recently used ones if full."""
+        with self._lock:
+            self._expire()
+            self._plans[plan.plan_id] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+    
+    def get(self, plan_id: str) -> Optional[OrganizePlan]:
+        """Get a plan by ID, or None if unknown or expired."""
+        with self._lock:
+            plan = self._plans.get(plan_id)
+            if plan is None:
+                return None
+            if time.monotonic() - plan.created_at > self.ttl_seconds:
+                del self._plans[plan_id]
+                return None
+            self._plans.move_to_end(plan_id)
+            return plan
+    
+    def pop(self, plan_id: str) -> Optional[OrganizePlan]:
+        """Remove and return a plan."""
+        with self._lock:
+            return self._plans.pop(plan_id, None)
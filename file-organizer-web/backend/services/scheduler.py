@@ -2,8 +2,10 @@
 Scheduler service using APScheduler.
 """
 
+import logging
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
@@ -11,10 +13,13 @@ from sqlmodel import Session
 
 from core.config import settings
 from core.database import engine
+from core.shared import watcher as directory_watcher
 from models.schedule import ScheduledJob
 from models.organization import OrganizationHistory
 from services.file_organizer import FileOrganizerService
 
+logger = logging.getLogger(__name__)
+
 
 class SchedulerService:
     """Service for managing scheduled organization jobs."""
@@ -23,6 +28,9 @@ class SchedulerService:
         """Initialize the scheduler."""
         self.scheduler: Optional[BackgroundScheduler] = None
         self.organizer = FileOrganizerService()
+        # Watch jobs run on their own threads instead of APScheduler triggers
+        self._watchers: Dict[int, directory_watcher.DirectoryWatcher] = {}
+        self._watchers_lock = threading.Lock()
         
         if settings.SCHEDULER_ENABLED:
             self.scheduler = BackgroundScheduler(timezone=settings.SCHEDULER_TIMEZONE)
@@ -34,15 +42,22 @@ class SchedulerService:
     
     def shutdown(self):
         """Shutdown the scheduler."""
+        with self._watchers_lock:
+            watchers = list(self._watchers.values())
+            self._watchers.clear()
+        for watcher in watchers:
+            watcher.stop()
+        
         if self.scheduler and self.scheduler.running:
             self.scheduler.shutdown()
     
-    def _execute_job(self, job_id: int):
+    def _execute_job(self, job_id: int, paths: Optional[List[str]] = None):
         """
         Execute a scheduled job.
         
         Args:
             job_id: ID of the scheduled job
+            paths: Files reported by a watch job; None runs over the whole directory
         """
         with Session(engine) as session:
             job = session.get(ScheduledJob, job_id)
@@ -50,39 +65,54 @@ class SchedulerService:
             if not job or not job.enabled:
                 return
             
-            # Create history entry
             history = OrganizationHistory(
                 operation_type=job.operation_type,
                 source_directory=job.source_directory,
                 date_format=job.date_format,
                 status="pending"
             )
-            session.add(history)
-            session.commit()
-            session.refresh(history)
+            
+            def start() -> str:
+                # History entry only once there is something to move
+                session.add(history)
+                session.commit()
+                session.refresh(history)
+                return self.organizer.journal_for(history.id)
             
             try:
-                # Execute organization
-                if job.operation_type == "by_type":
-                    stats, move_log = self.organizer.organize_by_type(
+                if paths is not None:
+                    stats = self.organizer.organize_paths(
                         job.source_directory,
-                        create_others=True
+                        paths,
+                        job.operation_type,
+                        create_others=True,
+                        date_format=job.date_format or "%Y/%m",
+                        on_start=start
                     )
-                else:  # by_date
-                    stats, move_log = self.organizer.organize_by_date(
+                    # Files that vanished or were excluded are not worth a history entry
+                    if stats is None:
+                        return
+                    watermark = job.watermark
+                else:
+                    # Only files that are new since the job's watermark are organized
+                    stats, watermark = self.organizer.organize_incremental(
                         job.source_directory,
-                        job.date_format or "%Y/%m"
+                        job.operation_type,
+                        job.watermark,
+                        create_others=True,
+                        date_format=job.date_format or "%Y/%m",
+                        on_start=start
                     )
                 
-                # Update history
-                history.status = "completed"
+                # Update history; a run with nothing new is a cheap no-op entry
+                history.status = "completed" if stats is not None else "no_op"
                 history.completed_at = datetime.utcnow()
-                history.files_moved = len(move_log)
-                history.categories_created = len(stats)
-                history.stats = stats
-                history.move_log = move_log
+                history.files_moved = sum(stats.values()) if stats else 0
+                history.categories_created = len(stats) if stats else 0
+                history.stats = stats or {}
                 
                 # Update job
+                job.watermark = watermark
                 job.last_run = datetime.utcnow()
                 job.run_count += 1
                 
@@ -114,6 +144,9 @@ class SchedulerService:
         if not self.scheduler:
             raise ValueError("Scheduler is not enabled")
         
+        if job.schedule_type == "watch":
+            return self._start_watch(job)
+        
         # Create trigger based on schedule type
         if job.schedule_type == "cron":
             cron_expr = job.schedule_config.get("cron_expression")
@@ -151,6 +184,68 @@ class SchedulerService:
         
         return apscheduler_job.id
     
+    def _start_watch(self, job: ScheduledJob) -> str:
+        """
+        Start watching a job's source directory.
+        
+        Args:
+            job: ScheduledJob with schedule_type "watch"
+            
+        Returns:
+            Watcher ID
+            
+        Raises:
+            ValueError: If the source directory cannot be watched
+        """
+        debounce = job.schedule_config.get("debounce_seconds")
+        try:
+            watcher = directory_watcher.DirectoryWatcher(
+                job.source_directory,
+                debounce=settings.WATCH_DEBOUNCE if debounce is None else debounce,
+                poll_interval=settings.WATCH_POLL_INTERVAL
+            )
+        except OSError as e:
+            raise ValueError(f"Cannot watch {job.source_directory}: {e.strerror}")
+        
+        self._stop_watch(job.id)
+        with self._watchers_lock:
+            self._watchers[job.id] = watcher
+        
+        thread = threading.Thread(target=self._watch, args=(job.id, watcher), name=f"watch-{job.id}", daemon=True)
+        thread.start()
+        logger.info(f"Watching {job.source_directory} for job {job.id} ({watcher.backend})")
+        return f"watch_{job.id}"
+    
+    def _watch(self, job_id: int, watcher: "directory_watcher.DirectoryWatcher"):
+        """
+        Watch thread: catch up on files that arrived while not watching, then
+        organize each micro-batch of new files as it comes in.
+        
+        Args:
+            job_id: ID of the scheduled job
+            watcher: Watcher set up on the job's source directory
+        """
+        try:
+            self._execute_job(job_id)
+            for paths in watcher.batches():
+                self._execute_job(job_id, paths)
+        except Exception:
+            logger.exception(f"Watch job {job_id} stopped")
+        finally:
+            with self._watchers_lock:
+                if self._watchers.get(job_id) is watcher:
+                    del self._watchers[job_id]
+            watcher.close()
+    
+    def _stop_watch(self, job_id: int) -> bool:
+        """Stop a job's watcher; returns whether there was one."""
+        with self._watchers_lock:
+            watcher = self._watchers.pop(job_id, None)
+        if watcher is None:
+            return False
+        watcher.stop()
+        return True
+    
     def remove_job(self, job_id: int):
         """
         Remove a scheduled job.
@@ -158,7 +253,7 @@ class SchedulerService:
         Args:
             job_id: ID of the scheduled job
         """
-        if not self.scheduler:
+        if self._stop_watch(job_id) or not self.scheduler:
             return
         
         try:
@@ -173,7 +268,7 @@ class SchedulerService:
         Args:
             job_id: ID of the scheduled job
         """
-        if not self.scheduler:
+        if self._stop_watch(job_id) or not self.scheduler:
             return
         
         try:
@@ -191,6 +286,13 @@ class SchedulerService:
         if not self.scheduler:
             return
         
+        with Session(engine) as session:
+            job = session.get(ScheduledJob, job_id)
+            if job and job.enabled and job.schedule_type == "watch":
+                # The catch-up run organizes whatever arrived while paused
+                self._start_watch(job)
+                return
+        
         try:
             self.scheduler.resume_job(f"job_{job_id}")
         except:
@@ -0,0 +1,207 @@
+"""
+Persistent thumbnail cache for file previews.
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_key(path: str, stat: os.stat_result, *options) -> str:
+    """
+    Cache key of a file's thumbnail.
+    
+    The key changes whenever the file is replaced (inode), rewritten (size,
+    mtime) or the thumbnail options change, so entries never need to be
+    invalidated: stale ones age out of the cache.
+    
+    Args:
+        path: File path
+        stat: The file's stat result
+        options: What else the thumbnail depends on (its size, profile...)
+        
+    Returns:
+        Hex digest naming the thumbnail
+    """
+    parts = (path, stat.st_ino, stat.st_size, stat.st_mtime_ns) + options
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+class ThumbnailCache:
+    """
+    Thumbnails kept on disk under a byte budget, with an in-memory LRU in front.
+    
+    Each thumbnail is one file named by its key (sharded by the first two
+    hex digits), written to a temporary file and renamed into place, so a
+    reader never sees a partial thumbnail. When the files take more than
+    the budget, the least recently used are deleted; usage is counted from
+    the directory on first use. Concurrent requests for the same key wait
+    for the one generation under way instead of starting their own.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, memory_items: int = 512):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Directory holding the thumbnails (empty keeps them in memory only)
+            max_bytes: Disk budget; least recently used thumbnails are deleted beyond it (0 disables the disk cache)
+            memory_items: Thumbnails kept in memory (0 disables the memory cache)
+        """
+        self.directory = directory if max_bytes > 0 else ""
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        # Thumbnail files on disk (key -> bytes), least recently used first; None until counted
+        self._files: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._running: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str, generate: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Get a thumbnail, generating and storing it if it is not cached.
+        
+        Args:
+            key: Thumbnail key (see thumbnail_key)
+            generate: Makes the thumbnail; returns None if it cannot
+            
+        Returns:
+            Thumbnail bytes, or None if generate could not make it
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            future = self._running.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._running[key] = future
+        if not owner:
+            return future.result()
+        
+        try:
+            data = self._read(key)
+            if data is None:
+                data = generate()
+                if data is not None:
+                    self._write(key, data)
+            if data is not None:
+                self._remember(key, data)
+            future.set_result(data)
+            return data
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+    
+    def _remember(self, key: str, data: bytes):
+        """Keep a thumbnail in memory, dropping the least recently used ones if full."""
+        if self.memory_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".jpg")
+    
+    def _load(self):
+        """Count the thumbnails on disk, oldest first (caller holds the lock)."""
+        found = []
+        try:
+            shards = [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+        except OSError:
+            shards = []
+        for shard in shards:
+            try:
+                entries = list(os.scandir(shard))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.name.endswith(".tmp"):
+                        # Left by a write that never finished
+                        os.unlink(entry.path)
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                found.append((stat.st_mtime_ns, entry.name[:-len(".jpg")], stat.st_size))
+        found.sort()
+        self._files = OrderedDict((key, size) for _mtime, key, size in found)
+        self._disk_bytes = sum(size for _mtime, _key, size in found)
+    
+    def _read(self, key: str) -> Optional[bytes]:
+        """A thumbnail from disk, or None."""
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        with self._lock:
+            if self._files is None:
+                self._load()
+            if key in self._files:
+                self._files.move_to_end(key)
+        return data
+    
+    def _write(self, key: str, data: bytes):
+        """Store a thumbnail on disk atomically, then delete the least recently used beyond the budget."""
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not cache thumbnail {key}: {e}")
+            return
+        
+        evicted = []
+        with self._lock:
+            if self._files is None:
+                self._load()
+            self._disk_bytes += len(data) - self._files.pop(key, 0)
+            self._files[key] = len(data)
+            while self._disk_bytes > self.max_bytes and len(self._files) > 1:
+                old_key, size = self._files.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.unlink(self._path(old_key))
+            except OSError:
+                pass
+
+
+# Global cache instance
+thumbnail_cache = ThumbnailCache(
+    settings.THUMBNAIL_CACHE_DIR,
+    settings.THUMBNAIL_CACHE_MAX_BYTES,
+    settings.THUMBNAIL_MEMORY_CACHE_SIZE
+)
@@ -0,0 +1,73 @@
+"""
+Watermarks for incremental scheduled organization.
+"""
+
+import base64
+from array import array
+from datetime import datetime
+from typing import Iterable, Optional, Set, Tuple
+
+
+Fingerprint = Optional[Tuple[int, int]]
+
+_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+class Watermark:
+    """
+    What a scheduled job's last run left behind in its source directory.
+    
+    The fingerprint (mtime_ns, inode) of the directory is taken when the run
+    ended; while the directory still has it, nothing was added or removed and
+    the next run can skip scanning entirely. The seen set holds a 64-bit key
+    per (inode, mtime_ns) of every file the run looked at and left in place
+    (uncategorized files, failed moves), so later runs only process files
+    that are new or have changed.
+    """
+    
+    def __init__(self, fingerprint: Fingerprint = None, seen: Optional[Iterable[int]] = None):
+        self.fingerprint = fingerprint
+        self.seen: Set[int] = set(seen or ())
+    
+    @staticmethod
+    def key(inode: int, mtime_ns: int) -> int:
+        """64-bit key of a file version (a mix of inode and mtime)."""
+        return ((inode * 0x9E3779B97F4A7C15) ^ mtime_ns) & _MASK
+    
+    def covers(self, fingerprint: Fingerprint) -> bool:
+        """Whether the directory is unchanged since the watermark was taken."""
+        return fingerprint is not None and self.fingerprint == fingerprint
+    
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "Watermark":
+        """
+        Load a watermark stored on a ScheduledJob.
+        
+        Args:
+            data: Stored watermark, or None/empty for a job that never ran
+            
+        Returns:
+            Watermark (empty if nothing was stored)
+        """
+        if not data:
+            return cls()
+        
+        fingerprint = data.get("fingerprint")
+        seen = array("Q")
+        if data.get("seen"):
+            seen.frombytes(base64.b64decode(data["seen"]))
+        return cls(tuple(fingerprint) if fingerprint else None, seen)
+    
+    def to_dict(self) -> dict:
+        """
+        Serialize for the ScheduledJob watermark column.
+        
+        Returns:
+            Dict with the fingerprint and the seen keys packed as base64
+        """
+        packed = array("Q", sorted(self.seen)).tobytes()
+        return {
+            "fingerprint": list(self.fingerprint) if self.fingerprint else None,
+            "seen": base64.b64encode(packed).decode("ascii"),
+            "updated": datetime.utcnow().isoformat()
+        }
@@ -201,7 +201,8 @@ class Organizer {
         source_directory: directory,
         operation_type: method,
         dry_run: false,
-        create_others: true
+        create_others: true,
+        plan_id: this.currentPreview ? this.currentPreview.plan_id : null
       });
 
       showToast(
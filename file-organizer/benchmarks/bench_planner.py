@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark - destination planning for many files with the same name
+
+Plans COUNT files all named IMG_0001.jpg into one category folder and
+materializes each destination (as a real organize run would), comparing:
+
+  legacy   - probe name, name_1, name_2, ... with Path.exists() (O(n^2) stats)
+  planner  - fileorg.planner.DestinationPlanner (one listdir, O(n) total)
+  
+The legacy strategy is quadratic, so it runs on --legacy-count files and
+its time for COUNT files is extrapolated.
+
+Usage:
+  python benchmarks/bench_planner.py                 # 100k files
+  python benchmarks/bench_planner.py --count 20000 --legacy-count 2000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fileorg.planner import DestinationPlanner  # noqa: E402
+
+FILE_NAME = "IMG_0001.jpg"
+
+
+def legacy_safe_destination(dest_path: Path) -> Path:
+    """The pre-planner strategy: stat every candidate until one is free."""
+    if not dest_path.exists():
+        return dest_path
+    stem, suffix, parent = dest_path.stem, dest_path.suffix, dest_path.parent
+    counter = 1
+    while True:
+        new_path = parent / f"{stem}_{counter}{suffix}"
+        if not new_path.exists():
+            return new_path
+        counter += 1
+
+
+def touch(path: str):
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o644))
+
+
+def run_legacy(target: Path, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        dest = legacy_safe_destination(target / FILE_NAME)
+        touch(str(dest))
+    return time.perf_counter() - start
+
+
+def run_planner(target: Path, count: int) -> float:
+    start = time.perf_counter()
+    planner = DestinationPlanner()
+    seen = set()
+    for _ in range(count):
+        dest = planner.reserve(str(target), FILE_NAME)
+        touch(dest)
+        seen.add(dest)
+    elapsed = time.perf_counter() - start
+    assert len(seen) == count, "planner handed out a duplicate destination"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark destination planning for duplicate names")
+    parser.add_argument("--count", type=int, default=100_000, help="Files to plan with the planner (default: 100000)")
+    parser.add_argument("--legacy-count", type=int, default=1_000, help="Files to plan with the legacy strategy (default: 1000)")
+    args = parser.parse_args()
+    
+    workdir = Path(tempfile.mkdtemp(prefix="bench_planner_"))
+    try:
+        legacy_dir = workdir / "legacy"
+        planner_dir = workdir / "planner"
+        legacy_dir.mkdir()
+        planner_dir.mkdir()
+        
+        legacy_time = run_legacy(legacy_dir, args.legacy_count)
+        planner_time = run_planner(planner_dir, args.count)
+        # Quadratic in the number of files already present
+        legacy_estimate = legacy_time * (args.count / args.legacy_count) ** 2
+        
+        print(f"{'strategy':10} {'files':>8} {'seconds':>10} {'files/s':>12}")
+        print("-" * 44)
+        print(f"{'legacy':10} {args.legacy_count:8} {legacy_time:10.3f} {args.legacy_count / legacy_time:12.0f}")
+        print(f"{'planner':10} {args.count:8} {planner_time:10.3f} {args.count / planner_time:12.0f}")
+        print(f"\nLegacy estimate for {args.count} files: {legacy_estimate:.1f}s "
+              f"({legacy_estimate / planner_time:.0f}x slower than the planner)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
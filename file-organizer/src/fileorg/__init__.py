@@ -0,0 +1,4 @@
+"""
+Shared organizer library used by the CLI and the web backend.
+Standard library only, so the CLI keeps working without extra dependencies.
+"""
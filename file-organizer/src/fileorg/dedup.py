@@ -0,0 +1,415 @@
+"""
+Duplicate detection - staged content hashing with a persistent hash cache
+
+Candidates are narrowed in three stages, each cheaper than the next:
+
+    size -> partial hash (head and tail blocks) -> full hash
+    
+Files of a unique size are never read. Files that share a size have only
+their first and last PARTIAL_BLOCK bytes hashed, and only files that still
+collide are hashed in full. Files no larger than two blocks are covered
+completely by the partial hash, so they skip the last stage.
+
+Hashing runs on a thread pool. Each thread reuses one preallocated buffer
+(readinto, no per-read allocation), and large files are hashed straight from
+an mmap, so the stage stays I/O-bound. hashlib releases the GIL for large
+updates.
+
+Digests are cached in SQLite keyed by (device, inode, size, mtime_ns), so a
+file is hashed once however many runs look at it. A changed file gets a new
+key, so stale entries are never read back.
+"""
+
+import os
+import mmap
+import sqlite3
+import hashlib
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fileorg.scanner import ScanEntry, scan_files
+
+DEFAULT_HASH_WORKERS = min(16, (os.cpu_count() or 1) + 4)
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "file-organizer",
+    "hashes.db"
+)
+DEDUP_MODES = ("skip", "link", "report")
+
+PARTIAL_BLOCK = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 4 * CHUNK_SIZE
+DIGEST_SIZE = 20
+
+_COMMIT_EVERY = 1000
+_local = threading.local()
+
+
+class FileRef:
+    """A file taking part in duplicate detection, identified the way the hash cache keys it."""
+    
+    __slots__ = ("index", "path", "dev", "ino", "size", "mtime_ns")
+    
+    def __init__(self, index: int, path: str, st: os.stat_result):
+        self.index = index
+        self.path = path
+        self.dev = st.st_dev
+        self.ino = st.st_ino
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+    
+    @property
+    def key(self) -> Tuple[int, int, int, int]:
+        return _signed(self.dev), _signed(self.ino), self.size, self.mtime_ns
+
+
+class DuplicateGroup:
+    """Files with identical content, in the order they were given to find_duplicates."""
+    
+    __slots__ = ("size", "digest", "paths")
+    
+    def __init__(self, size: int, digest: bytes, paths: List[str]):
+        self.size = size
+        self.digest = digest
+        self.paths = paths
+    
+    @property
+    def wasted(self) -> int:
+        """Bytes taken by all copies but one."""
+        return self.size * (len(self.paths) - 1)
+    
+    def __repr__(self) -> str:
+        return f"DuplicateGroup({self.size} bytes x {len(self.paths)})"
+
+
+def _signed(value: int) -> int:
+    """Map an unsigned 64-bit number (inode, device) into SQLite's signed integer range."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class HashCache:
+    """
+    Partial and full digests in SQLite, keyed by (device, inode, size, mtime_ns).
+    
+    One connection is shared by all threads, behind a lock. Writes are
+    committed in groups, and close() commits the rest.
+    """
+    
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " partial BLOB, full BLOB,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+    
+    def __enter__(self) -> "HashCache":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def get(self, ref: FileRef, kind: str) -> Optional[bytes]:
+        """Cached "partial" or "full" digest of a file, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_column(kind)} FROM hashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+                ref.key
+            ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, ref: FileRef, kind: str, digest: bytes):
+        """Store a "partial" or "full" digest."""
+        column = _column(kind)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO hashes (dev, ino, size, mtime_ns, {column}) VALUES (?, ?, ?, ?, ?) "
+                f"ON CONFLICT (dev, ino, size, mtime_ns) DO UPDATE SET {column} = excluded.{column}",
+                ref.key + (digest,)
+            )
+            self._dirty += 1
+            if self._dirty >= _COMMIT_EVERY:
+                self._conn.commit()
+                self._dirty = 0
+    
+    def close(self):
+        """Commit pending writes and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+
+def _column(kind: str) -> str:
+    if kind not in ("partial", "full"):
+        raise ValueError(f"Unknown digest kind: {kind}")
+    return kind
+
+
+def _buffer() -> memoryview:
+    """This thread's reusable read buffer."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = memoryview(bytearray(CHUNK_SIZE))
+    return buffer
+
+
+def _read_into(f, view: memoryview) -> int:
+    """Fill view from f (short only at end of file); returns the bytes read."""
+    filled = 0
+    while filled < len(view):
+        n = f.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def partial_digest(path: str) -> bytes:
+    """Digest of the first and last PARTIAL_BLOCK bytes (the whole file if it is no larger than two blocks)."""
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    view = _buffer()[:PARTIAL_BLOCK]
+    with open(path, "rb", buffering=0) as f:
+        n = _read_into(f, view)
+        digest.update(view[:n])
+        if n == PARTIAL_BLOCK:
+            size = os.fstat(f.fileno()).st_size
+            # The tail block never overlaps the head, so small files are hashed exactly once
+            f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+            n = _read_into(f, view)
+            digest.update(view[:n])
+    return digest.digest()
+
+
+def full_digest(path: str) -> bytes:
+    """Digest of the whole file, from an mmap for large files and a reused buffer otherwise."""
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            try:
+                return _mmap_digest(f.fileno(), size)
+            except (OSError, ValueError):
+                # Not mappable (e.g. some network filesystems); read it instead
+                f.seek(0)
+        
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        view = _buffer()
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            digest.update(view[:n])
+        return digest.digest()
+
+
+def _mmap_digest(fd: int, size: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, size, CHUNK_SIZE):
+                digest.update(view[offset:offset + CHUNK_SIZE])
+        finally:
+            view.release()
+    return digest.digest()
+
+
+_DIGESTS = {"partial": partial_digest, "full": full_digest}
+
+
+class _Stage:
+    """One candidate group waiting for its members' digests."""
+    
+    __slots__ = ("kind", "members", "digests", "waiting")
+    
+    def __init__(self, kind: str, members: List[FileRef]):
+        self.kind = kind
+        self.members = members
+        self.digests: Dict[int, Optional[bytes]] = {}
+        self.waiting = 0
+
+
+def find_duplicates(
+    files: Iterable[Tuple[str, os.stat_result]],
+    cache: Optional[HashCache] = None,
+    workers: int = DEFAULT_HASH_WORKERS,
+    min_size: int = 1,
+    involving: Optional[Set[str]] = None,
+    max_in_flight: Optional[int] = None
+) -> Iterator[DuplicateGroup]:
+    """
+    Yield groups of byte-identical files as soon as each group is confirmed.
+    
+    files are (path, stat) pairs; paths within a group keep their input
+    order, so callers list the copies they want to keep first. Files smaller
+    than min_size (by default, empty files) are ignored. With involving, only
+    groups containing at least one of those paths are pursued. Files that
+    vanish or cannot be read are dropped from their group.
+    """
+    by_size: Dict[int, List[FileRef]] = defaultdict(list)
+    for index, (path, st) in enumerate(files):
+        if st.st_size >= min_size:
+            by_size[st.st_size].append(FileRef(index, path, st))
+    
+    stages = deque(
+        _Stage("partial", members) for members in by_size.values()
+        if len(members) > 1 and _wanted(members, involving)
+    )
+    del by_size
+    
+    max_in_flight = max_in_flight or workers * 64
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="hash")
+    pending = {}
+    
+    def start(stage: _Stage) -> List[DuplicateGroup]:
+        for ref in stage.members:
+            digest = cache.get(ref, stage.kind) if cache is not None else None
+            if digest is not None:
+                stage.digests[ref.index] = digest
+            else:
+                pending[pool.submit(_DIGESTS[stage.kind], ref.path)] = (stage, ref)
+                stage.waiting += 1
+        return finish(stage) if not stage.waiting else []
+    
+    def finish(stage: _Stage) -> List[DuplicateGroup]:
+        groups: Dict[bytes, List[FileRef]] = defaultdict(list)
+        for ref in stage.members:
+            digest = stage.digests.get(ref.index)
+            if digest is not None:
+                groups[digest].append(ref)
+        
+        confirmed = []
+        for digest, members in groups.items():
+            if len(members) < 2 or not _wanted(members, involving):
+                continue
+            if stage.kind == "partial" and members[0].size > 2 * PARTIAL_BLOCK:
+                # Depth first, so confirmed groups stream out early
+                stages.appendleft(_Stage("full", members))
+            else:
+                confirmed.append(DuplicateGroup(members[0].size, digest, [ref.path for ref in members]))
+        return confirmed
+    
+    try:
+        while stages or pending:
+            while stages and len(pending) < max_in_flight:
+                yield from start(stages.popleft())
+            if not pending:
+                continue
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, ref = pending.pop(future)
+                try:
+                    digest = future.result()
+                except OSError:
+                    digest = None
+                if digest is not None and cache is not None:
+                    cache.put(ref, stage.kind, digest)
+                stage.digests[ref.index] = digest
+                stage.waiting -= 1
+                if not stage.waiting:
+                    yield from finish(stage)
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def _wanted(members: List[FileRef], involving: Optional[Set[str]]) -> bool:
+    return involving is None or any(ref.path in involving for ref in members)
+
+
+def match_duplicates(
+    classified: Iterable[Tuple[ScanEntry, str]],
+    target_dir: Callable[[str], str],
+    cache: Optional[HashCache] = None,
+    workers: int = DEFAULT_HASH_WORKERS
+) -> Tuple[List[Tuple[ScanEntry, str]], Dict[str, str]]:
+    """
+    Dedup stage of the organize pipeline.
+    
+    Finds the classified files that are byte-identical to a file already in
+    one of the target folders, or to an earlier file of the same run. Files
+    already organized count as the originals. Only target folders that
+    receive files are listed, and only their files of a size that occurs
+    among the new files are considered.
+    
+    Returns:
+        (classified pairs as a list, {duplicate path: path of the original})
+    """
+    classified = list(classified)
+    new_files = []
+    for entry, _folder in classified:
+        try:
+            new_files.append((entry.path, entry.stat()))
+        except OSError:
+            continue
+    sizes = {st.st_size for _path, st in new_files}
+    
+    existing = []
+    for folder in sorted({folder for _entry, folder in classified}):
+        directory = target_dir(folder)
+        if not os.path.isdir(directory):
+            continue
+        for entry in scan_files(directory):
+            try:
+                if entry.size in sizes:
+                    existing.append((entry.path, entry.stat()))
+            except OSError:
+                continue
+    
+    involving = {path for path, _st in new_files}
+    duplicates: Dict[str, str] = {}
+    for group in find_duplicates(existing + new_files, cache, workers, involving=involving):
+        original = group.paths[0]
+        for path in group.paths[1:]:
+            if path in involving:
+                duplicates[path] = original
+    return classified, duplicates
+
+
+def relink(path: str, original: str) -> bool:
+    """
+    Replace path with a hard link to original, which has the same content.
+    
+    The name stays, and the two now share their data blocks. Returns False,
+    leaving path alone, when that is not possible: the files are on
+    different devices, the sizes differ, or the filesystem refuses.
+    """
+    try:
+        st, original_st = os.stat(path), os.stat(original)
+    except OSError:
+        return False
+    if st.st_dev != original_st.st_dev or st.st_size != original_st.st_size:
+        return False
+    if st.st_ino == original_st.st_ino:
+        return True
+    
+    temporary = f"{path}.{os.getpid()}.link"
+    try:
+        os.link(original, temporary)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        return False
+    return True
@@ -0,0 +1,190 @@
+"""
+Move journal - append-only JSONL write-ahead log of file moves
+
+Each planned move is written (and fsynced in groups) *before* it is applied,
+so after a crash the journal lists every move that may have happened. Whether
+a given move actually happened is read back from the filesystem: the
+destination exists and the source does not. That makes a partial journal
+safe both to roll back (undo) and to resume (finish the remaining moves).
+
+Format, one JSON object per line:
+
+    {"begin": {"source": "...", "started": "..."}}
+    {"src": "...", "dst": "..."}
+    ...
+    {"end": {"moved": 123, "finished": "..."}}
+    
+Older undo logs (a single JSON array of [source, dest] pairs) are still read.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_GROUP_SIZE = 256
+DEFAULT_GROUP_DELAY = 0.5
+_READ_BLOCK = 64 * 1024
+
+
+class MoveJournal:
+    """Writer side of the journal, with group-committed fsyncs."""
+    
+    def __init__(self, path: str, group_size: int = DEFAULT_GROUP_SIZE, group_delay: float = DEFAULT_GROUP_DELAY):
+        self.path = path
+        self.group_size = max(1, group_size)
+        self.group_delay = group_delay
+        self.logged = 0
+        self._file = open(path, 'w', encoding='utf-8')
+    
+    def __enter__(self) -> "MoveJournal":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close(completed=exc_type is None)
+    
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def begin(self, **meta):
+        """Write the header record."""
+        meta.setdefault("started", datetime.now().isoformat())
+        self._write({"begin": meta})
+        self._sync()
+    
+    def log_ahead(self, moves: Iterable[Tuple[str, str, object]]) -> Iterator[Tuple[str, str, object]]:
+        """
+        Pipeline stage: journal (source, destination, tag) moves and pass them on.
+        
+        Moves are released downstream only after the group they belong to is
+        on disk. A group closes after group_size moves, or earlier when the
+        upstream is slow and group_delay seconds have passed.
+        """
+        group: List[Tuple[str, str, object]] = []
+        opened = 0.0
+        
+        for move in moves:
+            if not group:
+                opened = time.monotonic()
+            self._write({"src": move[0], "dst": move[1]})
+            group.append(move)
+            
+            if len(group) >= self.group_size or time.monotonic() - opened >= self.group_delay:
+                self._sync()
+                self.logged += len(group)
+                yield from group
+                group = []
+        
+        if group:
+            self._sync()
+            self.logged += len(group)
+            yield from group
+    
+    def close(self, completed: bool = True, moved: Optional[int] = None):
+        """Write the end marker (if completed), fsync and close."""
+        if self._file.closed:
+            return
+        if completed:
+            self._write({"end": {
+                "moved": self.logged if moved is None else moved,
+                "finished": datetime.now().isoformat()
+            }})
+        self._sync()
+        self._file.close()
+
+
+def _parse(line: str):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        # Torn final line from a crash mid-write
+        return None
+
+
+def _is_legacy(path: str) -> bool:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read(64).lstrip().startswith('[')
+
+
+def _legacy_moves(path: str) -> List[Tuple[str, str]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(source, dest) for source, dest in json.load(f)]
+
+
+def _lines_reversed(path: str) -> Iterator[str]:
+    """Yield the lines of a file last-to-first, reading fixed-size blocks from the end."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b""
+        while position > 0:
+            size = min(_READ_BLOCK, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size) + tail
+            lines = chunk.split(b"\n")
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode('utf-8')
+        if tail:
+            yield tail.decode('utf-8')
+
+
+def read_moves(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield journaled (source, destination) pairs in the order they were logged."""
+    if _is_legacy(path):
+        yield from _legacy_moves(path)
+        return
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = _parse(line)
+            if record and "src" in record:
+                yield record["src"], record["dst"]
+
+
+def read_moves_reversed(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield journaled (source, destination) pairs newest first, without loading the whole journal."""
+    if _is_legacy(path):
+        yield from reversed(_legacy_moves(path))
+        return
+    
+    for line in _lines_reversed(path):
+        record = _parse(line)
+        if record and "src" in record:
+            yield record["src"], record["dst"]
+
+
+def is_complete(path: str) -> bool:
+    """Whether the run that wrote the journal finished (legacy logs always did)."""
+    if _is_legacy(path):
+        return True
+    
+    for line in _lines_reversed(path):
+        record = _parse(line)
+        if record is not None:
+            return "end" in record
+    return False
+
+
+def pending_moves(path: str) -> Iterator[Tuple[str, str]]:
+    """Journaled moves that were not applied yet: the source is still there and the destination is free."""
+    for source, dest in read_moves(path):
+        if os.path.lexists(source) and not os.path.lexists(dest):
+            yield source, dest
+
+
+def mark_complete(path: str, moved: int):
+    """Append the end marker to a journal whose run was finished by a resume."""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"end": {"moved": moved, "finished": datetime.now().isoformat()}}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,320 @@
+"""
+Capture dates - when a photo was taken, read from its metadata headers
+
+Only the metadata is parsed, never the image data:
+
+    JPEG: segment headers up to the APP1 Exif segment (stops at the scan data)
+    TIFF and TIFF-based raw files: IFD0, then the Exif IFD it points to
+    PNG: chunk headers up to the eXIf chunk (stops at the first IDAT)
+    
+Every read is a pread of just the bytes needed, so a multi-megabyte photo
+costs a few small reads. DateTimeOriginal is preferred, then
+DateTimeDigitized, then the IFD0 DateTime. Files without a usable date, and
+files of other types, fall back to their modification time.
+
+Extraction runs on a thread pool. Results, including "no date", are cached
+in SQLite keyed by (device, inode, mtime_ns), so unchanged files are parsed
+once however many runs look at them.
+"""
+
+import os
+import struct
+import sqlite3
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from fileorg.scanner import ScanEntry
+
+DEFAULT_METADATA_WORKERS = min(16, (os.cpu_count() or 1) + 4)
+DEFAULT_METADATA_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "file-organizer",
+    "metadata.db"
+)
+DATE_SOURCES = ("mtime", "exif")
+
+# Extensions worth opening; everything else goes straight to its mtime
+METADATA_EXTENSIONS = frozenset({
+    ".jpg", ".jpeg", ".jpe", ".jfif", ".tif", ".tiff", ".png",
+    ".dng", ".nef", ".nrw", ".cr2", ".arw", ".sr2", ".orf", ".rw2", ".pef", ".srw", ".erf"
+})
+
+_TAG_DATETIME = 0x0132
+_TAG_EXIF_IFD = 0x8769
+_TAG_DATETIME_ORIGINAL = 0x9003
+_TAG_DATETIME_DIGITIZED = 0x9004
+_TYPE_ASCII = 2
+_MAX_IFD_ENTRIES = 1024
+_MAX_JPEG_SEGMENTS = 32
+_MAX_PNG_CHUNKS = 32
+# "YYYY:MM:DD HH:MM:SS" and its NUL; sizes in the file are not trusted beyond these
+_DATE_BYTES = 20
+_MAX_EXIF_CHUNK = 64 * 1024  # the most a JPEG APP1 segment can hold
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_BATCH_SIZE = 256
+_COMMIT_EVERY = 1000
+
+Reader = Callable[[int, int], bytes]
+
+
+def _signed(value: int) -> int:
+    """Map an unsigned 64-bit number (inode, device) into SQLite's signed integer range."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _parse_date(raw: bytes) -> Optional[float]:
+    """Timestamp of an Exif "YYYY:MM:DD HH:MM:SS" string (local time), or None."""
+    try:
+        return datetime.strptime(raw[:19].decode("ascii"), "%Y:%m:%d %H:%M:%S").timestamp()
+    except (UnicodeDecodeError, ValueError, OverflowError, OSError):
+        # Blank ("    :  :  ") and zeroed dates are common in camera output
+        return None
+
+
+def _read_ifd(read: Reader, order: str, offset: int) -> dict:
+    """tag -> (type, count, raw value field) of one IFD."""
+    count_bytes = read(offset, 2)
+    if len(count_bytes) < 2:
+        return {}
+    count = min(struct.unpack(order + "H", count_bytes)[0], _MAX_IFD_ENTRIES)
+    data = read(offset + 2, 12 * count)
+    entries = {}
+    for index in range(len(data) // 12):
+        tag, kind, items = struct.unpack_from(order + "HHI", data, index * 12)
+        entries[tag] = (kind, items, data[index * 12 + 8:index * 12 + 12])
+    return entries
+
+
+def _ifd_date(read: Reader, order: str, entries: dict, tag: int) -> Optional[float]:
+    entry = entries.get(tag)
+    if entry is None or entry[0] != _TYPE_ASCII or entry[1] < 19:
+        return None
+    _kind, items, value = entry
+    return _parse_date(read(struct.unpack(order + "I", value)[0], min(items, _DATE_BYTES)))
+
+
+def tiff_capture_time(read: Reader) -> Optional[float]:
+    """
+    Capture time from a TIFF structure (a TIFF file, or the body of an Exif block).
+    
+    read(offset, size) returns bytes at an offset from the TIFF header.
+    """
+    header = read(0, 8)
+    if header[:4] == b"II*\x00":
+        order = "<"
+    elif header[:4] == b"MM\x00*":
+        order = ">"
+    else:
+        return None
+    
+    ifd0 = _read_ifd(read, order, struct.unpack(order + "I", header[4:8])[0])
+    exif = ifd0.get(_TAG_EXIF_IFD)
+    if exif is not None:
+        entries = _read_ifd(read, order, struct.unpack(order + "I", exif[2])[0])
+        for tag in (_TAG_DATETIME_ORIGINAL, _TAG_DATETIME_DIGITIZED):
+            taken = _ifd_date(read, order, entries, tag)
+            if taken is not None:
+                return taken
+    return _ifd_date(read, order, ifd0, _TAG_DATETIME)
+
+
+def _from_buffer(data: bytes) -> Reader:
+    return lambda offset, size: data[offset:offset + size]
+
+
+def _jpeg_capture_time(pread: Reader) -> Optional[float]:
+    offset = 2
+    for _ in range(_MAX_JPEG_SEGMENTS):
+        header = pread(offset, 4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            offset += 1
+            continue
+        if marker in (0xD9, 0xDA):
+            # End of image, or start of scan: no metadata beyond this point
+            return None
+        length = struct.unpack(">H", header[2:4])[0]
+        if marker == 0xE1:
+            segment = pread(offset + 4, length - 2)
+            if segment.startswith(b"Exif\x00\x00"):
+                return tiff_capture_time(_from_buffer(segment[6:]))
+        offset += 2 + length
+    return None
+
+
+def _png_capture_time(pread: Reader) -> Optional[float]:
+    offset = len(_PNG_SIGNATURE)
+    for _ in range(_MAX_PNG_CHUNKS):
+        header = pread(offset, 8)
+        if len(header) < 8:
+            return None
+        length, kind = struct.unpack(">I4s", header)
+        if kind in (b"IDAT", b"IEND"):
+            return None
+        if kind == b"eXIf":
+            if length > _MAX_EXIF_CHUNK:
+                return None
+            return tiff_capture_time(_from_buffer(pread(offset + 8, length)))
+        offset += 12 + length
+    return None
+
+
+def read_capture_time(path: str) -> Optional[float]:
+    """Capture time of a JPEG, TIFF or PNG as a timestamp, or None if it records none."""
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    except OSError:
+        return None
+    try:
+        pread: Reader = lambda offset, size: os.pread(fd, size, offset)
+        head = pread(0, 8)
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_capture_time(pread)
+        if head == _PNG_SIGNATURE:
+            return _png_capture_time(pread)
+        return tiff_capture_time(pread)
+    except (OSError, struct.error, ValueError, MemoryError):
+        # A corrupt file falls back to its mtime rather than stopping the run
+        return None
+    finally:
+        os.close(fd)
+
+
+class MetadataCache:
+    """
+    Capture times in SQLite, keyed by (device, inode, mtime_ns).
+    
+    A NULL capture time records that a file has none, so it is not parsed
+    again either. One connection is shared by all threads, behind a lock.
+    """
+    
+    def __init__(self, path: str = DEFAULT_METADATA_CACHE_PATH):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS metadata ("
+            " dev INTEGER NOT NULL, ino INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+            " taken REAL,"
+            " PRIMARY KEY (dev, ino, mtime_ns)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+    
+    def __enter__(self) -> "MetadataCache":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    @staticmethod
+    def key(st: os.stat_result) -> Tuple[int, int, int]:
+        return _signed(st.st_dev), _signed(st.st_ino), st.st_mtime_ns
+    
+    def get(self, key: Tuple[int, int, int]) -> Tuple[bool, Optional[float]]:
+        """(found, capture time) for a key."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT taken FROM metadata WHERE dev = ? AND ino = ? AND mtime_ns = ?", key
+            ).fetchone()
+        return (True, row[0]) if row else (False, None)
+    
+    def put(self, key: Tuple[int, int, int], taken: Optional[float]):
+        """Store a capture time (None for a file without one)."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO metadata (dev, ino, mtime_ns, taken) VALUES (?, ?, ?, ?)", key + (taken,))
+            self._dirty += 1
+            if self._dirty >= _COMMIT_EVERY:
+                self._conn.commit()
+                self._dirty = 0
+    
+    def close(self):
+        """Commit pending writes and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+
+def capture_times(
+    entries: Iterable[ScanEntry],
+    cache: Optional[MetadataCache] = None,
+    workers: int = DEFAULT_METADATA_WORKERS
+) -> Iterator[Tuple[ScanEntry, float]]:
+    """
+    Pipeline stage: pair entries with their capture time, or their mtime
+    when they have none. Order is preserved; files that vanish are dropped.
+    
+    Entries are taken in batches and the uncached photos of a batch are
+    parsed in parallel.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="metadata") as pool:
+        batch: List[ScanEntry] = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) >= _BATCH_SIZE:
+                yield from _batch_times(pool, batch, cache)
+                batch = []
+        if batch:
+            yield from _batch_times(pool, batch, cache)
+
+
+def _batch_times(
+    pool: ThreadPoolExecutor,
+    batch: List[ScanEntry],
+    cache: Optional[MetadataCache]
+) -> List[Tuple[ScanEntry, float]]:
+    times: List[Optional[float]] = [None] * len(batch)
+    misses: List[Tuple[int, Tuple[int, int, int]]] = []
+    for index, entry in enumerate(batch):
+        if entry.suffix.lower() not in METADATA_EXTENSIONS:
+            continue
+        try:
+            key = MetadataCache.key(entry.stat())
+        except OSError:
+            continue
+        found, taken = cache.get(key) if cache is not None else (False, None)
+        if found:
+            times[index] = taken
+        else:
+            misses.append((index, key))
+    
+    if misses:
+        parsed = pool.map(read_capture_time, [batch[index].path for index, _key in misses])
+        for (index, key), taken in zip(misses, parsed):
+            if cache is not None:
+                cache.put(key, taken)
+            times[index] = taken
+    
+    paired = []
+    for entry, taken in zip(batch, times):
+        if taken is None:
+            try:
+                taken = entry.mtime
+            except OSError:
+                continue
+        paired.append((entry, taken))
+    return paired
+
+
+def classify_by_capture_date(
+    entries: Iterable[ScanEntry],
+    date_format: str = "%Y/%m",
+    cache: Optional[MetadataCache] = None,
+    workers: int = DEFAULT_METADATA_WORKERS
+) -> Iterator[Tuple[ScanEntry, str]]:
+    """Pair each entry with the date folder of its capture time (mtime if it has none)."""
+    for entry, taken in capture_times(entries, cache, workers):
+        yield entry, datetime.fromtimestamp(taken).strftime(date_format)
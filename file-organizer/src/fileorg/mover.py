@@ -0,0 +1,197 @@
+"""
+Move executor - renames on the same device, copies across devices in a thread pool
+"""
+
+import os
+import errno
+import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_WORKERS = 4
+COPY_CHUNK = 8 * 1024 * 1024
+
+
+class MoveResult:
+    """Outcome of one move; error is None on success."""
+    
+    __slots__ = ("source", "destination", "tag", "error")
+    
+    def __init__(self, source: str, destination: str, tag=None, error: Optional[BaseException] = None):
+        self.source = source
+        self.destination = destination
+        self.tag = tag
+        self.error = error
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+    
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"MoveResult({self.source!r} -> {self.destination!r}, {status})"
+
+
+def _copy_data(src_fd: int, dst_fd: int) -> int:
+    """
+    Copy file contents to the end of the source, in-kernel when possible:
+    copy_file_range, then sendfile, then read/write.
+    
+    An in-kernel copy that stops (some filesystems return 0 straight away,
+    and the file may have grown since it was stat'ed) is finished with
+    read/write from where it stopped, so nothing is left out.
+    
+    Returns:
+        Bytes copied
+    """
+    copied = 0
+    
+    if hasattr(os, "copy_file_range"):
+        try:
+            while True:
+                n = os.copy_file_range(src_fd, dst_fd, COPY_CHUNK)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP) or copied:
+                raise
+    
+    if not copied and hasattr(os, "sendfile"):
+        try:
+            while True:
+                n = os.sendfile(dst_fd, src_fd, copied, COPY_CHUNK)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EINVAL) or copied:
+                raise
+    
+    # sendfile leaves the source offset alone: carry on from what was copied
+    os.lseek(src_fd, copied, os.SEEK_SET)
+    os.lseek(dst_fd, copied, os.SEEK_SET)
+    while True:
+        chunk = os.read(src_fd, COPY_CHUNK)
+        if not chunk:
+            return copied
+        view = memoryview(chunk)
+        while view:
+            # A short write leaves the rest of the chunk to write again
+            view = view[os.write(dst_fd, view):]
+        copied += len(chunk)
+
+
+def copy_and_remove(source: str, destination: str):
+    """
+    Move a file across devices: zero-copy into a new file, copy metadata, then unlink the source.
+    
+    The source is only unlinked once the copy holds as many bytes as the
+    source has; otherwise the copy is removed and the source stays.
+    
+    Raises:
+        OSError: If the copy fails or comes out short
+    """
+    if os.path.islink(source):
+        # Recreate the link itself rather than copying what it points to
+        shutil.move(source, destination)
+        return
+    
+    src_fd = os.open(source, os.O_RDONLY)
+    try:
+        st = os.fstat(src_fd)
+        # O_EXCL: never clobber a file that appeared at the destination
+        dst_fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, st.st_mode & 0o7777)
+        try:
+            copied = _copy_data(src_fd, dst_fd)
+            size = os.fstat(src_fd).st_size
+            if copied != size:
+                raise OSError(errno.EIO, f"Copied {copied} of {size} bytes, source left in place", source)
+        except BaseException:
+            os.close(dst_fd)
+            os.unlink(destination)
+            raise
+        os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    
+    shutil.copystat(source, destination)
+    os.unlink(source)
+
+
+class MoveExecutor:
+    """
+    Applies moves with the cheapest primitive available.
+    
+    The device of each source/target directory is looked up once. Moves
+    within a device are a plain os.rename done inline; moves across devices
+    (e.g. a category folder symlinked to another mount) are copied by a
+    bounded thread pool. Results always come back in input order.
+    """
+    
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = max(1, workers)
+        self._devices: Dict[str, int] = {}
+        self._same_device: Dict[Tuple[str, str], bool] = {}
+    
+    def _device(self, directory: str) -> int:
+        dev = self._devices.get(directory)
+        if dev is None:
+            dev = self._devices[directory] = os.stat(directory).st_dev
+        return dev
+    
+    def same_device(self, source: str, destination: str) -> bool:
+        """Whether a rename from source to destination stays on one device (cached per directory pair)."""
+        key = (os.path.dirname(source), os.path.dirname(destination))
+        same = self._same_device.get(key)
+        if same is None:
+            same = self._same_device[key] = self._device(key[0]) == self._device(key[1])
+        return same
+    
+    def run(self, moves: Iterable[Tuple[str, str, object]]) -> Iterator[MoveResult]:
+        """
+        Apply (source, destination, tag) moves, yielding a MoveResult for each in input order.
+        
+        At most a few batches of cross-device copies are in flight at once,
+        so memory stays bounded however many moves are fed in.
+        """
+        max_pending = self.workers * 4
+        pending: deque = deque()
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mover") as pool:
+            for source, destination, tag in moves:
+                pending.append(self._submit(pool, source, destination, tag))
+                
+                # Hand back everything that is already finished, in order
+                while pending and (_done(pending[0]) or len(pending) > max_pending):
+                    yield _result(pending.popleft())
+            
+            while pending:
+                yield _result(pending.popleft())
+    
+    def _submit(self, pool: ThreadPoolExecutor, source: str, destination: str, tag):
+        try:
+            if self.same_device(source, destination):
+                try:
+                    os.rename(source, destination)
+                    return MoveResult(source, destination, tag)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+            future = pool.submit(copy_and_remove, source, destination)
+            return (future, MoveResult(source, destination, tag))
+        except OSError as e:
+            return MoveResult(source, destination, tag, e)
+
+
+def _done(item) -> bool:
+    return isinstance(item, MoveResult) or item[0].done()
+
+
+def _result(item) -> MoveResult:
+    if isinstance(item, MoveResult):
+        return item
+    future, result = item
+    result.error = future.exception()
+    return result
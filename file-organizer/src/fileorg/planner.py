@@ -0,0 +1,74 @@
+"""
+Destination planner - collision-free destination names without per-candidate stat calls
+"""
+
+import os
+from typing import Dict, Optional, Set, Tuple
+
+
+def directory_fingerprint(directory: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, inode) of a directory, or None if it does not exist."""
+    try:
+        st = os.stat(directory)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return st.st_mtime_ns, st.st_ino
+
+
+class _DirectoryIndex:
+    """Names present in (or already planned for) one target directory."""
+    
+    __slots__ = ("names", "counters", "fingerprint")
+    
+    def __init__(self, directory: str):
+        # Taken before listing so any later change to the directory is detectable
+        self.fingerprint = directory_fingerprint(directory)
+        try:
+            self.names: Set[str] = set(os.listdir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            self.names = set()
+        # (stem, suffix) -> next numeric suffix to try
+        self.counters: Dict[tuple, int] = {}
+    
+    def allocate(self, name: str) -> str:
+        if name not in self.names:
+            self.names.add(name)
+            return name
+        
+        stem, suffix = os.path.splitext(name)
+        counter = self.counters.get((stem, suffix), 1)
+        candidate = f"{stem}_{counter}{suffix}"
+        while candidate in self.names:
+            counter += 1
+            candidate = f"{stem}_{counter}{suffix}"
+        
+        self.names.add(candidate)
+        self.counters[(stem, suffix)] = counter + 1
+        return candidate
+
+
+class DestinationPlanner:
+    """
+    Hands out destination paths that never collide with existing files or
+    with each other.
+    
+    Each target directory is listed once, the first time a file is planned
+    into it. Every name handed out is reserved, so a plan never assigns the
+    same destination twice, and duplicate names get `name_1`, `name_2`, ...
+    from a per-stem counter instead of probing the filesystem for each
+    candidate.
+    """
+    
+    def __init__(self):
+        self._indexes: Dict[str, _DirectoryIndex] = {}
+    
+    def reserve(self, directory: str, name: str) -> str:
+        """Reserve a free name for `name` inside directory and return the full path."""
+        index = self._indexes.get(directory)
+        if index is None:
+            index = self._indexes[directory] = _DirectoryIndex(directory)
+        return os.path.join(directory, index.allocate(name))
+    
+    def fingerprints(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """Fingerprint of every target directory as it was when first listed."""
+        return {directory: index.fingerprint for directory, index in self._indexes.items()}
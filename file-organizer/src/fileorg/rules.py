@@ -0,0 +1,128 @@
+"""
+Category rules engine - compiles extension lists into a reverse lookup index
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+# Default file type categories
+DEFAULT_CATEGORIES = {
+    "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".webp", ".ico", ".tiff"],
+    "Documents": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".xls", ".xlsx", ".ppt", ".pptx"],
+    "Videos": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v"],
+    "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".wma", ".m4a", ".m4b"],
+    "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"],
+    "Code": [".py", ".js", ".java", ".cpp", ".c", ".h", ".cs", ".rb", ".go", ".rs", ".php"],
+    "Data": [".json", ".xml", ".csv", ".sql", ".db", ".sqlite"],
+    "Executables": [".exe", ".msi", ".dmg", ".pkg", ".deb", ".rpm", ".app"],
+    "Fonts": [".ttf", ".otf", ".woff", ".woff2"],
+    "Ebooks": [".epub", ".mobi", ".azw", ".azw3"],
+}
+
+FALLBACK_CATEGORY = "Others"
+
+
+class CategoryRules:
+    """
+    Compiled category configuration.
+    
+    Every extension maps to exactly one category through a dict lookup.
+    When several categories claim the same extension, the one listed first
+    in `priority` wins; unlisted categories rank after listed ones in
+    declaration order. Every such clash is recorded in `conflicts`; clashes
+    that were settled only by declaration order are also listed in
+    `ambiguous` so callers can warn about them.
+    """
+    
+    def __init__(self, categories: Dict[str, List[str]], priority: Optional[List[str]] = None):
+        self.categories = {name: [ext.lower() for ext in exts] for name, exts in categories.items()}
+        self.priority = list(priority or [])
+        
+        unknown = [name for name in self.priority if name not in self.categories]
+        if unknown:
+            raise ValueError(f"Priority lists unknown categories: {', '.join(unknown)}")
+        
+        ranked = self.priority + [name for name in self.categories if name not in self.priority]
+        rank = {name: i for i, name in enumerate(ranked)}
+        
+        self.index: Dict[str, str] = {}
+        claims: Dict[str, List[str]] = {}
+        for name, exts in self.categories.items():
+            for ext in exts:
+                claims.setdefault(ext, []).append(name)
+                current = self.index.get(ext)
+                if current is None or rank[name] < rank[current]:
+                    self.index[ext] = name
+        
+        self.conflicts: Dict[str, List[str]] = {
+            ext: sorted(names, key=rank.__getitem__)
+            for ext, names in claims.items() if len(names) > 1
+        }
+        self.ambiguous: Dict[str, List[str]] = {
+            ext: names for ext, names in self.conflicts.items()
+            if names[0] not in self.priority
+        }
+    
+    def categorize(self, file_ext: str) -> str:
+        """Return the category for an extension (including the dot)."""
+        return self.index.get(file_ext.lower(), FALLBACK_CATEGORY)
+    
+    def categorize_name(self, file_name: str) -> str:
+        """Return the category for a file name, using the same suffix rules as Path.suffix."""
+        return self.categorize(os.path.splitext(file_name)[1])
+    
+    def describe_conflicts(self, ambiguous_only: bool = True) -> List[str]:
+        """Human readable lines describing how conflicts were resolved."""
+        conflicts = self.ambiguous if ambiguous_only else self.conflicts
+        return [
+            f"'{ext}' is claimed by {', '.join(names)}; using {names[0]}"
+            for ext, names in sorted(conflicts.items())
+        ]
+    
+    @classmethod
+    def from_config(cls, config: dict) -> "CategoryRules":
+        """
+        Build rules from a parsed config.
+        
+        Accepts either the plain {category: [extensions]} mapping or
+        {"categories": {...}, "priority": [category, ...]}.
+        """
+        if isinstance(config.get("categories"), dict):
+            return cls(config["categories"], config.get("priority"))
+        return cls(config)
+
+
+DEFAULT_RULES = CategoryRules(DEFAULT_CATEGORIES)
+
+_cache: Dict[str, Tuple[int, int, CategoryRules]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_rules(config_path: Optional[str] = None) -> CategoryRules:
+    """
+    Load and compile a rules file, reusing the compiled form while the file is unchanged.
+    
+    The cache is keyed by the resolved path and validated with a single stat
+    (mtime and size), so calling this once per operation is cheap.
+    Returns DEFAULT_RULES when no path is given.
+    """
+    if not config_path:
+        return DEFAULT_RULES
+    
+    path = os.path.realpath(config_path)
+    st = os.stat(path)
+    
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+    
+    with open(path, 'r') as f:
+        rules = CategoryRules.from_config(json.load(f))
+    
+    with _cache_lock:
+        _cache[path] = (st.st_mtime_ns, st.st_size, rules)
+    return rules
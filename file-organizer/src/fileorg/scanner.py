@@ -0,0 +1,150 @@
+"""
+Streaming directory scanner - the first stage of the organize pipeline
+
+    scan_files -> classify_by_type / classify_by_date -> plan -> move
+    
+Each stage is a generator, so memory stays constant regardless of how many
+entries the directory holds. Entries come from os.scandir, which returns the
+file type with the directory listing; stat data is fetched at most once per
+entry and only by stages that need it.
+"""
+
+import os
+import stat
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
+
+from fileorg.rules import CategoryRules, FALLBACK_CATEGORY
+from fileorg.sniff import ContentSniffer, effective_extension
+
+
+class ScanEntry:
+    """A regular file found by scan_files, wrapping the underlying DirEntry."""
+    
+    __slots__ = ("entry", "name", "path")
+    
+    def __init__(self, entry: os.DirEntry):
+        self.entry = entry
+        self.name = entry.name
+        self.path = entry.path
+    
+    @property
+    def suffix(self) -> str:
+        """File extension including the dot, matching Path.suffix."""
+        return os.path.splitext(self.name)[1]
+    
+    def stat(self) -> os.stat_result:
+        """Stat result, cached by DirEntry after the first call."""
+        return self.entry.stat()
+    
+    @property
+    def inode(self) -> int:
+        """Inode number; comes with the directory listing on POSIX, no stat needed."""
+        return self.entry.inode()
+    
+    @property
+    def mtime(self) -> float:
+        return self.stat().st_mtime
+    
+    @property
+    def mtime_ns(self) -> int:
+        return self.stat().st_mtime_ns
+    
+    @property
+    def size(self) -> int:
+        return self.stat().st_size
+    
+    def __repr__(self) -> str:
+        return f"ScanEntry({self.path!r})"
+
+
+def scan_files(directory: str) -> Iterator[ScanEntry]:
+    """Yield the regular files directly inside directory (symlinks to files included)."""
+    with os.scandir(directory) as it:
+        for entry in it:
+            try:
+                if entry.is_file():
+                    yield ScanEntry(entry)
+            except OSError:
+                # Vanished or unreadable entry
+                continue
+
+
+class _PathEntry:
+    """Stand-in for os.DirEntry when only a path is known, e.g. a file reported by a watcher."""
+    
+    __slots__ = ("name", "path", "_stat")
+    
+    def __init__(self, path: str, stat_result: os.stat_result):
+        self.name = os.path.basename(path)
+        self.path = path
+        self._stat = stat_result
+    
+    def stat(self) -> os.stat_result:
+        return self._stat
+    
+    def inode(self) -> int:
+        return self._stat.st_ino
+
+
+def scan_paths(paths: Iterable[str]) -> Iterator[ScanEntry]:
+    """Yield the given paths that are (still) regular files, with one stat each."""
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            yield ScanEntry(_PathEntry(path, st))
+
+
+def classify_by_type(
+    entries: Iterator[ScanEntry],
+    rules: CategoryRules,
+    create_others: bool = True,
+    sniffer: Optional[ContentSniffer] = None
+) -> Iterator[Tuple[ScanEntry, str]]:
+    """
+    Pair each entry with its category, dropping uncategorized files unless create_others.
+    
+    With a sniffer, files whose content contradicts their extension (or that
+    have none) are categorized by what their first bytes say they are.
+    """
+    if sniffer is None:
+        sniffed = ((entry, None) for entry in entries)
+    else:
+        sniffed = sniffer.sniff_entries(entries)
+    for entry, signature in sniffed:
+        category = rules.categorize(effective_extension(entry.suffix, signature, rules))
+        if category == FALLBACK_CATEGORY and not create_others:
+            continue
+        yield entry, category
+
+
+def classify_by_date(
+    entries: Iterator[ScanEntry],
+    date_format: str = "%Y/%m"
+) -> Iterator[Tuple[ScanEntry, str]]:
+    """Pair each entry with the date folder derived from its modification time."""
+    for entry in entries:
+        try:
+            mtime = entry.mtime
+        except OSError:
+            continue
+        yield entry, datetime.fromtimestamp(mtime).strftime(date_format)
+
+
+class DirectoryMaker:
+    """Creates destination folders once per run instead of once per file."""
+    
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self._created = set()
+    
+    def ensure(self, directory: str) -> str:
+        """Create directory (and parents) if this run hasn't already; returns it."""
+        if directory not in self._created:
+            if not self.dry_run:
+                os.makedirs(directory, exist_ok=True)
+            self._created.add(directory)
+        return directory
@@ -0,0 +1,306 @@
+"""
+Content sniffing - file types from magic bytes instead of the extension
+
+Only the first SNIFF_BYTES of a file are read, with a single open + pread.
+Signatures are looked up in a table precompiled by first byte, so a head
+is compared against a handful of candidates rather than every signature.
+Results are cached per (device, inode, mtime), so a file is read once for
+as long as it is unchanged.
+
+The sniffed type only overrides an extension that is missing or that
+belongs to another sniffed type: a .png that is really a JPEG, or a
+download saved without an extension, is filed by what it contains. Any
+other extension is kept, so formats built on zip, PDF or OLE (.pages,
+.docm, .ai) and text that happens to start like a binary format ("MZ..."
+notes, "BZh," columns) stay what their extension says.
+"""
+
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from fileorg.rules import CategoryRules
+
+SNIFF_BYTES = 512
+DEFAULT_SNIFF_WORKERS = 8
+DEFAULT_CACHE_SIZE = 65536
+_BATCH_SIZE = 64
+
+# Categories of text formats, which magic bytes never override
+TEXT_CATEGORIES = frozenset({"Code", "Data"})
+
+
+class Signature:
+    """A file type recognized by (offset, bytes) parts that must all match, and an optional check of the head."""
+    
+    __slots__ = ("parts", "mime", "extensions", "check")
+    
+    def __init__(
+        self,
+        parts: Sequence[Tuple[int, bytes]],
+        mime: str,
+        extensions: Sequence[str],
+        check: Optional[Callable[[bytes], bool]] = None
+    ):
+        self.parts = tuple(parts)
+        self.mime = mime
+        # The first one is canonical; all of them are consistent with the content
+        self.extensions = tuple(extensions)
+        # For formats whose fixed bytes are too short to tell them from text
+        self.check = check
+    
+    @property
+    def extension(self) -> str:
+        return self.extensions[0]
+    
+    def matches(self, head: bytes) -> bool:
+        if not all(head[offset:offset + len(magic)] == magic for offset, magic in self.parts):
+            return False
+        return self.check is None or self.check(head)
+    
+    def __repr__(self) -> str:
+        return f"Signature({self.mime!r})"
+
+
+def _sig(
+    magic: bytes,
+    mime: str,
+    *extensions: str,
+    offset: int = 0,
+    then: Sequence[Tuple[int, bytes]] = (),
+    check: Optional[Callable[[bytes], bool]] = None
+) -> Signature:
+    return Signature(((offset, magic),) + tuple(then), mime, extensions, check)
+
+
+def _has_pe_header(head: bytes) -> bool:
+    """Whether the DOS header's e_lfanew (at 0x3c) points to a PE signature within the head."""
+    if len(head) < 0x40:
+        return False
+    offset = int.from_bytes(head[0x3c:0x40], "little")
+    return head[offset:offset + 4] == b"PE\x00\x00"
+
+
+def _has_bzip2_level(head: bytes) -> bool:
+    """Whether the byte after "BZh" is a block size, 1-9."""
+    return head[3:4].isdigit() and head[3:4] != b"0"
+
+
+_ZIP_BASED = (".zip", ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".epub", ".jar", ".apk", ".whl", ".xpi")
+_MP4_BASED = (".mp4", ".m4v", ".mov", ".m4a", ".m4b", ".3gp", ".heic", ".avif")
+
+# More specific signatures (more bytes to match) come before the generic ones they refine
+SIGNATURES: List[Signature] = [
+    # Images
+    _sig(b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    _sig(b"\xff\xd8\xff", "image/jpeg", ".jpg", ".jpeg", ".jpe", ".jfif"),
+    _sig(b"GIF87a", "image/gif", ".gif"),
+    _sig(b"GIF89a", "image/gif", ".gif"),
+    _sig(b"RIFF", "image/webp", ".webp", then=[(8, b"WEBP")]),
+    _sig(b"II*\x00", "image/tiff", ".tiff", ".tif"),
+    _sig(b"MM\x00*", "image/tiff", ".tiff", ".tif"),
+    _sig(b"\x00\x00\x01\x00", "image/vnd.microsoft.icon", ".ico"),
+    _sig(b"ftyp", "image/heic", ".heic", ".heif", offset=4, then=[(8, b"heic")]),
+    _sig(b"ftyp", "image/heic", ".heic", ".heif", offset=4, then=[(8, b"mif1")]),
+    _sig(b"ftyp", "image/avif", ".avif", offset=4, then=[(8, b"avif")]),
+    # Documents
+    _sig(b"%PDF-", "application/pdf", ".pdf"),
+    _sig(b"{\\rtf", "application/rtf", ".rtf"),
+    _sig(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage", ".doc", ".xls", ".ppt", ".msi", ".msg"),
+    # Ebooks
+    _sig(b"PK\x03\x04", "application/epub+zip", ".epub", then=[(30, b"mimetypeapplication/epub+zip")]),
+    _sig(b"BOOKMOBI", "application/x-mobipocket-ebook", ".mobi", ".azw", ".azw3", offset=60),
+    # Archives
+    _sig(b"PK\x03\x04", "application/zip", *_ZIP_BASED),
+    _sig(b"PK\x05\x06", "application/zip", *_ZIP_BASED),
+    _sig(b"Rar!\x1a\x07", "application/vnd.rar", ".rar"),
+    _sig(b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed", ".7z"),
+    # Deflate is the only gzip compression method
+    _sig(b"\x1f\x8b\x08", "application/gzip", ".gz", ".tgz"),
+    # Block size digit, then the first block's magic (pi)
+    _sig(b"BZh", "application/x-bzip2", ".bz2", ".tbz2", then=[(4, b"1AY&SY")], check=_has_bzip2_level),
+    _sig(b"\xfd7zXZ\x00", "application/x-xz", ".xz", ".txz"),
+    _sig(b"ustar", "application/x-tar", ".tar", offset=257),
+    # Audio
+    _sig(b"ID3", "audio/mpeg", ".mp3"),
+    _sig(b"fLaC", "audio/flac", ".flac"),
+    _sig(b"OggS", "audio/ogg", ".ogg", ".oga", ".opus", ".ogv"),
+    _sig(b"RIFF", "audio/wav", ".wav", then=[(8, b"WAVE")]),
+    _sig(b"ftyp", "audio/mp4", ".m4a", offset=4, then=[(8, b"M4A ")]),
+    _sig(b"ftyp", "audio/mp4", ".m4b", offset=4, then=[(8, b"M4B ")]),
+    # Video
+    _sig(b"RIFF", "video/x-msvideo", ".avi", then=[(8, b"AVI ")]),
+    _sig(b"ftyp", "video/quicktime", ".mov", offset=4, then=[(8, b"qt  ")]),
+    _sig(b"ftyp", "video/mp4", *_MP4_BASED, offset=4),
+    _sig(b"\x1aE\xdf\xa3", "video/x-matroska", ".mkv", ".webm", ".mka"),
+    _sig(b"FLV\x01", "video/x-flv", ".flv"),
+    _sig(b"0&\xb2u\x8ef\xcf\x11", "video/x-ms-asf", ".wmv", ".wma", ".asf"),
+    # Executables and packages
+    _sig(b"!<arch>\ndebian", "application/vnd.debian.binary-package", ".deb"),
+    _sig(b"\xed\xab\xee\xdb", "application/x-rpm", ".rpm"),
+    _sig(b"MZ", "application/vnd.microsoft.portable-executable", ".exe", ".dll", ".sys", ".scr", check=_has_pe_header),
+    # Data
+    _sig(b"SQLite format 3\x00", "application/vnd.sqlite3", ".sqlite", ".db", ".sqlite3"),
+    # Fonts
+    _sig(b"wOFF", "font/woff", ".woff"),
+    _sig(b"wOF2", "font/woff2", ".woff2"),
+    _sig(b"OTTO", "font/otf", ".otf"),
+    _sig(b"\x00\x01\x00\x00\x00", "font/ttf", ".ttf"),
+]
+
+
+def _compile(signatures: Sequence[Signature]) -> Tuple[Dict[int, List[Signature]], List[Signature]]:
+    """Prefix table: signatures anchored at offset 0 by first byte, plus the ones that are not."""
+    by_first_byte: Dict[int, List[Signature]] = defaultdict(list)
+    elsewhere: List[Signature] = []
+    for signature in signatures:
+        offset, magic = signature.parts[0]
+        if offset == 0:
+            by_first_byte[magic[0]].append(signature)
+        else:
+            elsewhere.append(signature)
+    return dict(by_first_byte), elsewhere
+
+
+_BY_FIRST_BYTE, _ELSEWHERE = _compile(SIGNATURES)
+
+# Extensions of formats with a signature, the only ones content can contradict
+_SNIFFABLE = frozenset(ext for signature in SIGNATURES for ext in signature.extensions)
+
+
+def match_signature(head: bytes) -> Optional[Signature]:
+    """The signature the head of a file matches, or None (plain text, unknown formats)."""
+    if not head:
+        return None
+    for signature in _BY_FIRST_BYTE.get(head[0], ()):
+        if signature.matches(head):
+            return signature
+    for signature in _ELSEWHERE:
+        if signature.matches(head):
+            return signature
+    return None
+
+
+def read_head(path: str, size: int = SNIFF_BYTES) -> bytes:
+    """First bytes of a file with one open and one pread."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    try:
+        if hasattr(os, "pread"):
+            return os.pread(fd, size, 0)
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+
+def effective_extension(suffix: str, signature: Optional[Signature], rules: Optional[CategoryRules] = None) -> str:
+    """
+    Extension to categorize a file by: its own, unless the content says
+    otherwise.
+    
+    Only a missing extension, or one of another sniffed type (a .png holding
+    a JPEG), is replaced. Extensions without a signature (.pages, .docm,
+    .txt) and those the rules file under TEXT_CATEGORIES are kept whatever
+    the file starts with.
+    """
+    if signature is None or suffix.lower() in signature.extensions:
+        return suffix
+    if suffix:
+        if suffix.lower() not in _SNIFFABLE:
+            return suffix
+        if rules is not None and rules.categorize(suffix) in TEXT_CATEGORIES:
+            return suffix
+    return signature.extension
+
+
+class ContentSniffer:
+    """
+    Sniffs file types, caching results by (device, inode, mtime_ns).
+    
+    Safe to share between threads; the cache is a bounded LRU.
+    """
+    
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE, workers: int = DEFAULT_SNIFF_WORKERS):
+        self.cache_size = cache_size
+        self.workers = workers
+        self._cache: "OrderedDict[Tuple[int, int, int], Optional[Signature]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(st: os.stat_result) -> Tuple[int, int, int]:
+        return st.st_dev, st.st_ino, st.st_mtime_ns
+    
+    def _cached(self, key: Tuple[int, int, int]):
+        with self._lock:
+            if key not in self._cache:
+                return False, None
+            self._cache.move_to_end(key)
+            return True, self._cache[key]
+    
+    def _store(self, key: Tuple[int, int, int], signature: Optional[Signature]):
+        with self._lock:
+            self._cache[key] = signature
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _read(self, path: str) -> Optional[Signature]:
+        try:
+            return match_signature(read_head(path))
+        except OSError:
+            return None
+    
+    def sniff(self, path: str, st: Optional[os.stat_result] = None) -> Optional[Signature]:
+        """
+        Signature of one file, or None if it has no recognizable one.
+        
+        st (the file's stat) spares a stat call when the caller has it.
+        """
+        try:
+            key = self._key(st or os.stat(path))
+        except OSError:
+            return None
+        hit, signature = self._cached(key)
+        if hit:
+            return signature
+        signature = self._read(path)
+        self._store(key, signature)
+        return signature
+    
+    def sniff_entries(self, entries: Iterable, batch_size: int = _BATCH_SIZE) -> Iterator[Tuple[object, Optional[Signature]]]:
+        """
+        Pipeline stage: pair scan entries with their signatures, in order.
+        
+        Entries are taken in batches; the uncached ones of a batch are read
+        in parallel, which keeps many small reads in flight on slow disks.
+        """
+        batch: List = []
+        with ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="sniff") as pool:
+            for entry in entries:
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    yield from self._sniff_batch(pool, batch)
+                    batch = []
+            if batch:
+                yield from self._sniff_batch(pool, batch)
+    
+    def _sniff_batch(self, pool: ThreadPoolExecutor, batch: List) -> List[Tuple[object, Optional[Signature]]]:
+        signatures: List[Optional[Signature]] = [None] * len(batch)
+        misses: List[Tuple[int, Tuple[int, int, int]]] = []
+        for index, entry in enumerate(batch):
+            try:
+                key = self._key(entry.stat())
+            except OSError:
+                continue
+            hit, signature = self._cached(key)
+            if hit:
+                signatures[index] = signature
+            else:
+                misses.append((index, key))
+        
+        if misses:
+            found = pool.map(self._read, [batch[index].path for index, _key in misses])
+            for (index, key), signature in zip(misses, found):
+                self._store(key, signature)
+                signatures[index] = signature
+        return list(zip(batch, signatures))
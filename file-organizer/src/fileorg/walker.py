@@ -0,0 +1,248 @@
+"""
+Parallel tree walker - the recursive counterpart of scanner.scan_files
+
+Directories are scanned by a pool of threads, each owning a deque of
+directories still to list. A thread takes its own newest directory first
+(depth-first, so pending work stays proportional to tree depth rather than
+width) and, when it runs dry, steals the oldest directory of another thread
+(the biggest remaining subtrees). os.scandir and the per-entry type checks
+release the GIL, so on NFS or fast NVMe, where latency rather than CPU
+dominates, the threads keep many listings in flight at once.
+
+Files are handed to the consumer in small batches through a bounded queue;
+when the consumer (planning and moving) falls behind, the walkers block, so
+memory stays bounded however large the tree is.
+"""
+
+import os
+import sys
+import queue
+import fnmatch
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from fileorg.rules import CategoryRules, FALLBACK_CATEGORY
+from fileorg.scanner import ScanEntry, scan_files
+
+DEFAULT_WALK_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+BATCH_SIZE = 256
+MAX_PENDING_BATCHES = 64
+
+_DONE = object()
+_IDLE_WAIT = 0.05
+
+# (path, path relative to the root, depth)
+_Directory = Tuple[str, str, int]
+
+
+def is_excluded(name: str, relpath: str, patterns: Sequence[str]) -> bool:
+    """Whether a file or directory matches an exclude glob, by name or by path relative to the root."""
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relpath, pattern) for pattern in patterns)
+
+
+def category_folders(rules: CategoryRules) -> Set[str]:
+    """Folder names organize_by_type creates, to be skipped when walking recursively."""
+    return set(rules.categories) | {FALLBACK_CATEGORY}
+
+
+def is_date_folder(name: str, date_format: str = "%Y/%m") -> bool:
+    """Whether a top-level folder name looks like one organize_by_date creates."""
+    top = date_format.split("/")[0]
+    try:
+        datetime.strptime(name, top)
+    except ValueError:
+        return False
+    return True
+
+
+class _TreeWalk:
+    """One walk: per-thread deques with stealing, a bounded output queue and a termination count."""
+    
+    def __init__(
+        self,
+        root: str,
+        max_depth: Optional[int],
+        exclude: Sequence[str],
+        skip_dir: Optional[Callable[[str], bool]],
+        workers: int,
+        max_pending: int
+    ):
+        self.root = root
+        self.max_depth = sys.maxsize if max_depth is None else max_depth
+        self.exclude = list(exclude)
+        self.skip_dir = skip_dir
+        self.output: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self.deques: List[deque] = [deque() for _ in range(max(1, workers))]
+        self.cond = threading.Condition()
+        self.outstanding = 0
+        self.finished = False
+        self.stopped = False
+        self.threads: List[threading.Thread] = []
+    
+    def start(self):
+        self._push(0, (self.root, "", 0))
+        for index in range(len(self.deques)):
+            thread = threading.Thread(target=self._run, args=(index,), name=f"walker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    
+    def stop(self):
+        """Stop the walkers and wait for them, unblocking any stuck on the full queue."""
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        for thread in self.threads:
+            while thread.is_alive():
+                self._drain()
+                thread.join(_IDLE_WAIT)
+        self._drain()
+    
+    def _drain(self):
+        try:
+            while True:
+                self.output.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def _push(self, index: int, directory: _Directory):
+        with self.cond:
+            self.outstanding += 1
+            self.deques[index].append(directory)
+            self.cond.notify()
+    
+    def _take(self, index: int) -> Optional[_Directory]:
+        """Own newest directory, else the oldest one stolen from another thread; None when the walk is over."""
+        count = len(self.deques)
+        while True:
+            try:
+                return self.deques[index].pop()
+            except IndexError:
+                pass
+            for offset in range(1, count):
+                try:
+                    return self.deques[(index + offset) % count].popleft()
+                except IndexError:
+                    continue
+            with self.cond:
+                if self.finished or self.stopped:
+                    return None
+                self.cond.wait(_IDLE_WAIT)
+    
+    def _emit(self, item) -> bool:
+        """Put a batch on the output queue, waiting while it is full; False once stopped."""
+        while not self.stopped:
+            try:
+                self.output.put(item, timeout=_IDLE_WAIT)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _run(self, index: int):
+        while True:
+            directory = self._take(index)
+            if directory is None:
+                return
+            try:
+                self._scan(index, directory)
+            except Exception as e:
+                # From skip_dir or the like: hand it to the consumer, which raises it
+                self._emit(e)
+            finally:
+                with self.cond:
+                    self.outstanding -= 1
+                    last = self.outstanding == 0
+                    if last:
+                        self.finished = True
+                        self.cond.notify_all()
+            if last:
+                self._emit(_DONE)
+    
+    def _scan(self, index: int, directory: _Directory):
+        path, relpath, depth = directory
+        batch: List[ScanEntry] = []
+        
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if self.stopped:
+                        return
+                    rel = f"{relpath}/{entry.name}" if relpath else entry.name
+                    if self.exclude and is_excluded(entry.name, rel, self.exclude):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth >= self.max_depth:
+                                continue
+                            if depth == 0 and self.skip_dir is not None and self.skip_dir(entry.name):
+                                continue
+                            self._push(index, (entry.path, rel, depth + 1))
+                        elif entry.is_file():
+                            batch.append(ScanEntry(entry))
+                            if len(batch) >= BATCH_SIZE:
+                                if not self._emit(batch):
+                                    return
+                                batch = []
+                    except OSError:
+                        # Vanished or unreadable entry
+                        continue
+        except OSError:
+            # Unreadable directory; the rest of the tree is still walked
+            pass
+        
+        if batch:
+            self._emit(batch)
+
+
+def walk_files(
+    root: str,
+    max_depth: Optional[int] = None,
+    exclude: Iterable[str] = (),
+    skip_dir: Optional[Callable[[str], bool]] = None,
+    workers: int = DEFAULT_WALK_WORKERS,
+    max_pending: int = MAX_PENDING_BATCHES
+) -> Iterator[ScanEntry]:
+    """
+    Yield the regular files under root, walking subdirectories in parallel.
+    
+    max_depth limits how many directory levels below root are entered
+    (0 is the same as scan_files; None is unlimited). exclude globs are
+    matched against names and root-relative paths and prune directories.
+    skip_dir is asked about each top-level directory, to leave out the
+    folders an organize run creates. Symlinked directories are not followed.
+    Files come out in no particular order. An exception raised while walking
+    (by skip_dir, say) is raised here and stops the walk.
+    """
+    walk = _TreeWalk(root, max_depth, tuple(exclude), skip_dir, workers, max_pending)
+    walk.start()
+    try:
+        while True:
+            batch = walk.output.get()
+            if batch is _DONE:
+                return
+            if isinstance(batch, Exception):
+                raise batch
+            yield from batch
+    finally:
+        walk.stop()
+
+
+def scan_tree(
+    root: str,
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    exclude: Iterable[str] = (),
+    skip_dir: Optional[Callable[[str], bool]] = None,
+    workers: int = DEFAULT_WALK_WORKERS
+) -> Iterator[ScanEntry]:
+    """Scan stage for both modes: scan_files for the top level only, walk_files for the whole tree."""
+    exclude = tuple(exclude)
+    if recursive:
+        return walk_files(root, max_depth, exclude, skip_dir, workers)
+    
+    entries = scan_files(root)
+    if not exclude:
+        return entries
+    return (entry for entry in entries if not is_excluded(entry.name, entry.name, exclude))
@@ -0,0 +1,249 @@
+"""
+Directory watcher - hands out files as they finish arriving in a directory
+
+On Linux the watcher sits on inotify (through ctypes, so no extra
+dependency) and sleeps in select() until the kernel reports something; an
+idle directory costs nothing. A file is only considered once it is complete:
+its writer closed it (IN_CLOSE_WRITE) or it was renamed into place
+(IN_MOVED_TO, which is how browsers finish downloads). Bursts are debounced
+per file: a file is handed out once it has been quiet for `debounce`
+seconds, and everything that is ready at the same moment goes out as one
+micro-batch.
+
+Elsewhere, or when inotify cannot be set up (e.g. the watch limit is
+reached), the watcher falls back to polling: the directory is stat'ed every
+`poll_interval` seconds, listed only when its mtime changed, and a file is
+handed out once its size and mtime held still across two polls.
+"""
+
+import os
+import sys
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from fileorg.scanner import scan_files
+
+DEFAULT_DEBOUNCE = 0.25
+DEFAULT_POLL_INTERVAL = 2.0
+
+# inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_GONE = IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+_EVENT = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+def _inotify_libc():
+    """libc with the inotify calls, or None where they do not exist."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    """
+    Watch one directory (not its subdirectories) for files to organize.
+    
+    batches() yields lists of paths until stop() is called, from any thread,
+    or the directory itself goes away. Files already in the directory are
+    not reported; organize them once after starting the watcher.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        debounce: float = DEFAULT_DEBOUNCE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        use_inotify: bool = True
+    ):
+        self.directory = os.path.abspath(directory)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._fd: Optional[int] = None
+        
+        libc = _inotify_libc() if use_inotify else None
+        if libc is not None:
+            self._fd = self._add_watch(libc)
+        
+        # Polling needs a baseline so that files present now are not reported
+        self._polled: Dict[str, Tuple[int, int]] = {} if self._fd is not None else self._listing()
+        self._polled_fingerprint = None if self._fd is not None else self._fingerprint()
+    
+    @property
+    def backend(self) -> str:
+        """"inotify" or "polling"."""
+        return "inotify" if self._fd is not None else "polling"
+    
+    def _add_watch(self, libc) -> Optional[int]:
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(self.directory), _WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                raise OSError(err, os.strerror(err), self.directory)
+            # ENOSPC (out of watches) and friends: poll instead
+            return None
+        return fd
+    
+    def __enter__(self) -> "DirectoryWatcher":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def stop(self):
+        """Make batches() return; safe to call from another thread or a signal handler."""
+        self._stopped.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+    
+    def close(self):
+        """Stop and release the inotify descriptor."""
+        self.stop()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = None
+    
+    def batches(self) -> Iterator[List[str]]:
+        """Yield micro-batches of paths of complete files, oldest first within a batch."""
+        if self._fd is not None:
+            return self._inotify_batches()
+        return self._polling_batches()
+    
+    def _wait(self, fds: List[int], timeout: Optional[float]) -> List[int]:
+        try:
+            ready, _, _ = select.select(fds + [self._wake_r], [], [], timeout)
+        except InterruptedError:
+            return []
+        return ready
+    
+    def _read_events(self) -> Iterator[Tuple[int, str]]:
+        """Drain the inotify queue as (mask, name) pairs."""
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                yield mask, os.fsdecode(name)
+    
+    def _inotify_batches(self) -> Iterator[List[str]]:
+        # name -> monotonic time of its last completed write
+        pending: Dict[str, float] = {}
+        
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(pending.values()) + self.debounce - now)
+            
+            if self._fd in self._wait([self._fd], timeout):
+                for mask, name in self._read_events():
+                    if mask & _GONE:
+                        return
+                    if mask & IN_Q_OVERFLOW:
+                        # Events were dropped; whatever is in the directory now is a candidate
+                        now = time.monotonic()
+                        for entry in scan_files(self.directory):
+                            pending[entry.name] = now
+                        continue
+                    if mask & IN_ISDIR or not name:
+                        continue
+                    if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        pending[name] = time.monotonic()
+                    elif mask & (IN_MOVED_FROM | IN_DELETE):
+                        pending.pop(name, None)
+            
+            now = time.monotonic()
+            ready = [name for name, when in pending.items() if now - when >= self.debounce]
+            if ready and not self._stopped.is_set():
+                for name in ready:
+                    del pending[name]
+                yield [os.path.join(self.directory, name) for name in ready]
+    
+    def _fingerprint(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.directory)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_ino
+    
+    def _listing(self) -> Dict[str, Tuple[int, int]]:
+        """name -> (size, mtime_ns) of the files in the directory."""
+        listing = {}
+        try:
+            for entry in scan_files(self.directory):
+                try:
+                    listing[entry.name] = (entry.size, entry.mtime_ns)
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        return listing
+    
+    def _polling_batches(self) -> Iterator[List[str]]:
+        # Files seen changing, waiting for their size and mtime to hold still
+        settling: Dict[str, Tuple[int, int]] = {}
+        
+        while not self._stopped.is_set():
+            self._wait([], self.poll_interval)
+            if self._stopped.is_set():
+                return
+            
+            fingerprint = self._fingerprint()
+            if fingerprint is None:
+                return
+            # Appending to a file does not touch the directory, so keep listing while files settle
+            if fingerprint == self._polled_fingerprint and not settling:
+                continue
+            self._polled_fingerprint = fingerprint
+            
+            listing = self._listing()
+            ready = [name for name, state in settling.items() if listing.get(name) == state]
+            settling = {
+                name: state for name, state in listing.items()
+                if name not in ready and (name in settling or self._polled.get(name) != state)
+            }
+            self._polled = listing
+            if ready:
+                yield [os.path.join(self.directory, name) for name in ready]
@@ -6,162 +6,381 @@ Author: Built with AI assistance
 
 import os
 import sys
-import json
-import shutil
+import signal
 import argparse
+import itertools
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterator, List, Tuple, Optional
 from collections import defaultdict
 
+from fileorg.dedup import DEDUP_MODES, DEFAULT_CACHE_PATH, HashCache, match_duplicates, relink
+from fileorg.rules import DEFAULT_CATEGORIES, DEFAULT_RULES, CategoryRules, load_rules
+from fileorg.mover import DEFAULT_WORKERS, MoveExecutor
+from fileorg.metadata import DATE_SOURCES, DEFAULT_METADATA_CACHE_PATH, MetadataCache, classify_by_capture_date
+from fileorg.journal import MoveJournal, is_complete, mark_complete, pending_moves
+from fileorg.planner import DestinationPlanner
+from fileorg.sniff import ContentSniffer
+from fileorg.scanner import ScanEntry, DirectoryMaker, classify_by_type, classify_by_date, scan_paths
+from fileorg.walker import DEFAULT_WALK_WORKERS, category_folders, is_date_folder, is_excluded, scan_tree
+from fileorg.watcher import DEFAULT_DEBOUNCE, DirectoryWatcher
+
 
 class FileOrganizer:
     """Main class for organizing files in a directory."""
     
     # Default file type categories
-    DEFAULT_CATEGORIES = {
-        "Images": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".svg", ".webp", ".ico", ".tiff"],
-        "Documents": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".xls", ".xlsx", ".ppt", ".pptx"],
-        "Videos": [".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm", ".m4v"],
-        "Audio": [".mp3", ".wav", ".flac", ".aac", ".ogg", ".wma", ".m4a"],
-        "Archives": [".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"],
-        "Code": [".py", ".js", ".java", ".cpp", ".c", ".h", ".cs", ".rb", ".go", ".rs", ".php"],
-        "Data": [".json", ".xml", ".csv", ".sql", ".db", ".sqlite"],
-        "Executables": [".exe", ".msi", ".dmg", ".pkg", ".deb", ".rpm", ".app"],
-        "Fonts": [".ttf", ".otf", ".woff", ".woff2"],
-        "Ebooks": [".epub", ".mobi", ".azw", ".azw3"],
-    }
-    
-    def __init__(self, config_path: Optional[str] = None, dry_run: bool = False):
+    DEFAULT_CATEGORIES = DEFAULT_CATEGORIES
+    
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        dry_run: bool = False,
+        workers: int = DEFAULT_WORKERS,
+        journal_path: str = "organize_undo.log",
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        exclude: Optional[List[str]] = None,
+        dedup: Optional[str] = None,
+        hash_cache: str = DEFAULT_CACHE_PATH,
+        sniff: bool = False,
+        date_source: str = "mtime",
+        metadata_cache: str = DEFAULT_METADATA_CACHE_PATH
+    ):
         """Initialize the organizer with optional custom config."""
         self.dry_run = dry_run
-        self.categories = self._load_config(config_path) if config_path else self.DEFAULT_CATEGORIES
-        self.move_log: List[Tuple[str, str]] = []
+        self.workers = workers
+        self.journal_path = journal_path
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.exclude = exclude or []
+        self.dedup = dedup
+        self.hash_cache = hash_cache
+        self.sniffer = ContentSniffer() if sniff else None
+        self.date_source = date_source
+        self.metadata_cache = metadata_cache
+        self.rules = self._load_config(config_path) if config_path else DEFAULT_RULES
+        self.moved = 0
+        self._journal: Optional[MoveJournal] = None
+        # Source -> destination of this run's moves, kept only for --dedup link
+        self._placed: Dict[str, str] = {}
         
-    def _load_config(self, config_path: str) -> Dict[str, List[str]]:
-        """Load custom configuration from JSON file."""
+    def _load_config(self, config_path: str) -> CategoryRules:
+        """Load and compile custom configuration from JSON file."""
         try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            rules = load_rules(config_path)
         except Exception as e:
             print(f"Warning: Could not load config {config_path}: {e}")
             print("Using default categories instead.")
-            return self.DEFAULT_CATEGORIES
+            return DEFAULT_RULES
+        
+        for line in rules.describe_conflicts():
+            print(f"Warning: {line}")
+        return rules
     
     def _get_category(self, file_ext: str) -> str:
         """Determine the category for a file based on its extension."""
-        file_ext = file_ext.lower()
-        for category, extensions in self.categories.items():
-            if file_ext in extensions:
-                return category
-        return "Others"
-    
-    def _get_safe_destination(self, dest_path: Path) -> Path:
-        """Generate a safe destination path, handling duplicates."""
-        if not dest_path.exists():
-            return dest_path
-        
-        # File exists, add number suffix
-        stem = dest_path.stem
-        suffix = dest_path.suffix
-        parent = dest_path.parent
-        counter = 1
-        
-        while True:
-            new_name = f"{stem}_{counter}{suffix}"
-            new_path = parent / new_name
-            if not new_path.exists():
-                return new_path
-            counter += 1
+        return self.rules.categorize(file_ext)
     
-    def organize_by_type(self, source_dir: str, create_others: bool = True) -> Dict[str, int]:
-        """Organize files in source_dir by their file type."""
-        source_path = Path(source_dir).resolve()
+    def _scan(self, source_path: Path, skip_dir: Callable[[str], bool]) -> Iterator[ScanEntry]:
+        """
+        Scan stage: the files to organize, never including our own journal.
         
-        if not source_path.exists() or not source_path.is_dir():
-            raise ValueError(f"Invalid source directory: {source_dir}")
+        Recursive runs walk the tree in parallel and leave out the top-level
+        folders skip_dir recognizes as output of a previous run.
+        """
+        journal = os.path.abspath(self.journal_path)
+        entries = scan_tree(
+            str(source_path),
+            recursive=self.recursive,
+            max_depth=self.max_depth,
+            exclude=self.exclude,
+            skip_dir=skip_dir,
+            workers=DEFAULT_WALK_WORKERS
+        )
+        return (entry for entry in entries if entry.path != journal)
+    
+    def _plan(self, classified: Iterator[Tuple[ScanEntry, str]], source_path: Path) -> Iterator[Tuple[ScanEntry, str, str]]:
+        """Plan stage: reserve a collision-free destination for each classified entry."""
+        dirs = DirectoryMaker(self.dry_run)
+        planner = DestinationPlanner()
+        for entry, folder in classified:
+            target_dir = dirs.ensure(str(source_path / folder))
+            yield entry, folder, planner.reserve(target_dir, entry.name)
+    
+    def _execute(
+        self,
+        planned: Iterator[Tuple[ScanEntry, str, str]],
+        source_path: Path,
+        keep_journal: bool = False
+    ) -> Dict[str, int]:
+        """
+        Move stage: apply (or print) each planned move and count them per folder.
         
+        With keep_journal the journal stays open for further batches (watch
+        mode) until _close_journal().
+        """
         stats = defaultdict(int)
-        files = [f for f in source_path.iterdir() if f.is_file()]
         
-        print(f"\n{'DRY RUN - ' if self.dry_run else ''}Organizing {len(files)} files in {source_path}")
-        print("=" * 70)
+        if self.dry_run:
+            for entry, folder, dest in planned:
+                print(f"[WOULD MOVE] {entry.name} → {folder}/{os.path.basename(dest)}")
+                stats[folder] += 1
+            return dict(stats)
         
-        for file_path in files:
-            file_ext = file_path.suffix
-            category = self._get_category(file_ext)
-            
-            # Skip if category is "Others" and create_others is False
-            if category == "Others" and not create_others:
+        # Leave the previous journal alone when there is nothing to move
+        first = next(planned, None)
+        if first is None:
+            return {}
+        if self._journal is None:
+            self._check_journal()
+            self._journal = MoveJournal(self.journal_path)
+            self._journal.begin(source=str(source_path))
+        
+        # Every move is on disk in the journal before it is applied
+        try:
+            moves = self._journal.log_ahead(
+                (entry.path, dest, folder) for entry, folder, dest in itertools.chain([first], planned)
+            )
+            for result in MoveExecutor(self.workers).run(moves):
+                name = os.path.basename(result.source)
+                if not result.ok:
+                    print(f"[ERROR] Could not move {name}: {result.error}")
+                    continue
+                print(f"[MOVED] {name} → {result.tag}/{os.path.basename(result.destination)}")
+                stats[result.tag] += 1
+                if self.dedup == "link":
+                    self._placed[result.source] = result.destination
+        except BaseException:
+            # Moves may be half done; leave the journal without its end marker
+            self._close_journal(completed=False)
+            raise
+        
+        self.moved += sum(stats.values())
+        if not keep_journal:
+            self._close_journal()
+        
+        return dict(stats)
+    
+    def _dedupe(
+        self,
+        classified: Iterator[Tuple[ScanEntry, str]],
+        source_path: Path
+    ) -> Tuple[Iterator[Tuple[ScanEntry, str]], Dict[str, str]]:
+        """
+        Dedup stage: find files identical to one already organized or to an
+        earlier file of this run, and drop them from the run with --dedup skip.
+        """
+        with HashCache(self.hash_cache) as cache:
+            classified, duplicates = match_duplicates(classified, lambda folder: str(source_path / folder), cache)
+        
+        for path, original in duplicates.items():
+            action = "SKIP" if self.dedup == "skip" else "DUPLICATE"
+            print(f"[{action}] {os.path.relpath(path, source_path)} is a copy of {os.path.relpath(original, source_path)}")
+        
+        if self.dedup == "skip":
+            classified = [(entry, folder) for entry, folder in classified if entry.path not in duplicates]
+        return iter(classified), duplicates
+    
+    def _relink(self, duplicates: Dict[str, str]):
+        """After the moves, turn each moved duplicate into a hard link to its original."""
+        linked = saved = 0
+        for path, original in duplicates.items():
+            dest = self._placed.get(path)
+            if dest is None:
                 continue
-            
-            # Create category folder
-            category_dir = source_path / category
-            if not self.dry_run:
-                category_dir.mkdir(exist_ok=True)
-            
-            # Get safe destination path
-            dest_path = self._get_safe_destination(category_dir / file_path.name)
-            
-            # Move the file
             if self.dry_run:
-                print(f"[WOULD MOVE] {file_path.name} → {category}/{dest_path.name}")
-            else:
-                shutil.move(str(file_path), str(dest_path))
-                self.move_log.append((str(file_path), str(dest_path)))
-                print(f"[MOVED] {file_path.name} → {category}/{dest_path.name}")
-            
-            stats[category] += 1
+                print(f"[WOULD LINK] {os.path.basename(dest)}")
+                continue
+            try:
+                size = os.lstat(dest).st_size
+            except OSError:
+                continue
+            if relink(dest, self._placed.get(original, original)):
+                linked += 1
+                saved += size
         
+        self._placed.clear()
+        if linked:
+            print(f"[LINKED] {linked} duplicate(s) now share storage with their originals ({saved / 1024 / 1024:.1f} MB freed)")
+    
+    def _run(
+        self,
+        classified: Iterator[Tuple[ScanEntry, str]],
+        source_path: Path,
+        keep_journal: bool = False
+    ) -> Dict[str, int]:
+        """Plan and move classified files, with the dedup stage when enabled."""
+        if not self.dedup:
+            return self._execute(self._plan(classified, source_path), source_path, keep_journal)
+        
+        classified, duplicates = self._dedupe(classified, source_path)
+        if self.dry_run and self.dedup == "link":
+            # Nothing moves in a dry run, so the planned destinations stand in
+            planned = list(self._plan(classified, source_path))
+            self._placed = {entry.path: dest for entry, _folder, dest in planned}
+            stats = self._execute(iter(planned), source_path, keep_journal)
+        else:
+            stats = self._execute(self._plan(classified, source_path), source_path, keep_journal)
+        
+        if self.dedup == "link":
+            self._relink(duplicates)
+        return stats
+    
+    def _close_journal(self, completed: bool = True):
+        """Finish the journal of this run, if one was opened."""
+        if self._journal is not None:
+            self._journal.close(completed=completed, moved=self.moved)
+            self._journal = None
+    
+    def _check_journal(self):
+        """Refuse to overwrite the journal of an interrupted run."""
+        if os.path.exists(self.journal_path) and not is_complete(self.journal_path):
+            raise ValueError(
+                f"{self.journal_path} is the journal of an interrupted run. "
+                f"Finish it with --resume {self.journal_path} or roll it back with undo.py first."
+            )
+    
+    def resume(self, journal_path: str) -> Dict[str, int]:
+        """Apply the moves of an interrupted run that had not happened yet."""
+        if not os.path.exists(journal_path):
+            raise ValueError(f"Journal not found: {journal_path}")
+        if is_complete(journal_path):
+            print(f"{journal_path} is from a finished run, nothing to resume.")
+            return {}
+        
+        print(f"\n{'DRY RUN - ' if self.dry_run else ''}Resuming moves from {journal_path}")
+        print("=" * 70)
+        
+        stats = defaultdict(int)
+        dirs = DirectoryMaker(self.dry_run)
+        moves = (
+            (source, dest, os.path.basename(dirs.ensure(os.path.dirname(dest))))
+            for source, dest in pending_moves(journal_path)
+        )
+        
+        if self.dry_run:
+            for source, dest, folder in moves:
+                print(f"[WOULD MOVE] {os.path.basename(source)} → {folder}/{os.path.basename(dest)}")
+                stats[folder] += 1
+            return dict(stats)
+        
+        for result in MoveExecutor(self.workers).run(moves):
+            name = os.path.basename(result.source)
+            if not result.ok:
+                print(f"[ERROR] Could not move {name}: {result.error}")
+                continue
+            print(f"[MOVED] {name} → {result.tag}/{os.path.basename(result.destination)}")
+            stats[result.tag] += 1
+        
+        mark_complete(journal_path, sum(stats.values()))
+        self.journal_path = journal_path
+        self.moved = sum(stats.values())
         return dict(stats)
     
-    def organize_by_date(self, source_dir: str, date_format: str = "%Y/%m") -> Dict[str, int]:
-        """Organize files by their modification date."""
+    def _resolve_source(self, source_dir: str) -> Path:
+        """Resolve and validate the directory to organize."""
         source_path = Path(source_dir).resolve()
         
-        if not source_path.exists() or not source_path.is_dir():
+        if not source_path.is_dir():
             raise ValueError(f"Invalid source directory: {source_dir}")
         
-        stats = defaultdict(int)
-        files = [f for f in source_path.iterdir() if f.is_file()]
+        return source_path
+    
+    def organize_by_type(self, source_dir: str, create_others: bool = True) -> Dict[str, int]:
+        """Organize files in source_dir by their file type."""
+        source_path = self._resolve_source(source_dir)
         
-        print(f"\n{'DRY RUN - ' if self.dry_run else ''}Organizing {len(files)} files by date in {source_path}")
+        print(f"\n{'DRY RUN - ' if self.dry_run else ''}Organizing files in {source_path}")
         print("=" * 70)
         
-        for file_path in files:
-            # Get file modification time
-            mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-            date_folder = mod_time.strftime(date_format)
-            
-            # Create date folder structure
-            date_dir = source_path / date_folder
-            if not self.dry_run:
-                date_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Get safe destination path
-            dest_path = self._get_safe_destination(date_dir / file_path.name)
+        folders = category_folders(self.rules)
+        classified = classify_by_type(
+            self._scan(source_path, folders.__contains__), self.rules, create_others, self.sniffer
+        )
+        return self._run(classified, source_path)
+    
+    def _classify_by_date(self, entries: Iterator[ScanEntry], date_format: str) -> Iterator[Tuple[ScanEntry, str]]:
+        """Classify by modification date, or by capture date with --date-source exif."""
+        if self.date_source != "exif":
+            yield from classify_by_date(entries, date_format)
+            return
+        with MetadataCache(self.metadata_cache) as cache:
+            yield from classify_by_capture_date(entries, date_format, cache)
+    
+    def organize_by_date(self, source_dir: str, date_format: str = "%Y/%m") -> Dict[str, int]:
+        """Organize files by their modification date (or capture date with --date-source exif)."""
+        source_path = self._resolve_source(source_dir)
+        
+        print(f"\n{'DRY RUN - ' if self.dry_run else ''}Organizing files by date in {source_path}")
+        print("=" * 70)
+        
+        entries = self._scan(source_path, lambda name: is_date_folder(name, date_format))
+        classified = self._classify_by_date(entries, date_format)
+        return self._run(classified, source_path)
+    
+    def watch(
+        self,
+        source_dir: str,
+        by_date: bool = False,
+        date_format: str = "%Y/%m",
+        create_others: bool = True,
+        debounce: float = DEFAULT_DEBOUNCE
+    ) -> Dict[str, int]:
+        """
+        Organize source_dir, then keep organizing files as they arrive until
+        interrupted (Ctrl+C or SIGTERM).
+        
+        Files are picked up once their writer closes them or they are renamed
+        into place, in micro-batches debounced by `debounce` seconds. The whole
+        session shares one journal, so undo.py rolls back all of it.
+        """
+        if self.recursive:
+            raise ValueError("--watch only watches the top level of a directory and cannot be combined with --recursive")
+        source_path = self._resolve_source(source_dir)
+        journal = os.path.abspath(self.journal_path)
+        
+        def classify(entries: Iterator[ScanEntry]) -> Iterator[Tuple[ScanEntry, str]]:
+            if by_date:
+                return self._classify_by_date(entries, date_format)
+            return classify_by_type(entries, self.rules, create_others, self.sniffer)
+        
+        def arrived(paths: List[str]) -> Iterator[ScanEntry]:
+            # Same filtering as _scan
+            for entry in scan_paths(paths):
+                if entry.path != journal and not (self.exclude and is_excluded(entry.name, entry.name, self.exclude)):
+                    yield entry
+        
+        stats = defaultdict(int)
+        # Watch before the first pass, so nothing arriving in between is missed
+        with DirectoryWatcher(str(source_path), debounce) as watcher:
+            previous = signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
             
-            # Move the file
-            if self.dry_run:
-                print(f"[WOULD MOVE] {file_path.name} → {date_folder}/{dest_path.name}")
-            else:
-                shutil.move(str(file_path), str(dest_path))
-                self.move_log.append((str(file_path), str(dest_path)))
-                print(f"[MOVED] {file_path.name} → {date_folder}/{dest_path.name}")
+            print(f"\n{'DRY RUN - ' if self.dry_run else ''}Watching {source_path} ({watcher.backend})")
+            print("Press Ctrl+C to stop.")
+            print("=" * 70)
             
-            stats[date_folder] += 1
+            try:
+                first_pass = self._scan(source_path, lambda name: False)
+                for entries in itertools.chain([first_pass], map(arrived, watcher.batches())):
+                    batch = self._run(classify(entries), source_path, keep_journal=True)
+                    for folder, count in batch.items():
+                        stats[folder] += count
+            except KeyboardInterrupt:
+                pass
+            finally:
+                signal.signal(signal.SIGTERM, previous)
+                self._close_journal()
         
+        print("\nStopped watching.")
         return dict(stats)
     
-    def save_undo_log(self, log_path: str = "organize_undo.log"):
-        """Save the move log for potential undo operations."""
-        if self.dry_run or not self.move_log:
+    def save_undo_log(self):
+        """Tell the user where the undo journal is (it is written while moving)."""
+        if self.dry_run or not self.moved:
             return
         
-        with open(log_path, 'w') as f:
-            json.dump(self.move_log, f, indent=2)
-        print(f"\nUndo log saved to: {log_path}")
-        print(f"To undo, run: python src/undo.py {log_path}")
+        print(f"\nUndo log saved to: {self.journal_path}")
+        print(f"To undo, run: python src/undo.py {self.journal_path}")
     
     def print_summary(self, stats: Dict[str, int]):
         """Print a summary of the organization operation."""
@@ -192,12 +411,19 @@ Examples:
   python organizer.py ~/Downloads --dry-run          # Preview organization
   python organizer.py ~/Downloads                     # Organize by type
   python organizer.py ~/Downloads --by-date           # Organize by date
+  python organizer.py ~/Pictures --by-date --date-source exif  # By the date photos were taken
   python organizer.py ~/Downloads --config custom.json  # Use custom rules
+  python organizer.py ~/Downloads --recursive --exclude '.git' --exclude '*.part'
+  python organizer.py ~/Downloads --watch             # Keep organizing new downloads
+  python organizer.py ~/Downloads --dedup skip        # Leave byte-identical copies behind
+  python organizer.py ~/Downloads --sniff             # File misnamed downloads by their content
+  python organizer.py --resume organize_undo.log      # Finish an interrupted run
         """
     )
     
     parser.add_argument(
         "directory",
+        nargs="?",
         help="Directory to organize"
     )
     parser.add_argument(
@@ -215,6 +441,18 @@ Examples:
         default="%Y/%m",
         help="Date format for folder names (default: %%Y/%%m)"
     )
+    parser.add_argument(
+        "--date-source",
+        choices=DATE_SOURCES,
+        default="mtime",
+        help="With --by-date, date files by modification time or by the capture date in "
+             "their JPEG/TIFF/PNG metadata, falling back to modification time (default: mtime)"
+    )
+    parser.add_argument(
+        "--metadata-cache",
+        default=DEFAULT_METADATA_CACHE_PATH,
+        help=f"SQLite cache of capture dates reused across runs (default: {DEFAULT_METADATA_CACHE_PATH})"
+    )
     parser.add_argument(
         "--config",
         help="Path to custom configuration JSON file"
@@ -224,13 +462,102 @@ Examples:
         action="store_true",
         help="Don't create 'Others' folder for uncategorized files"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Threads for copying files across devices (default: {DEFAULT_WORKERS})"
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Also organize files in subdirectories (the folders organizing creates are skipped)"
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        help="With --recursive, how many directory levels below the source to enter (default: unlimited)"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip files and directories matching GLOB (by name or relative path); repeatable"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After organizing, keep watching the directory and organize new files as they arrive"
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        help=f"With --watch, seconds a new file must stay untouched before it is moved (default: {DEFAULT_DEBOUNCE})"
+    )
+    parser.add_argument(
+        "--dedup",
+        choices=DEDUP_MODES,
+        help="Find files identical to one already organized (or to another new file): "
+             "skip leaves them in place, link hard-links them to the original, report only lists them"
+    )
+    parser.add_argument(
+        "--hash-cache",
+        default=DEFAULT_CACHE_PATH,
+        help=f"SQLite cache of file hashes reused across runs (default: {DEFAULT_CACHE_PATH})"
+    )
+    parser.add_argument(
+        "--sniff",
+        action="store_true",
+        help="Detect file types from their first bytes when the extension is missing or wrong"
+    )
+    parser.add_argument(
+        "--journal",
+        default="organize_undo.log",
+        help="Where to write the move journal used by undo.py (default: organize_undo.log)"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="JOURNAL",
+        help="Finish the moves of an interrupted run recorded in JOURNAL"
+    )
     
     args = parser.parse_args()
+    if not args.directory and not args.resume:
+        parser.error("a directory to organize (or --resume JOURNAL) is required")
+    if args.date_source != "mtime" and not args.by_date:
+        parser.error("--date-source only applies to --by-date")
+    if args.watch and (args.resume or args.recursive):
+        parser.error("--watch cannot be combined with --resume or --recursive")
     
     try:
-        organizer = FileOrganizer(config_path=args.config, dry_run=args.dry_run)
+        organizer = FileOrganizer(
+            config_path=args.config,
+            dry_run=args.dry_run,
+            workers=args.workers,
+            journal_path=args.journal,
+            recursive=args.recursive,
+            max_depth=args.max_depth,
+            exclude=args.exclude,
+            dedup=args.dedup,
+            hash_cache=args.hash_cache,
+            sniff=args.sniff,
+            date_source=args.date_source,
+            metadata_cache=args.metadata_cache
+        )
         
-        if args.by_date:
+        if args.resume:
+            stats = organizer.resume(args.resume)
+        elif args.watch:
+            stats = organizer.watch(
+                args.directory,
+                by_date=args.by_date,
+                date_format=args.date_format,
+                create_others=not args.no_others,
+                debounce=args.debounce
+            )
+        elif args.by_date:
             stats = organizer.organize_by_date(args.directory, args.date_format)
         else:
             stats = organizer.organize_by_type(args.directory, create_others=not args.no_others)
@@ -239,7 +566,7 @@ Examples:
         
         if not args.dry_run:
             organizer.save_undo_log()
-        
+    
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
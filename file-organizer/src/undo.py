@@ -5,10 +5,11 @@ Undo Script - Reverse file organization operations
 
 import os
 import sys
-import json
 import shutil
 from pathlib import Path
 
+from fileorg.journal import is_complete, read_moves_reversed
+
 
 def undo_organization(log_path: str, dry_run: bool = False):
     """Undo a file organization operation using the log file."""
@@ -17,25 +18,27 @@ def undo_organization(log_path: str, dry_run: bool = False):
         print(f"Error: Log file not found: {log_path}")
         sys.exit(1)
     
-    # Load the move log
-    with open(log_path, 'r') as f:
-        moves = json.load(f)
-    
-    if not moves:
-        print("No moves to undo.")
-        return
+    complete = is_complete(log_path)
     
-    print(f"\n{'DRY RUN - ' if dry_run else ''}Undoing {len(moves)} file moves")
+    print(f"\n{'DRY RUN - ' if dry_run else ''}Undoing file moves from {log_path}")
+    if not complete:
+        print("The run that wrote this log was interrupted; moves that never happened are skipped.")
     print("=" * 70)
     
     success_count = 0
     error_count = 0
+    pending_count = 0
     
-    # Reverse the moves (process in reverse order)
-    for source, dest in reversed(moves):
+    # Stream the journal newest-first, never loading it whole
+    for source, dest in read_moves_reversed(log_path):
         source_path = Path(source)
         dest_path = Path(dest)
         
+        if not complete and source_path.exists() and not dest_path.exists():
+            # Journaled ahead of time but never moved
+            pending_count += 1
+            continue
+        
         if not dest_path.exists():
             print(f"[SKIP] File no longer exists: {dest_path.name}")
             error_count += 1
@@ -64,6 +67,8 @@ def undo_organization(log_path: str, dry_run: bool = False):
     print("=" * 70)
     print(f"Successfully restored: {success_count}")
     print(f"Errors/Skipped: {error_count}")
+    if pending_count:
+        print(f"Never moved: {pending_count}")
     
     if not dry_run and success_count > 0:
         print(f"\nOriginal log file preserved at: {log_path}")